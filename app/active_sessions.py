@@ -0,0 +1,185 @@
+"""
+Registry of active parking sessions, keyed by plate and by session id.
+
+Entries are added when a session is opened through /api/parking/entry and
+dropped when it is closed, so exits, live cost quotes and "is this car
+inside" checks do not need to touch the database.
+
+Other workers (and direct SQL) open and close sessions too: a trigger on
+`parking_sessions` sends every change on the `active_sessions` channel and
+the pg_listener thread applies it here. While the listener is connected and
+the registry was loaded under that connection, a missing plate means the
+car is not inside; otherwise lookups fall back to the database. Exits always
+confirm a miss in the database. Wallets are not cached: the car's owner can
+change while it is inside, so process_exit() resolves the wallet itself.
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app import pg_listener
+from app.database import SessionLocal
+from app.models import Car, ParkingSession
+
+CHANNEL = "active_sessions"
+
+
+@dataclass(frozen=True)
+class ActiveSession:
+    session_id: str
+    car_id: str
+    plate_number: str
+    tariff_id: str
+    entry_time: datetime
+    spot_id: Optional[str] = None
+
+
+_by_id: Dict[str, ActiveSession] = {}
+_by_plate: Dict[str, ActiveSession] = {}
+_lock = threading.Lock()
+# pg_listener generation the registry was fully loaded under (0 = never)
+_loaded_generation = 0
+
+
+def remember(session: ActiveSession) -> None:
+    with _lock:
+        previous = _by_plate.get(session.plate_number)
+        if previous is not None:
+            _by_id.pop(previous.session_id, None)
+        _by_id[session.session_id] = session
+        _by_plate[session.plate_number] = session
+
+
+def forget(session_id=None, plate_number: Optional[str] = None) -> None:
+    with _lock:
+        session = None
+        if session_id is not None:
+            session = _by_id.pop(str(session_id), None)
+        if plate_number is not None:
+            session = _by_plate.get(plate_number) or session
+        if session is not None:
+            _by_id.pop(session.session_id, None)
+            if _by_plate.get(session.plate_number) is session:
+                del _by_plate[session.plate_number]
+
+
+def clear() -> None:
+    global _loaded_generation
+    with _lock:
+        _by_id.clear()
+        _by_plate.clear()
+        _loaded_generation = 0
+
+
+def is_complete() -> bool:
+    """True when every active session is known, so a miss needs no database check"""
+    return _loaded_generation != 0 and pg_listener.is_connected() and _loaded_generation == pg_listener.generation
+
+
+def _query(db: Session):
+    return (
+        db.query(
+            ParkingSession.id,
+            ParkingSession.car_id,
+            Car.plate_number,
+            ParkingSession.tariff_id,
+            ParkingSession.entry_time,
+            ParkingSession.spot_id,
+        )
+        .join(Car, Car.id == ParkingSession.car_id)
+        .filter(ParkingSession.status == "active")
+    )
+
+
+def _to_session(row) -> ActiveSession:
+    return ActiveSession(
+        session_id=str(row[0]),
+        car_id=str(row[1]),
+        plate_number=row[2],
+        tariff_id=str(row[3]),
+        entry_time=row[4],
+        spot_id=str(row[5]) if row[5] else None,
+    )
+
+
+def _load(db: Session, *criteria) -> Optional[ActiveSession]:
+    row = _query(db).filter(*criteria).order_by(ParkingSession.entry_time.desc()).first()
+    if not row:
+        return None
+    session = _to_session(row)
+    remember(session)
+    return session
+
+
+def load_all(db: Session, generation: int) -> None:
+    global _loaded_generation
+    # oldest first, so a car with several active sessions ends up with the latest
+    sessions = [_to_session(row) for row in _query(db).order_by(ParkingSession.entry_time).all()]
+    with _lock:
+        _by_id.clear()
+        _by_plate.clear()
+        for session in sessions:
+            _by_id[session.session_id] = session
+            _by_plate[session.plate_number] = session
+        _loaded_generation = generation
+
+
+def get_by_id(db: Session, session_id) -> Optional[ActiveSession]:
+    session = _by_id.get(str(session_id))
+    if session is not None or is_complete():
+        return session
+    return _load(db, ParkingSession.id == str(session_id))
+
+
+def get_by_plate(db: Session, plate_number: str, confirm_miss: bool = False) -> Optional[ActiveSession]:
+    """`confirm_miss` checks the database even when the registry is complete (used where a miss refuses service)"""
+    session = _by_plate.get(plate_number)
+    if session is not None or (is_complete() and not confirm_miss):
+        return session
+    return _load(db, Car.plate_number == plate_number)
+
+
+def refresh_car(db: Session, car_id) -> None:
+    """Re-read the car's active session after the car changed (e.g. a new plate number)"""
+    key = str(car_id)
+    with _lock:
+        for session in [s for s in _by_id.values() if s.car_id == key]:
+            del _by_id[session.session_id]
+            if _by_plate.get(session.plate_number) is session:
+                del _by_plate[session.plate_number]
+    _load(db, ParkingSession.car_id == key)
+
+
+def _on_notify(payload: str) -> None:
+    change = json.loads(payload)
+    if change["op"] != "open":
+        forget(session_id=change["session_id"])
+        return
+    remember(
+        ActiveSession(
+            session_id=change["session_id"],
+            car_id=change["car_id"],
+            plate_number=change["plate_number"],
+            tariff_id=change["tariff_id"],
+            entry_time=datetime.fromisoformat(change["entry_time"]),
+            spot_id=change["spot_id"],
+        )
+    )
+
+
+def _resync() -> None:
+    generation = pg_listener.generation
+    db = SessionLocal()
+    try:
+        load_all(db, generation)
+    finally:
+        db.close()
+
+
+def startup() -> None:
+    pg_listener.subscribe(CHANNEL, _on_notify, _resync)
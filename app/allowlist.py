@@ -0,0 +1,137 @@
+"""
+Offline allowlist for gate controllers.
+
+Controllers download a full snapshot once and then poll for deltas, so they
+can keep deciding while the API or Postgres is unreachable. Both are binary:
+
+    header  ">4sBBHQQI": magic (b"PKAL" snapshot, b"PKAD" delta), format
+            version, hash size in bytes, reserved, version, since-version
+            (0 for snapshots), record count
+    body    zlib-compressed: HASH_BYTES byte planes of the delta-encoded
+            sorted plate hashes, then one flags byte per record
+
+A plate hash is the first HASH_BYTES bytes of blake2b over the normalized
+plate (see plate_index.normalize_plate), read as a big-endian integer. Flags
+come from the SQL function allowlist_flags(): bits 0-1 are the balance tier
+(0 means entry is not allowed), bit 7 marks a blocked user. In deltas
+REMOVED marks a plate that is no longer registered or active.
+
+Versions are Postgres transaction ids: a version is the oldest transaction
+still running when the data was read, and a delta returns every change made
+by transactions at or after it. A change can therefore be delivered twice,
+but never missed; applying a record is idempotent.
+"""
+
+import struct
+import zlib
+from hashlib import blake2b
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.plate_index import normalize_plate
+
+SNAPSHOT_MAGIC = b"PKAL"
+DELTA_MAGIC = b"PKAD"
+# 2: Cyrillic О is hashed as 0 (normalize_plate); controllers must reload a snapshot
+FORMAT_VERSION = 2
+HASH_BYTES = 6
+BLOCKED = 0x80
+REMOVED = 0xFF
+# history older than this is dropped by prune_changes()
+CHANGES_RETENTION = "7 days"
+
+_HEADER = struct.Struct(">4sBBHQQI")
+
+_ALLOWLIST_ROWS = """
+    SELECT c.plate_number, allowlist_flags(w.balance, u.is_blocked)
+    FROM cars c
+    JOIN users u ON u.id = c.user_id
+    LEFT JOIN wallets w ON w.user_id = c.user_id
+    WHERE c.is_active = TRUE
+"""
+
+
+def plate_hash(plate_number: str) -> int:
+    digest = blake2b(normalize_plate(plate_number).encode(), digest_size=HASH_BYTES).digest()
+    return int.from_bytes(digest, "big")
+
+
+def encode(magic: bytes, version: int, since: int, records: Iterable[Tuple[str, int]]) -> bytes:
+    """Pack (plate, flags) records.
+
+    Plates sharing a hash are merged so that a collision never lets a car in
+    that one of them would not: BLOCKED is kept if any record has it, the
+    balance tier is the lowest one, and REMOVED only when every record is removed.
+    """
+    pairs = [(plate_hash(plate), flags) for plate, flags in records]
+    hashes = np.fromiter((h for h, _ in pairs), dtype=np.uint64, count=len(pairs))
+    flags = np.fromiter((f for _, f in pairs), dtype=np.uint8, count=len(pairs))
+
+    order = np.argsort(hashes, kind="stable")
+    hashes, flags = hashes[order], flags[order]
+    hashes, first = np.unique(hashes, return_index=True)
+    if len(first):
+        live = flags != REMOVED
+        tier = np.minimum.reduceat(np.where(live, flags & ~np.uint8(BLOCKED), REMOVED).astype(np.uint8), first)
+        blocked = np.maximum.reduceat(np.where(live, flags & np.uint8(BLOCKED), 0).astype(np.uint8), first)
+        flags = np.where(tier == REMOVED, REMOVED, tier | blocked).astype(np.uint8)
+    else:
+        flags = flags[first]
+
+    deltas = np.diff(hashes, prepend=np.uint64(0))
+    planes = deltas.astype(">u8").view(np.uint8).reshape(-1, 8)[:, 8 - HASH_BYTES:]
+    body = zlib.compress(planes.T.tobytes() + flags.tobytes(), 6)
+    return _HEADER.pack(magic, FORMAT_VERSION, HASH_BYTES, 0, version, since, len(hashes)) + body
+
+
+def decode(blob: bytes) -> Tuple[bytes, int, int, np.ndarray, np.ndarray]:
+    """Reference decoder: (magic, version, since, hashes, flags)"""
+    magic, _, hash_bytes, _, version, since, count = _HEADER.unpack_from(blob)
+    raw = np.frombuffer(zlib.decompress(blob[_HEADER.size:]), dtype=np.uint8)
+    planes = raw[: count * hash_bytes].reshape(hash_bytes, count).T
+    padded = np.zeros((count, 8), dtype=np.uint8)
+    padded[:, 8 - hash_bytes:] = planes
+    hashes = np.cumsum(padded.view(">u8").ravel().astype(np.uint64), dtype=np.uint64)
+    return magic, version, since, hashes, raw[count * hash_bytes:].copy()
+
+
+def current_version(db: Session) -> int:
+    return db.execute(text("SELECT txid_snapshot_xmin(txid_current_snapshot())")).scalar()
+
+
+def prune_changes(db: Session) -> None:
+    """Drop change history older than CHANGES_RETENTION; controllers behind that get 410 and reload a snapshot"""
+    db.execute(text("SELECT prune_allowlist_changes(CAST(:keep AS INTERVAL))"), {"keep": CHANGES_RETENTION})
+    db.commit()
+
+
+def build_snapshot(db: Session) -> Tuple[int, bytes]:
+    # the version is taken before the data, so anything the read misses shows up in the next delta
+    version = current_version(db)
+    rows = db.execute(text(_ALLOWLIST_ROWS)).fetchall()
+    return version, encode(SNAPSHOT_MAGIC, version, 0, rows)
+
+
+def build_delta(db: Session, since: int) -> Optional[Tuple[int, bytes]]:
+    """Records changed since `since`, or None when that history has been pruned"""
+    pruned = db.execute(text("SELECT pruned_txid FROM allowlist_sync")).scalar() or 0
+    if since < pruned:
+        return None
+
+    version = current_version(db)
+    plates = [
+        row[0]
+        for row in db.execute(
+            text("SELECT DISTINCT plate_number FROM allowlist_changes WHERE txid >= :since"),
+            {"since": since},
+        )
+    ]
+    current = {}
+    if plates:
+        rows = db.execute(text(_ALLOWLIST_ROWS + " AND c.plate_number = ANY(:plates)"), {"plates": plates})
+        current = {plate: flags for plate, flags in rows}
+    records = [(plate, current.get(plate, REMOVED)) for plate in plates]
+    return version, encode(DELTA_MAGIC, version, since, records)
@@ -0,0 +1,559 @@
+"""
+Local columnar copy of the reporting data for the analytics endpoints.
+
+The reports of database/analytics_queries.sql scan whole months of sessions,
+transactions and entry logs; run against Postgres they compete with gate
+traffic for the same buffers and connections. Instead, a refresh copies the
+tables they need into Parquet files under ANALYTICS_DIR, and the reports run
+there through an embedded DuckDB (in requirements.txt; without it the app
+still starts and the reports answer 503).
+
+Layout: one directory per table. Fact tables (parking_sessions,
+wallet_transactions, entry_logs) are split by month of their time column,
+`<table>/<YYYY-MM>.parquet`; the small tables they join to are copied whole
+into `<table>/all.parquet`. Any `*.parquet` in a table directory is read, so a
+dataset written by `scripts/generate_test_data.py --format parquet` can be
+used as a store as is.
+
+A refresh reads everything in one read-only REPEATABLE READ transaction
+(ANALYTICS_SOURCE_URL, e.g. a replica; DATABASE_URL by default) through
+COPY ... TO STDOUT into a temporary CSV that DuckDB converts to Parquet, and
+replaces each file atomically, so readers never see a partial file. Only
+months that may still change are copied again: from the month of the oldest
+active session (closing it updates the row) or the current month, whichever
+is earlier; the first refresh and `full=True` copy everything. Edits to older
+rows (admin corrections) show up after a full refresh.
+
+With ANALYTICS_STORE=on every worker starts a thread that refreshes the store
+every ANALYTICS_REFRESH_SECONDS; a file lock lets only one process per store
+do the work. scripts/analytics_refresh.py does the same from cron.
+
+Each report opens its own in-memory DuckDB connection over the files, so
+queries never block each other or the refresh.
+
+The files copy phones, e-mails, balances and plates, so ANALYTICS_DIR and its
+table directories are kept at mode 0700 (a directory owned by another user is
+refused) and state.json and the lock file are written 0600.
+"""
+
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+
+from app.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_STORE = os.getenv("ANALYTICS_STORE", "off")
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "/tmp/parking-analytics")
+ANALYTICS_SOURCE_URL = os.getenv("ANALYTICS_SOURCE_URL", DATABASE_URL)
+REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "900"))
+THREADS = int(os.getenv("ANALYTICS_THREADS", "2"))
+MEMORY_LIMIT = os.getenv("ANALYTICS_MEMORY_LIMIT", "1GB")
+
+STATE_FILE = "state.json"
+LOCK_FILE = ".lock"
+# the store holds copies of phones, e-mails, balances and plates: owner-only access
+DIR_MODE = 0o700
+FILE_MODE = 0o600
+
+
+@dataclass(frozen=True)
+class Extract:
+    """A copied table: columns with their DuckDB types, month partitions by `time_column` if set"""
+    name: str
+    columns: Tuple[Tuple[str, str], ...]
+    time_column: Optional[str] = None
+
+
+_ID = "VARCHAR"
+TABLES = [
+    Extract("parking_sessions", (
+        ("id", _ID), ("car_id", _ID), ("spot_id", _ID), ("tariff_id", _ID), ("entry_time", "TIMESTAMP"),
+        ("exit_time", "TIMESTAMP"), ("total_cost", "DECIMAL(12,2)"), ("status", "VARCHAR"),
+    ), "entry_time"),
+    Extract("wallet_transactions", (
+        ("wallet_id", _ID), ("session_id", _ID), ("amount", "DECIMAL(12,2)"), ("operation_type", "VARCHAR"),
+        ("created_at", "TIMESTAMP"),
+    ), "created_at"),
+    Extract("entry_logs", (
+        ("plate_number", "VARCHAR"), ("gate_id", _ID), ("attempt_time", "TIMESTAMP"), ("result", "VARCHAR"),
+        ("reason", "VARCHAR"), ("attempt_count", "INTEGER"), ("car_id", _ID), ("user_id", _ID),
+    ), "attempt_time"),
+    Extract("users", (("id", _ID), ("phone", "VARCHAR"), ("email", "VARCHAR"), ("is_blocked", "BOOLEAN"))),
+    Extract("wallets", (("id", _ID), ("user_id", _ID), ("balance", "DECIMAL(12,2)"))),
+    Extract("cars", (("id", _ID), ("user_id", _ID), ("plate_number", "VARCHAR"), ("is_active", "BOOLEAN"))),
+    Extract("tariffs", (("id", _ID), ("name", "VARCHAR"), ("price_per_hour", "DECIMAL(10,2)"))),
+    Extract("parking_zones", (("id", _ID), ("name", "VARCHAR"))),
+    Extract("parking_spots", (("id", _ID), ("zone_id", _ID))),
+]
+
+# first month that a refresh copies again: closing an active session rewrites its row,
+# collapsed denials keep updating rows of the last few minutes
+_REEXTRACT_FROM = """
+    SELECT LEAST(
+        date_trunc('month', LOCALTIMESTAMP - interval '1 day'),
+        (SELECT date_trunc('month', MIN(entry_time)) FROM parking_sessions WHERE status = 'active')
+    )::date
+"""
+
+_refresh_lock = threading.Lock()
+# set once every table has files; they are only ever replaced, never removed
+_ready = False
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    return duckdb
+
+
+def installed() -> bool:
+    return _duckdb() is not None
+
+
+def _quote(path: str) -> str:
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _month_after(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _months(first: date, last: date) -> List[date]:
+    months, month = [], first.replace(day=1)
+    while month <= last:
+        months.append(month)
+        month = _month_after(month)
+    return months
+
+
+# --- refresh ----------------------------------------------------------------
+
+def _private_dir(path: str) -> None:
+    """Create `path` readable only by this user; refuse a directory someone else owns"""
+    os.makedirs(path, mode=DIR_MODE, exist_ok=True)
+    if os.stat(path).st_uid != os.getuid():
+        raise RuntimeError(f"{path} is owned by another user, set ANALYTICS_DIR to a private directory")
+    # makedirs applies the umask and leaves existing directories alone
+    os.chmod(path, DIR_MODE)
+
+
+def _open_private(path: str):
+    return os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE), "w")
+
+
+def _copy_table(pg, duck, extract: Extract, target: str, where: str = "", params: Optional[dict] = None) -> int:
+    """
+    One COPY from Postgres into `target` (Parquet); returns the row count.
+    The file is swapped in atomically and written even for zero rows: a
+    report globbing the directory must never see a path disappear.
+    """
+    columns = ", ".join(name for name, _ in extract.columns)
+    types = ", ".join(f"'{name}': '{kind}'" for name, kind in extract.columns)
+    _private_dir(os.path.dirname(target))
+    fd, csv_path = tempfile.mkstemp(suffix=".csv", dir=ANALYTICS_DIR)
+    try:
+        with pg.cursor() as cur, os.fdopen(fd, "w", encoding="utf-8") as f:
+            query = cur.mogrify(f"SELECT {columns} FROM {extract.name} {where}", params).decode()
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", f)
+        rows = duck.execute(
+            f"COPY (SELECT * FROM read_csv({_quote(csv_path)}, header = true, columns = {{{types}}})) "
+            f"TO {_quote(target + '.tmp')} (FORMAT parquet, COMPRESSION zstd)"
+        ).fetchone()[0]
+        os.replace(target + ".tmp", target)
+        return rows
+    finally:
+        os.remove(csv_path)
+
+
+def _copy_facts(pg, duck, extract: Extract, since: Optional[date]) -> None:
+    directory = os.path.join(ANALYTICS_DIR, extract.name)
+    with pg.cursor() as cur:
+        cur.execute(f"SELECT MIN({extract.time_column})::date, LOCALTIMESTAMP::date FROM {extract.name}")
+        first, today = cur.fetchone()
+    written = set()
+    if first is not None:
+        for month in _months(max(first, since or first), today):
+            where = f"WHERE {extract.time_column} >= %(start)s AND {extract.time_column} < %(end)s"
+            target = os.path.join(directory, f"{month:%Y-%m}.parquet")
+            _copy_table(pg, duck, extract, target, where, {"start": month, "end": _month_after(month)})
+            written.add(target)
+    if since is None:
+        # full copy: months that no longer have rows are emptied, not deleted,
+        # so a report running concurrently never loses a file it has listed
+        for path in glob.glob(os.path.join(directory, "*.parquet")):
+            if path not in written:
+                _copy_table(pg, duck, extract, path, "WHERE false")
+    if not glob.glob(os.path.join(directory, "*.parquet")):
+        # keeps the table readable (with no rows) before anything was recorded in it
+        _copy_table(pg, duck, extract, os.path.join(directory, "empty.parquet"), "WHERE false")
+
+
+def read_state() -> Optional[dict]:
+    try:
+        with open(os.path.join(ANALYTICS_DIR, STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(state: dict) -> None:
+    path = os.path.join(ANALYTICS_DIR, STATE_FILE)
+    with _open_private(path + ".tmp") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def refresh(full: bool = False) -> Optional[dict]:
+    """
+    Bring the store up to date with the database. Returns the new state, or
+    None when another thread or process is already refreshing this store.
+    """
+    duckdb = _duckdb()
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed")
+    if not _refresh_lock.acquire(blocking=False):
+        return None
+    try:
+        _private_dir(ANALYTICS_DIR)
+        with _open_private(os.path.join(ANALYTICS_DIR, LOCK_FILE)) as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            return _refresh(duckdb, full)
+    finally:
+        _refresh_lock.release()
+
+
+def _refresh(duckdb, full: bool) -> dict:
+    started = time.perf_counter()
+    previous = read_state()
+    since = None
+    if not full and previous and previous.get("reextract_from"):
+        since = date.fromisoformat(previous["reextract_from"])
+
+    # psycopg2 wants a libpq URL, not the SQLAlchemy dialect form
+    pg = psycopg2.connect(ANALYTICS_SOURCE_URL.replace("postgresql+psycopg2://", "postgresql://"))
+    duck = duckdb.connect(config={"threads": THREADS, "memory_limit": MEMORY_LIMIT})
+    try:
+        # one snapshot for all tables: sessions, charges and logs stay consistent with each other
+        pg.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        with pg.cursor() as cur:
+            cur.execute(_REEXTRACT_FROM)
+            reextract_from = cur.fetchone()[0]
+        for extract in TABLES:
+            if extract.time_column:
+                _copy_facts(pg, duck, extract, since)
+            else:
+                _copy_table(pg, duck, extract, os.path.join(ANALYTICS_DIR, extract.name, "all.parquet"))
+        pg.rollback()
+
+        rows = {}
+        for extract in TABLES:
+            pattern = os.path.join(ANALYTICS_DIR, extract.name, "*.parquet")
+            rows[extract.name] = duck.execute(f"SELECT COUNT(*) FROM read_parquet({_quote(pattern)})").fetchone()[0]
+    finally:
+        duck.close()
+        pg.close()
+
+    state = {
+        "refreshed_at": datetime.now().isoformat(timespec="seconds"),
+        "full": since is None,
+        "copied_from": since.isoformat() if since else None,
+        "reextract_from": reextract_from.isoformat(),
+        "duration_s": round(time.perf_counter() - started, 1),
+        "rows": rows,
+    }
+    _write_state(state)
+    logger.info("Analytics store refreshed in %.1f s (%s)", state["duration_s"], "full" if since is None else f"from {since}")
+    return state
+
+
+def refresh_in_background(full: bool = False) -> bool:
+    """Start a refresh in a separate thread; False if one is already running in this process"""
+    if _refresh_lock.locked():
+        return False
+
+    def _run() -> None:
+        try:
+            refresh(full)
+        except Exception:
+            logger.exception("Analytics store refresh failed")
+
+    threading.Thread(target=_run, name="analytics-refresh", daemon=True).start()
+    return True
+
+
+def _run() -> None:
+    delay = 0.0
+    while not _stop.wait(delay):
+        try:
+            refresh()
+        except Exception:
+            logger.exception("Analytics store refresh failed")
+        delay = REFRESH_SECONDS
+
+
+def start() -> None:
+    global _thread
+    if ANALYTICS_STORE != "on" or _thread is not None:
+        return
+    if not installed():
+        logger.warning("ANALYTICS_STORE=on but duckdb is not installed; analytics store disabled")
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="analytics-store", daemon=True)
+    _thread.start()
+
+
+def stop() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        # a refresh in progress is not interrupted; its files are replaced atomically anyway
+        _thread.join(timeout=1)
+        _thread = None
+
+
+# --- reports ----------------------------------------------------------------
+
+_DURATION_HOURS = "date_diff('second', ps.entry_time, ps.exit_time) / 3600.0"
+
+REPORTS: Dict[str, str] = {
+    "hourly_load": """
+        SELECT hour(entry_time) AS hour, COUNT(*) AS entries_count, COUNT(DISTINCT car_id) AS unique_cars
+        FROM parking_sessions
+        WHERE entry_time >= $since
+        GROUP BY 1
+        ORDER BY entries_count DESC
+    """,
+    "daily_load": """
+        SELECT CAST(entry_time AS DATE) AS date, COUNT(*) AS entries_count,
+               COUNT(DISTINCT car_id) AS unique_cars, SUM(total_cost) AS daily_revenue
+        FROM parking_sessions
+        WHERE entry_time >= $since AND status = 'completed'
+        GROUP BY 1
+        ORDER BY entries_count DESC
+        LIMIT $limit
+    """,
+    "peak_hours": """
+        SELECT date, hour, entries_count,
+               RANK() OVER (PARTITION BY date ORDER BY entries_count DESC) AS rank_in_day,
+               RANK() OVER (ORDER BY entries_count DESC) AS rank_overall
+        FROM (
+            SELECT CAST(entry_time AS DATE) AS date, hour(entry_time) AS hour, COUNT(*) AS entries_count
+            FROM parking_sessions
+            WHERE entry_time >= $since
+            GROUP BY 1, 2
+        )
+        ORDER BY entries_count DESC
+        LIMIT $limit
+    """,
+    "revenue_by_tariff_zone": """
+        SELECT t.name AS tariff_name, z.name AS zone_name, COUNT(*) AS sessions_count,
+               SUM(ps.total_cost) AS total_revenue, AVG(ps.total_cost) AS avg_session_cost,
+               MIN(ps.total_cost) AS min_cost, MAX(ps.total_cost) AS max_cost
+        FROM parking_sessions ps
+        JOIN tariffs t ON t.id = ps.tariff_id
+        LEFT JOIN parking_spots s ON s.id = ps.spot_id
+        LEFT JOIN parking_zones z ON z.id = s.zone_id
+        WHERE ps.status = 'completed' AND ps.entry_time >= $since
+        GROUP BY t.id, t.name, z.id, z.name
+        ORDER BY total_revenue DESC
+    """,
+    "daily_revenue_by_tariff": """
+        SELECT CAST(ps.entry_time AS DATE) AS date, t.name AS tariff_name,
+               COUNT(*) AS sessions_count, SUM(ps.total_cost) AS revenue
+        FROM parking_sessions ps
+        JOIN tariffs t ON t.id = ps.tariff_id
+        WHERE ps.status = 'completed' AND ps.entry_time >= $since
+        GROUP BY 1, t.id, t.name
+        ORDER BY date DESC, revenue DESC
+    """,
+    "daily_revenue": """
+        SELECT CAST(entry_time AS DATE) AS date, COUNT(*) AS sessions_count,
+               SUM(total_cost) AS daily_revenue, AVG(total_cost) AS avg_session_cost,
+               LAG(SUM(total_cost)) OVER (ORDER BY CAST(entry_time AS DATE)) AS prev_day_revenue,
+               SUM(total_cost) - LAG(SUM(total_cost)) OVER (ORDER BY CAST(entry_time AS DATE)) AS revenue_change
+        FROM parking_sessions
+        WHERE status = 'completed' AND entry_time >= $since
+        GROUP BY 1
+        ORDER BY date DESC
+    """,
+    "tariff_durations": f"""
+        SELECT t.name AS tariff_name, COUNT(*) AS sessions_count,
+               AVG({_DURATION_HOURS}) * 60 AS avg_duration_minutes,
+               AVG({_DURATION_HOURS}) AS avg_duration_hours,
+               AVG(ps.total_cost) AS avg_cost
+        FROM parking_sessions ps
+        JOIN tariffs t ON t.id = ps.tariff_id
+        WHERE ps.status = 'completed' AND ps.exit_time IS NOT NULL AND ps.entry_time >= $since
+        GROUP BY t.id, t.name
+        ORDER BY avg_duration_minutes DESC
+    """,
+    "zone_usage": """
+        SELECT z.name AS zone_name, COUNT(DISTINCT ps.id) AS total_sessions,
+               COUNT(DISTINCT ps.id) FILTER (WHERE ps.status = 'active') AS active_sessions,
+               COUNT(DISTINCT ps.spot_id) AS used_spots,
+               AVG(date_diff('second', ps.entry_time, ps.exit_time) / 60.0) AS avg_duration_minutes
+        FROM parking_sessions ps
+        JOIN parking_spots s ON s.id = ps.spot_id
+        JOIN parking_zones z ON z.id = s.zone_id
+        WHERE ps.entry_time >= $since
+        GROUP BY z.id, z.name
+        ORDER BY total_sessions DESC
+    """,
+    "long_sessions": f"""
+        SELECT ps.id AS session_id, c.plate_number, u.phone, ps.entry_time, ps.exit_time, ps.total_cost,
+               {_DURATION_HOURS} AS duration_hours, t.name AS tariff_name
+        FROM parking_sessions ps
+        JOIN cars c ON c.id = ps.car_id
+        JOIN users u ON u.id = c.user_id
+        JOIN tariffs t ON t.id = ps.tariff_id
+        WHERE ps.status = 'completed' AND ps.exit_time IS NOT NULL AND ps.entry_time >= $since
+          AND {_DURATION_HOURS} > $min_hours
+        ORDER BY duration_hours DESC
+        LIMIT $limit
+    """,
+    "expensive_sessions": f"""
+        SELECT ps.id AS session_id, c.plate_number, u.phone, ps.entry_time, ps.exit_time, ps.total_cost,
+               t.name AS tariff_name, t.price_per_hour, {_DURATION_HOURS} AS duration_hours
+        FROM parking_sessions ps
+        JOIN cars c ON c.id = ps.car_id
+        JOIN users u ON u.id = c.user_id
+        JOIN tariffs t ON t.id = ps.tariff_id
+        WHERE ps.status = 'completed' AND ps.entry_time >= $since
+          AND ps.total_cost > (
+              SELECT AVG(total_cost) * $factor FROM parking_sessions
+              WHERE status = 'completed' AND entry_time >= $since
+          )
+        ORDER BY ps.total_cost DESC
+        LIMIT $limit
+    """,
+    "top_users": """
+        SELECT u.id AS user_id, u.phone, u.email, COUNT(DISTINCT c.id) AS cars_count,
+               COUNT(*) AS total_sessions, SUM(ps.total_cost) AS total_spent,
+               AVG(ps.total_cost) AS avg_session_cost,
+               MIN(ps.entry_time) AS first_session, MAX(ps.entry_time) AS last_session
+        FROM parking_sessions ps
+        JOIN cars c ON c.id = ps.car_id
+        JOIN users u ON u.id = c.user_id
+        WHERE ps.status = 'completed' AND ps.entry_time >= $since
+        GROUP BY u.id, u.phone, u.email
+        ORDER BY total_sessions DESC, total_spent DESC
+        LIMIT $limit
+    """,
+    "top_spenders": """
+        SELECT u.phone, u.email, SUM(ps.total_cost) AS total_spent, COUNT(*) AS sessions_count,
+               w.balance AS current_balance
+        FROM parking_sessions ps
+        JOIN cars c ON c.id = ps.car_id
+        JOIN users u ON u.id = c.user_id
+        JOIN wallets w ON w.user_id = u.id
+        WHERE ps.status = 'completed' AND ps.entry_time >= $since
+        GROUP BY u.id, u.phone, u.email, w.balance
+        ORDER BY total_spent DESC
+        LIMIT $limit
+    """,
+    "top_cars": f"""
+        SELECT c.plate_number, u.phone AS owner_phone, COUNT(*) AS total_sessions,
+               SUM(ps.total_cost) AS total_spent, AVG({_DURATION_HOURS}) * 60 AS avg_duration_minutes,
+               MIN(ps.entry_time) AS first_use, MAX(ps.entry_time) AS last_use
+        FROM parking_sessions ps
+        JOIN cars c ON c.id = ps.car_id
+        JOIN users u ON u.id = c.user_id
+        WHERE ps.status = 'completed' AND c.is_active AND ps.entry_time >= $since
+        GROUP BY c.id, c.plate_number, u.phone
+        ORDER BY total_sessions DESC
+        LIMIT $limit
+    """,
+    "debtors": """
+        SELECT u.id AS user_id, u.phone, u.email, w.balance,
+               COUNT(ps.id) AS active_sessions, u.is_blocked
+        FROM wallets w
+        JOIN users u ON u.id = w.user_id
+        LEFT JOIN cars c ON c.user_id = u.id
+        LEFT JOIN parking_sessions ps ON ps.car_id = c.id AND ps.status = 'active'
+        WHERE w.balance < 0
+        GROUP BY u.id, u.phone, u.email, w.balance, u.is_blocked
+        ORDER BY w.balance
+        LIMIT $limit
+    """,
+    # repeated denials are collapsed into one row with attempt_count
+    "entry_results": """
+        SELECT result, SUM(attempt_count) AS attempts_count,
+               SUM(attempt_count) * 100.0 / SUM(SUM(attempt_count)) OVER () AS percentage
+        FROM entry_logs
+        WHERE attempt_time >= $since
+        GROUP BY result
+    """,
+    "denial_reasons": """
+        SELECT reason, SUM(attempt_count) AS denied_count
+        FROM entry_logs
+        WHERE result = 'denied' AND attempt_time >= $since
+        GROUP BY reason
+        ORDER BY denied_count DESC
+    """,
+    "wallet_operations": """
+        SELECT operation_type, COUNT(*) AS transactions_count, SUM(amount) AS total_amount,
+               AVG(amount) AS avg_amount, MIN(amount) AS min_amount, MAX(amount) AS max_amount
+        FROM wallet_transactions
+        WHERE created_at >= $since
+        GROUP BY operation_type
+        ORDER BY transactions_count DESC
+    """,
+    "daily_wallet_operations": """
+        SELECT CAST(created_at AS DATE) AS date, operation_type,
+               COUNT(*) AS transactions_count, SUM(amount) AS total_amount
+        FROM wallet_transactions
+        WHERE created_at >= $since
+        GROUP BY 1, operation_type
+        ORDER BY date DESC, operation_type
+    """,
+}
+
+
+def unavailable_reason() -> Optional[str]:
+    """Why reports cannot run right now, or None"""
+    global _ready
+    if _ready:
+        return None
+    if not installed():
+        return "duckdb is not installed"
+    missing = [e.name for e in TABLES if not glob.glob(os.path.join(ANALYTICS_DIR, e.name, "*.parquet"))]
+    if missing:
+        return f"Analytics store has no data yet for: {', '.join(missing)}"
+    _ready = True
+    return None
+
+
+def query(report: str, **params) -> Tuple[List[str], List[tuple]]:
+    """Run one of REPORTS over the store; returns column names and rows"""
+    sql = REPORTS[report]
+    duck = _duckdb().connect(config={"threads": THREADS, "memory_limit": MEMORY_LIMIT})
+    try:
+        for extract in TABLES:
+            if extract.name in sql:
+                pattern = os.path.join(ANALYTICS_DIR, extract.name, "*.parquet")
+                duck.execute(f"CREATE VIEW {extract.name} AS SELECT * FROM read_parquet({_quote(pattern)})")
+        # DuckDB rejects named parameters the statement does not use
+        result = duck.execute(sql, {name: value for name, value in params.items() if f"${name}" in sql})
+        return [column[0] for column in result.description], result.fetchall()
+    finally:
+        duck.close()
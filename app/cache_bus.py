@@ -0,0 +1,128 @@
+"""
+Cross-worker invalidation of the in-process caches.
+
+Triggers on the cached tables (see notify_cache_invalidation() in init.sql)
+publish {"entity": <table>, "id": <row id>, "keys": [...]} on the
+`cache_invalidation` channel when a transaction commits, whichever worker or
+SQL script made the change. Each worker's pg_listener thread hands the
+message to the handlers registered for that entity; the writing worker also
+evicts locally right after its own commit, so the notification is just a
+(harmless) second eviction there.
+
+Notifications are lost while the listener is disconnected, so after every
+reconnect each handler is called with entity_id=None, meaning "anything may
+have changed": caches are dropped and rebuilt lazily.
+"""
+
+import json
+from typing import Callable, Dict, List, Optional
+
+from app import active_sessions, denial_cache, pg_listener, plate_index, pricing, reference_data, reservations, spot_allocator
+from app.database import SessionLocal
+from app.models import Car
+
+CHANNEL = "cache_invalidation"
+
+Handler = Callable[[Optional[str], List[str]], None]
+
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def register(entity: str, handler: Handler) -> None:
+    """Call `handler(entity_id, keys)` when a row of `entity` (a table name) changes"""
+    _handlers.setdefault(entity, []).append(handler)
+
+
+def _on_notify(payload: str) -> None:
+    change = json.loads(payload)
+    for handler in _handlers.get(change["entity"], ()):
+        handler(change["id"], [key for key in change["keys"] if key is not None])
+
+
+def _resync() -> None:
+    for handlers in _handlers.values():
+        for handler in handlers:
+            handler(None, [])
+
+
+def _tariffs(entity_id: Optional[str], keys: List[str]) -> None:
+    pricing.invalidate_tariff(entity_id)
+    reference_data.invalidate("tariffs")
+
+
+def _reference(name: str) -> Handler:
+    return lambda entity_id, keys: reference_data.invalidate(name)
+
+
+def _spots(entity_id: Optional[str], keys: List[str]) -> None:
+    spot_allocator.invalidate()
+    reservations.index.invalidate()
+
+
+def _reservations(entity_id: Optional[str], keys: List[str]) -> None:
+    reservations.index.invalidate()
+
+
+def _cars(entity_id: Optional[str], keys: List[str]) -> None:
+    # keys are the old and new plate numbers of the changed car
+    if entity_id is None:
+        # rebuilt here, on the listener thread, so no gate request waits for it
+        db = SessionLocal()
+        try:
+            plate_index.index.rebuild(db)
+        finally:
+            db.close()
+        denial_cache.cache.clear()
+        return
+    db = SessionLocal()
+    try:
+        active = {
+            row[0]
+            for row in db.query(Car.plate_number).filter(Car.plate_number.in_(keys), Car.is_active == True)  # noqa: E712
+        }
+        active_sessions.refresh_car(db, entity_id)
+    finally:
+        db.close()
+    for plate_number in keys:
+        plate_index.index.remove(plate_number)
+        denial_cache.cache.forget_plate(plate_number)
+    for plate_number in active:
+        plate_index.index.add(plate_number)
+
+
+def _forget_user_plates(user_ids: List[str]) -> None:
+    db = SessionLocal()
+    try:
+        plates = [row[0] for row in db.query(Car.plate_number).filter(Car.user_id.in_(user_ids))]
+    finally:
+        db.close()
+    for plate_number in plates:
+        denial_cache.cache.forget_plate(plate_number)
+
+
+def _users(entity_id: Optional[str], keys: List[str]) -> None:
+    if entity_id is None:
+        denial_cache.cache.clear()
+    else:
+        _forget_user_plates([entity_id])
+
+
+def _wallets(entity_id: Optional[str], keys: List[str]) -> None:
+    # keys hold the wallet owner's user id
+    if entity_id is None:
+        denial_cache.cache.clear()
+    elif keys:
+        _forget_user_plates(keys)
+
+
+def startup() -> None:
+    register("tariffs", _tariffs)
+    register("parking_zones", _reference("parking_zones"))
+    register("gates", _reference("gates"))
+    register("access_levels", _reference("access_levels"))
+    register("parking_spots", _spots)
+    register("spot_reservations", _reservations)
+    register("cars", _cars)
+    register("users", _users)
+    register("wallets", _wallets)
+    pg_listener.subscribe(CHANNEL, _on_notify, _resync)
@@ -0,0 +1,231 @@
+"""
+Database statistics report: what database/optimization_examples.sql asks to
+run by hand, collected in one call.
+
+- statements: pg_stat_statements of the current database, by total time
+  (needs shared_preload_libraries = 'pg_stat_statements'; without it the
+  report says so and carries the other sections)
+- indexes: scans, tuples read and size per index; unused_indexes are the
+  never-scanned ones that do not back a primary key, unique or exclusion
+  constraint
+- tables: sizes (heap, indexes, total), live/dead tuples, sequential and
+  index scans; bloat is estimated from the dead tuple share of the heap
+
+A report can be saved to db_stats_snapshots. The diff against a snapshot
+works on the cumulative counters: calls and time per statement since the
+snapshot, the mean time of those calls against the mean before it (a
+statement is "regressed" when it got REGRESSION_RATIO times slower over at
+least REGRESSION_MIN_CALLS calls), new scans per index, growth per table.
+A counter that went down means the statistics were reset; the current value
+is then taken as the delta.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+# statements kept in a snapshot (the response shows the top `limit` of them)
+SNAPSHOT_STATEMENTS = int(os.getenv("DB_REPORT_SNAPSHOT_STATEMENTS", "500"))
+REGRESSION_RATIO = float(os.getenv("DB_REPORT_REGRESSION_RATIO", "1.5"))
+REGRESSION_MIN_CALLS = int(os.getenv("DB_REPORT_REGRESSION_MIN_CALLS", "10"))
+QUERY_TEXT_LENGTH = 1000
+
+STATEMENTS_SQL = text("""
+    SELECT
+        queryid::text AS queryid,
+        LEFT(query, :text_length) AS query,
+        calls,
+        total_exec_time AS total_ms,
+        mean_exec_time AS mean_ms,
+        rows,
+        shared_blks_hit,
+        shared_blks_read
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ORDER BY total_exec_time DESC
+    LIMIT :limit
+""")
+
+INDEXES_SQL = text("""
+    SELECT
+        s.relname AS table_name,
+        s.indexrelname AS index_name,
+        s.idx_scan,
+        s.idx_tup_read,
+        s.idx_tup_fetch,
+        pg_relation_size(s.indexrelid) AS size_bytes,
+        i.indisprimary OR i.indisunique
+            OR EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = s.indexrelid) AS backs_constraint
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = 'public'
+    ORDER BY s.idx_scan DESC, s.indexrelname
+""")
+
+TABLES_SQL = text("""
+    SELECT
+        relname AS table_name,
+        n_live_tup,
+        n_dead_tup,
+        seq_scan,
+        seq_tup_read,
+        COALESCE(idx_scan, 0) AS idx_scan,
+        pg_total_relation_size(relid) AS total_bytes,
+        pg_relation_size(relid) AS table_bytes,
+        pg_indexes_size(relid) AS index_bytes,
+        last_autovacuum,
+        last_autoanalyze
+    FROM pg_stat_user_tables
+    WHERE schemaname = 'public'
+    ORDER BY pg_total_relation_size(relid) DESC
+""")
+
+
+def _rows(db: Session, statement, params: Optional[dict] = None) -> List[dict]:
+    result = db.execute(statement, params or {})
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def collect(db: Session, statement_limit: int = SNAPSHOT_STATEMENTS) -> dict:
+    report = {"taken_at": datetime.now().isoformat(timespec="seconds")}
+
+    # a missing extension must not abort the transaction for the other sections
+    savepoint = db.begin_nested()
+    try:
+        report["statements"] = _rows(db, STATEMENTS_SQL, {"limit": statement_limit, "text_length": QUERY_TEXT_LENGTH})
+        savepoint.commit()
+    except DBAPIError as exc:
+        savepoint.rollback()
+        report["statements"] = None
+        report["statements_error"] = str(exc.orig).strip().splitlines()[0]
+
+    indexes = _rows(db, INDEXES_SQL)
+    report["indexes"] = indexes
+    report["unused_indexes"] = [
+        {"table_name": i["table_name"], "index_name": i["index_name"], "size_bytes": i["size_bytes"]}
+        for i in indexes
+        if i["idx_scan"] == 0 and not i["backs_constraint"]
+    ]
+
+    tables = _rows(db, TABLES_SQL)
+    for t in tables:
+        tuples = t["n_live_tup"] + t["n_dead_tup"]
+        t["dead_ratio"] = round(t["n_dead_tup"] / tuples, 4) if tuples else 0.0
+        t["estimated_bloat_bytes"] = int(t["table_bytes"] * t["dead_ratio"])
+        for key in ("last_autovacuum", "last_autoanalyze"):
+            if t[key] is not None:
+                t[key] = t[key].isoformat(timespec="seconds")
+    report["tables"] = tables
+    return report
+
+
+def save(db: Session, report: dict) -> int:
+    snapshot_id = db.execute(
+        text("INSERT INTO db_stats_snapshots (report) VALUES (CAST(:report AS JSONB)) RETURNING id"),
+        {"report": json.dumps(report, default=str)},
+    ).scalar()
+    db.commit()
+    return snapshot_id
+
+
+def list_snapshots(db: Session, limit: int = 50) -> List[dict]:
+    return _rows(
+        db,
+        text("SELECT id, taken_at FROM db_stats_snapshots ORDER BY id DESC LIMIT :limit"),
+        {"limit": limit},
+    )
+
+
+def load_snapshot(db: Session, snapshot_id: Optional[int] = None) -> Optional[dict]:
+    """A saved report with its id; the latest one when no id is given"""
+    if snapshot_id is None:
+        row = db.execute(text("SELECT id, report FROM db_stats_snapshots ORDER BY id DESC LIMIT 1")).fetchone()
+    else:
+        row = db.execute(
+            text("SELECT id, report FROM db_stats_snapshots WHERE id = :id"), {"id": snapshot_id}
+        ).fetchone()
+    if row is None:
+        return None
+    return dict(row[1], snapshot_id=row[0])
+
+
+def _delta(current: float, previous: float) -> float:
+    # counters only grow until pg_stat_reset()/pg_stat_statements_reset()
+    return current - previous if current >= previous else current
+
+
+def diff(current: dict, previous: dict, limit: int) -> dict:
+    result = {"since": previous["taken_at"], "snapshot_id": previous.get("snapshot_id")}
+
+    if current.get("statements") is not None and previous.get("statements") is not None:
+        before = {s["queryid"]: s for s in previous["statements"]}
+        statements = []
+        for s in current["statements"]:
+            p = before.get(s["queryid"])
+            calls = _delta(s["calls"], p["calls"]) if p else s["calls"]
+            if not calls:
+                continue
+            total_ms = _delta(s["total_ms"], p["total_ms"]) if p else s["total_ms"]
+            mean_ms = total_ms / calls
+            statements.append({
+                "queryid": s["queryid"],
+                "query": s["query"],
+                "calls": calls,
+                "total_ms": round(total_ms, 3),
+                "mean_ms": round(mean_ms, 3),
+                "previous_mean_ms": round(p["mean_ms"], 3) if p else None,
+                "slowdown": round(mean_ms / p["mean_ms"], 2) if p and p["mean_ms"] else None,
+                "new": p is None,
+            })
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        result["statements"] = statements[:limit]
+        result["regressed_statements"] = [
+            s for s in statements
+            if s["slowdown"] is not None and s["slowdown"] >= REGRESSION_RATIO and s["calls"] >= REGRESSION_MIN_CALLS
+        ]
+
+    before = {i["index_name"]: i for i in previous.get("indexes", [])}
+    result["indexes"] = [
+        {
+            "table_name": i["table_name"],
+            "index_name": i["index_name"],
+            "scans": _delta(i["idx_scan"], before[i["index_name"]]["idx_scan"]) if i["index_name"] in before else i["idx_scan"],
+            "size_change_bytes": i["size_bytes"] - before[i["index_name"]]["size_bytes"] if i["index_name"] in before else None,
+            "new": i["index_name"] not in before,
+        }
+        for i in current["indexes"]
+    ]
+
+    before = {t["table_name"]: t for t in previous.get("tables", [])}
+    tables = []
+    for t in current["tables"]:
+        p = before.get(t["table_name"])
+        tables.append({
+            "table_name": t["table_name"],
+            "total_bytes_change": t["total_bytes"] - p["total_bytes"] if p else None,
+            "live_tuples_change": t["n_live_tup"] - p["n_live_tup"] if p else None,
+            "dead_tuples_change": t["n_dead_tup"] - p["n_dead_tup"] if p else None,
+            "seq_scans": _delta(t["seq_scan"], p["seq_scan"]) if p else t["seq_scan"],
+            "idx_scans": _delta(t["idx_scan"], p["idx_scan"]) if p else t["idx_scan"],
+        })
+    result["tables"] = tables
+    return result
+
+
+def build(db: Session, limit: int = 20, save_snapshot: bool = False, previous: Optional[dict] = None) -> dict:
+    """Current report (top `limit` statements) plus its diff against `previous`, optionally saved as a snapshot"""
+    current = collect(db)
+    snapshot_id = save(db, current) if save_snapshot else None
+
+    report = dict(current)
+    if report.get("statements") is not None:
+        report["statements"] = report["statements"][:limit]
+    report["snapshot_id"] = snapshot_id
+    report["diff"] = diff(current, previous, limit) if previous is not None else None
+    return report
@@ -0,0 +1,164 @@
+"""
+Short-lived negative cache of denied entry attempts.
+
+A car waiting at a closed barrier is read by the camera again and again.
+The first denial per (gate, plate) is remembered for DENIAL_CACHE_TTL
+seconds and repeats inside that time are answered from memory without
+running `check_entry_allowed`.
+
+Denials of the same plate at the same gate with the same reason inside
+DENIAL_LOG_WINDOW seconds share one `entry_logs` row (attempt_time is the
+first attempt, last_attempt_time the latest one). Attempts answered from
+memory are counted locally and added to the row's attempt_count the next
+time the database is consulted, so a waiting car costs one UPDATE per TTL
+instead of one INSERT per read.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import EntryLog
+
+DENIAL_CACHE_TTL = float(os.getenv("DENIAL_CACHE_TTL", "5"))
+DENIAL_LOG_WINDOW = float(os.getenv("DENIAL_LOG_WINDOW", "300"))
+DENIAL_CACHE_SIZE = int(os.getenv("DENIAL_CACHE_SIZE", "10000"))
+
+
+@dataclass
+class Denial:
+    reason: str
+    log_id: object
+    first_attempt: datetime
+    last_attempt: datetime
+    expires_at: float
+    # attempts answered from memory and not yet added to the log row
+    pending: int = 0
+
+
+class DenialCache:
+    def __init__(self):
+        self._entries: "OrderedDict[Tuple[str, str], Denial]" = OrderedDict()
+        # evicted or expired entries whose pending attempts still have to be written
+        self._unflushed: List[Denial] = []
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def hit(self, gate_id, plate_number: str) -> Optional[str]:
+        """Reason of a recent denial of this plate at this gate, if it is still fresh"""
+        key = (str(gate_id), plate_number)
+        with self._lock:
+            denial = self._entries.get(key)
+            if denial is None or denial.expires_at <= time.monotonic():
+                return None
+            denial.pending += 1
+            denial.last_attempt = datetime.now()
+            return denial.reason
+
+    def record(
+        self, db: Session, gate_id, read_plate: str, logged_plate: str, reason: str, car_id=None, user_id=None
+    ) -> None:
+        """Log a denial answered by the database, folding it into the previous row when possible"""
+        key = (str(gate_id), read_plate)
+        now = datetime.now()
+        with self._lock:
+            denial = self._entries.pop(key, None)
+
+        if (
+            denial is not None
+            and denial.reason == reason
+            and (now - denial.first_attempt).total_seconds() <= DENIAL_LOG_WINDOW
+        ):
+            _add_attempts(db, denial.log_id, denial.pending + 1, now)
+            denial.pending = 0
+            denial.last_attempt = now
+        else:
+            if denial is not None:
+                _write_pending(db, denial)
+            entry_log = EntryLog(
+                plate_number=logged_plate,
+                gate_id=gate_id,
+                result="denied",
+                reason=reason,
+                attempt_time=now,
+                last_attempt_time=now,
+                car_id=car_id,
+                user_id=user_id,
+            )
+            db.add(entry_log)
+            db.flush()
+            denial = Denial(reason=reason, log_id=entry_log.id, first_attempt=now, last_attempt=now, expires_at=0.0)
+
+        denial.expires_at = time.monotonic() + DENIAL_CACHE_TTL
+        with self._lock:
+            self._entries[key] = denial
+            while len(self._entries) > DENIAL_CACHE_SIZE:
+                _, evicted = self._entries.popitem(last=False)
+                if evicted.pending:
+                    self._unflushed.append(evicted)
+
+    def allowed(self, db: Session, gate_id, plate_number: str) -> None:
+        """The plate got in: drop its denial, keeping the attempts it absorbed"""
+        with self._lock:
+            denial = self._entries.pop((str(gate_id), plate_number), None)
+        if denial is not None:
+            _write_pending(db, denial)
+
+    def forget_plate(self, plate_number: str) -> None:
+        """Stop answering from memory for a plate whose registration changed"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == plate_number]:
+                denial = self._entries.pop(key)
+                if denial.pending:
+                    self._unflushed.append(denial)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._unflushed.extend(d for d in self._entries.values() if d.pending)
+            self._entries.clear()
+
+    def flush(self, db: Session, force: bool = False) -> None:
+        """Write pending attempt counts of stale entries (at most once per TTL unless forced)"""
+        now = time.monotonic()
+        if not force and now < self._next_sweep:
+            return
+        self._next_sweep = now + DENIAL_CACHE_TTL
+
+        cutoff = datetime.now()
+        with self._lock:
+            stale = self._unflushed
+            self._unflushed = []
+            for key, denial in list(self._entries.items()):
+                window_over = (cutoff - denial.first_attempt).total_seconds() > DENIAL_LOG_WINDOW
+                if force or window_over or denial.expires_at <= now:
+                    if denial.pending:
+                        stale.append(denial)
+                if window_over:
+                    del self._entries[key]
+        for denial in stale:
+            _write_pending(db, denial)
+
+
+def _add_attempts(db: Session, log_id, count: int, last_attempt: datetime) -> None:
+    db.query(EntryLog).filter(EntryLog.id == log_id).update(
+        {
+            EntryLog.attempt_count: EntryLog.attempt_count + count,
+            EntryLog.last_attempt_time: last_attempt,
+        },
+        synchronize_session=False,
+    )
+
+
+def _write_pending(db: Session, denial: Denial) -> None:
+    if denial.pending:
+        count, denial.pending = denial.pending, 0
+        _add_attempts(db, denial.log_id, count, denial.last_attempt)
+
+
+cache = DenialCache()
@@ -0,0 +1,79 @@
+"""
+Fast JSON responses for large lists.
+
+FastAPI serializes a `response_model` result in several passes: it validates
+every object into the model, converts the result back to plain Python
+objects and finally runs json.dumps over them. For a page of thousands of
+rows that dominates the request. The helpers here produce the JSON bytes
+directly with orjson and return a ready Response (FastAPI then skips its own
+serialization, while `response_model` still documents the schema):
+
+- model_list_response(): the schema's fields are read from each ORM object
+  (or result row) through one precompiled attrgetter per schema. The objects
+  come from typed columns, so validation is skipped; the output matches what
+  pydantic would produce (Decimal as a string, UUID and datetime as ISO
+  strings). Only flat schemas are supported.
+- tuple_list_response(): the same output from plain tuples already in the
+  schema's field order, as returned by app/read_repo.py.
+- rows_response(): SQL result rows, keys taken from the column labels.
+  Decimal is written as a JSON number, as in the hand-built dicts of the
+  admin reports this replaces; records_response() takes the labels and rows
+  separately.
+"""
+
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import orjson
+from fastapi import Response
+
+_getters: Dict[type, Tuple[List[str], Callable[[Any], tuple]]] = {}
+
+
+def _fields(schema: type) -> Tuple[List[str], Callable[[Any], tuple]]:
+    compiled = _getters.get(schema)
+    if compiled is None:
+        keys = list(schema.model_fields)
+        getter = attrgetter(*keys)
+        if len(keys) == 1:
+            getter = lambda obj, _get=getter: (_get(obj),)  # noqa: E731
+        compiled = _getters[schema] = (keys, getter)
+    return compiled
+
+
+def _decimal_as_string(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def _decimal_as_number(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def model_list_response(schema: type, objects: Iterable[Any]) -> Response:
+    """JSON list of `schema` built from ORM objects or result rows (attribute access)"""
+    keys, getter = _fields(schema)
+    body = orjson.dumps([dict(zip(keys, getter(obj))) for obj in objects], default=_decimal_as_string)
+    return Response(content=body, media_type="application/json")
+
+
+def tuple_list_response(schema: type, rows: Iterable[tuple]) -> Response:
+    """JSON list of `schema` from tuples holding its fields in declaration order"""
+    keys, _ = _fields(schema)
+    body = orjson.dumps([dict(zip(keys, row)) for row in rows], default=_decimal_as_string)
+    return Response(content=body, media_type="application/json")
+
+
+def rows_response(result) -> Response:
+    """JSON list of objects straight from a SQLAlchemy result, one key per selected column"""
+    return records_response(list(result.keys()), result)
+
+
+def records_response(keys: List[str], rows: Iterable[tuple]) -> Response:
+    """The same as rows_response() for rows from another driver (the DuckDB analytics store)"""
+    body = orjson.dumps([dict(zip(keys, row)) for row in rows], default=_decimal_as_number)
+    return Response(content=body, media_type="application/json")
@@ -1,7 +1,27 @@
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth, users, cars, wallet, parking, admin
+from app import (
+    active_sessions,
+    analytics_store,
+    cache_bus,
+    denial_cache,
+    metrics,
+    pg_listener,
+    plate_index,
+    reference_data,
+    sampling_profiler,
+    spot_allocator,
+    sql_profiler,
+    startup,
+)
+from app.database import engine, SessionLocal
+from app.routers import auth, users, cars, wallet, parking, admin, analytics
 from app.routers import (
     batch,
     access_levels,
@@ -14,15 +34,54 @@ from app.routers import (
     wallet_transactions,
     entry_logs,
     audit_logs,
+    reservations,
 )
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+timer = startup.StartupTimer(_import_started)
+timer.mark("imports")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema check (or create_all, see SCHEMA_INIT) runs here, not at import time
+    with timer.phase("schema"):
+        startup.prepare_schema(engine)
+
+    with timer.phase("caches"):
+        db = SessionLocal()
+        try:
+            spot_allocator.startup(db)
+            reference_data.startup(db)
+            # built up front: the first misread at a gate must not wait for it
+            plate_index.index.rebuild(db)
+        finally:
+            db.close()
+
+    with timer.phase("listener"):
+        active_sessions.startup()
+        cache_bus.startup()
+        pg_listener.start()
+        analytics_store.start()
+
+    timer.mark("ready")
+    timer.report()
+    yield
+
+    analytics_store.stop()
+    pg_listener.stop()
+    db = SessionLocal()
+    try:
+        denial_cache.cache.flush(db, force=True)
+        db.commit()
+    finally:
+        db.close()
+
 
 app = FastAPI(
     title="Smart Private Parking API",
     description="Backend API for Smart Private Parking system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -32,6 +91,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+if sql_profiler.ENABLED:
+    sql_profiler.instrument_engine(engine)
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware)
+sampling_profiler.instrument_engine(engine)
+app.add_middleware(sampling_profiler.SamplingProfilerMiddleware)
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api", tags=["Users"])
@@ -39,6 +104,7 @@ app.include_router(cars.router, prefix="/api/cars", tags=["Cars"])
 app.include_router(wallet.router, prefix="/api/wallet", tags=["Wallet"])
 app.include_router(parking.router, prefix="/api/parking", tags=["Parking"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(batch.router, prefix="/api", tags=["Batch Import"])
 app.include_router(access_levels.router, prefix="/api/access-levels", tags=["Access Levels"])
 app.include_router(user_access_levels.router, prefix="/api/user-access-levels", tags=["User Access Levels"])
@@ -50,6 +116,9 @@ app.include_router(parking_sessions.router, prefix="/api/parking-sessions", tags
 app.include_router(wallet_transactions.router, prefix="/api/wallet-transactions", tags=["Wallet Transactions"])
 app.include_router(entry_logs.router, prefix="/api/entry-logs", tags=["Entry Logs"])
 app.include_router(audit_logs.router, prefix="/api/audit-logs", tags=["Audit Logs"])
+app.include_router(reservations.router, prefix="/api/reservations", tags=["Reservations"])
+
+timer.mark("app")
 
 
 @app.get("/")
@@ -60,3 +129,15 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/health/startup")
+async def startup_timings():
+    """Milliseconds spent in each startup phase of this worker"""
+    return timer.timings
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint of this worker"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
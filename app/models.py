@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Numeric, ForeignKey, DateTime, Text, CheckConstraint, Enum as SQLEnum, Integer
+from sqlalchemy import Column, String, Boolean, Numeric, ForeignKey, DateTime, Text, CheckConstraint, Enum as SQLEnum, Integer, Time
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -117,6 +117,22 @@ class ParkingSpot(Base):
 
     zone = relationship("ParkingZone", back_populates="spots")
     sessions = relationship("ParkingSession", back_populates="spot")
+    reservations = relationship("SpotReservation", back_populates="spot")
+
+
+class SpotReservation(Base):
+    __tablename__ = "spot_reservations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    spot_id = Column(UUID(as_uuid=True), ForeignKey("parking_spots.id", ondelete="CASCADE"), nullable=False)
+    car_id = Column(UUID(as_uuid=True), ForeignKey("cars.id", ondelete="CASCADE"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+    comment = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    spot = relationship("ParkingSpot", back_populates="reservations")
 
 
 class Tariff(Base):
@@ -126,6 +142,11 @@ class Tariff(Base):
     name = Column(String(255), nullable=False)
     price_per_hour = Column(Numeric(10, 2), nullable=False)
     free_minutes = Column(Integer, nullable=False, default=0)
+    night_price_per_hour = Column(Numeric(10, 2), nullable=True)
+    night_start = Column(Time, nullable=True)
+    night_end = Column(Time, nullable=True)
+    weekend_price_per_hour = Column(Numeric(10, 2), nullable=True)
+    daily_cap = Column(Numeric(10, 2), nullable=True)
     zone_id = Column(UUID(as_uuid=True), ForeignKey("parking_zones.id", ondelete="SET NULL"), nullable=True)
     access_level_id = Column(UUID(as_uuid=True), ForeignKey("access_levels.id", ondelete="SET NULL"), nullable=True)
 
@@ -186,6 +207,12 @@ class EntryLog(Base):
     attempt_time = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     result = Column(String(10), nullable=False)
     reason = Column(Text, nullable=True)
+    # repeated denials of the same plate at the same gate are collapsed into one row
+    attempt_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_attempt_time = Column(DateTime(timezone=True), nullable=True)
+    # owner at the time of the attempt, filled on write (trigger fill_entry_log_owner covers other writers)
+    car_id = Column(UUID(as_uuid=True), ForeignKey("cars.id", ondelete="SET NULL"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
 
     gate = relationship("Gate", back_populates="entry_logs")
 
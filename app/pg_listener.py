@@ -0,0 +1,105 @@
+"""
+Postgres LISTEN loop shared by the in-process caches.
+
+Each worker keeps one dedicated connection in autocommit mode and a daemon
+thread that waits on it with select() and dispatches notifications to the
+handlers subscribed to their channel. Notifications sent while the
+connection is down are lost, so after every (re)connect each subscriber's
+resync callback runs; `generation` counts successful connects, which lets a
+cache tell whether it was loaded under the current connection.
+"""
+
+import logging
+import os
+import select
+import threading
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+PG_LISTENER = os.getenv("PG_LISTENER", "on")
+POLL_SECONDS = 5.0
+RECONNECT_SECONDS = 2.0
+
+_handlers: Dict[str, List[Callable[[str], None]]] = {}
+_resync: List[Callable[[], None]] = []
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_connected = False
+generation = 0
+
+
+def subscribe(channel: str, handler: Callable[[str], None], resync: Optional[Callable[[], None]] = None) -> None:
+    """Call `handler(payload)` for every notification on `channel`; must happen before start()"""
+    _handlers.setdefault(channel, []).append(handler)
+    if resync is not None:
+        _resync.append(resync)
+
+
+def is_connected() -> bool:
+    return _connected
+
+
+def _dispatch(channel: str, payload: str) -> None:
+    for handler in _handlers.get(channel, ()):
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("Notification handler failed on %s", channel)
+
+
+def _listen_once() -> None:
+    global _connected, generation
+    # psycopg2 wants a libpq URL, not the SQLAlchemy dialect form
+    conn = psycopg2.connect(DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://"))
+    try:
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            for channel in _handlers:
+                cur.execute(f'LISTEN "{channel}"')
+        _connected = True
+        generation += 1
+        for resync in _resync:
+            resync()
+
+        while not _stop.is_set():
+            if select.select([conn], [], [], POLL_SECONDS) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                _dispatch(notify.channel, notify.payload)
+    finally:
+        _connected = False
+        conn.close()
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        try:
+            _listen_once()
+        except Exception:
+            logger.exception("LISTEN connection lost, reconnecting")
+            _stop.wait(RECONNECT_SECONDS)
+
+
+def start() -> None:
+    global _thread
+    if PG_LISTENER != "on" or not _handlers or _thread is not None:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="pg-listener", daemon=True)
+    _thread.start()
+
+
+def stop() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=POLL_SECONDS + 1)
+        _thread = None
@@ -0,0 +1,197 @@
+"""
+Fuzzy lookup of registered plate numbers for ANPR misreads.
+
+Plates are first reduced to a skeleton: separators are dropped, Cyrillic
+letters allowed on Russian plates are mapped to their Latin look-alikes and
+the letter O (Cyrillic or Latin) is folded into the digit 0, so the most
+common camera mistakes disappear before any distance is computed.
+
+Near-matches are found with a symmetric deletion index: every skeleton is
+stored under the hashes of all strings obtainable by deleting up to
+MAX_DISTANCE characters, and two plates within Levenshtein distance k always
+share such a string. The hashes live in one sorted numpy array, so a lookup
+is a few dozen binary searches plus verification of a handful of candidates,
+independent of the number of cars. The database side mirrors the skeleton
+with the `normalize_plate()` SQL function and a pg_trgm index over it.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import Car
+
+MAX_DISTANCE = 2
+# a misread is only auto-corrected when a single plate is this close
+AUTO_MATCH_DISTANCE = int(os.getenv("PLATE_AUTO_MATCH_DISTANCE", "1"))
+
+# Cyrillic and Latin O both fold into the digit 0, the usual camera confusion
+_HOMOGLYPHS = str.maketrans("АВЕКМНОРСТУХO", "ABEKMH0PCTYX0")
+
+
+def normalize_plate(plate_number: str) -> str:
+    """Skeleton used for matching; keep in sync with normalize_plate() in init.sql"""
+    cleaned = "".join(ch for ch in plate_number.upper() if ch.isalnum())
+    return cleaned.translate(_HOMOGLYPHS)
+
+
+def _deletions(word: str, depth: int) -> Set[str]:
+    """All strings obtained by deleting up to `depth` characters"""
+    result = {word}
+    # deleting positions in non-decreasing order visits every combination once
+    frontier = [(word, 0)]
+    for _ in range(depth):
+        next_frontier = []
+        for w, start in frontier:
+            for i in range(start, len(w)):
+                shorter = w[:i] + w[i + 1:]
+                result.add(shorter)
+                next_frontier.append((shorter, i))
+        frontier = next_frontier
+    return result
+
+
+def levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance, or limit + 1 as soon as it is known to exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            current.append(value)
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class PlateIndex:
+    def __init__(self):
+        self._plates: List[str] = []
+        self._skeletons: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._keys = np.empty(0, dtype=np.int64)
+        self._owners = np.empty(0, dtype=np.int32)
+        # plates added after the last build, and plates removed since then
+        self._extra: Dict[int, List[int]] = {}
+        self._removed: Set[int] = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def rebuild(self, db: Session) -> None:
+        rows = db.query(Car.plate_number).filter(Car.is_active == True).all()  # noqa: E712
+        plates = [row[0] for row in rows]
+        skeletons = [normalize_plate(p) for p in plates]
+
+        keys: List[int] = []
+        owners: List[int] = []
+        for i, skeleton in enumerate(skeletons):
+            for variant in _deletions(skeleton, MAX_DISTANCE):
+                keys.append(hash(variant))
+                owners.append(i)
+        keys_arr = np.array(keys, dtype=np.int64)
+        order = np.argsort(keys_arr, kind="stable")
+
+        with self._lock:
+            self._plates = plates
+            self._skeletons = skeletons
+            self._ids = {p: i for i, p in enumerate(plates)}
+            self._keys = keys_arr[order]
+            self._owners = np.array(owners, dtype=np.int32)[order]
+            self._extra = {}
+            self._removed = set()
+            self._loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.rebuild(db)
+
+    def invalidate(self) -> None:
+        self._loaded = False
+
+    def add(self, plate_number: str) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            existing = self._ids.get(plate_number)
+            if existing is not None:
+                self._removed.discard(existing)
+                return
+            i = len(self._plates)
+            skeleton = normalize_plate(plate_number)
+            self._plates.append(plate_number)
+            self._skeletons.append(skeleton)
+            self._ids[plate_number] = i
+            for variant in _deletions(skeleton, MAX_DISTANCE):
+                self._extra.setdefault(hash(variant), []).append(i)
+
+    def remove(self, plate_number: str) -> None:
+        with self._lock:
+            i = self._ids.get(plate_number)
+            if i is not None:
+                self._removed.add(i)
+
+    def search(self, db: Session, plate_number: str, max_distance: int = MAX_DISTANCE, limit: int = 5) -> List[Tuple[str, int]]:
+        """Registered active plates within `max_distance` of the read, closest first"""
+        self.ensure_loaded(db)
+        max_distance = min(max_distance, MAX_DISTANCE)
+        skeleton = normalize_plate(plate_number)
+        hashes = np.fromiter((hash(v) for v in _deletions(skeleton, max_distance)), dtype=np.int64)
+
+        with self._lock:
+            lo = np.searchsorted(self._keys, hashes, side="left")
+            hi = np.searchsorted(self._keys, hashes, side="right")
+            candidates: Set[int] = set()
+            for start, end in zip(lo.tolist(), hi.tolist()):
+                if start < end:
+                    candidates.update(self._owners[start:end].tolist())
+            for h in hashes.tolist():
+                candidates.update(self._extra.get(h, ()))
+            candidates -= self._removed
+
+            matches = []
+            for i in candidates:
+                distance = levenshtein(skeleton, self._skeletons[i], max_distance)
+                if distance <= max_distance:
+                    matches.append((distance, self._plates[i]))
+
+        matches.sort()
+        return [(plate, distance) for distance, plate in matches[:limit]]
+
+    def best_match(self, db: Session, plate_number: str) -> Optional[str]:
+        """The registered plate a misread most likely refers to, if it is unambiguous"""
+        matches = self.search(db, plate_number, AUTO_MATCH_DISTANCE, limit=2)
+        if not matches:
+            return None
+        if len(matches) > 1 and matches[1][1] == matches[0][1]:
+            return None
+        plate, _ = matches[0]
+        return plate if plate != plate_number else None
+
+
+index = PlateIndex()
+
+
+def search_in_db(db: Session, plate_number: str, limit: int = 5) -> List[Tuple[str, float]]:
+    """Trigram similarity search in Postgres (pg_trgm), for cold workers and ad-hoc checks"""
+    rows = db.execute(
+        text("""
+            SELECT plate_number, similarity(normalize_plate(plate_number), normalize_plate(:plate)) AS score
+            FROM cars
+            WHERE is_active = TRUE
+              AND normalize_plate(plate_number) % normalize_plate(:plate)
+            ORDER BY score DESC, plate_number
+            LIMIT :limit
+        """),
+        {"plate": plate_number, "limit": limit},
+    ).fetchall()
+    return [(row[0], float(row[1])) for row in rows]
@@ -0,0 +1,210 @@
+"""
+Tariff pricing engine.
+
+Each tariff is compiled once into a weekly piecewise-constant rate schedule
+(base / night / weekend rates) with cumulative prices at every segment
+boundary, and cached in memory. The cost of any interval is then the
+difference of two cumulative lookups, plus a per-day clamp when the tariff
+has a daily cap.
+
+Times are naive wall-clock timestamps, as stored in the database. The result
+matches the `calculate_parking_cost()` SQL function, which walks the same
+schedule day by day; half-kopeck ties are rounded up on both sides.
+"""
+
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, time
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models import Tariff
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# any Monday 00:00 works as the origin of the weekly schedule
+_EPOCH = datetime(2000, 1, 3)
+
+
+def _to_kopecks(value) -> Optional[int]:
+    if value is None:
+        return None
+    return int((Decimal(value) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def _minute_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+@dataclass(frozen=True)
+class CompiledTariff:
+    tariff_id: str
+    free_minutes: int
+    daily_cap_kop: Optional[int]
+    bounds: List[int]  # segment starts, minutes since Monday 00:00; bounds[0] == 0
+    rates: List[int]  # kopecks per hour for each segment
+    cumulative: List[int]  # kopeck-minutes-per-hour accumulated before each segment
+
+    @property
+    def week_total(self) -> int:
+        return self.cumulative[-1] + self.rates[-1] * (MINUTES_PER_WEEK - self.bounds[-1])
+
+    def _integral(self, minute: int) -> int:
+        """Cumulative price (in kopecks * minutes / hour) from the epoch to `minute`"""
+        weeks, offset = divmod(minute, MINUTES_PER_WEEK)
+        i = bisect_right(self.bounds, offset) - 1
+        return weeks * self.week_total + self.cumulative[i] + self.rates[i] * (offset - self.bounds[i])
+
+    def _charge(self, start: int, end: int) -> int:
+        if end <= start:
+            return 0
+        if self.daily_cap_kop is None:
+            return self._integral(end) - self._integral(start)
+
+        cap = self.daily_cap_kop * 60
+        total = 0
+        day_start = start - start % MINUTES_PER_DAY
+        while day_start < end:
+            day_end = day_start + MINUTES_PER_DAY
+            lo, hi = max(start, day_start), min(end, day_end)
+            total += min(cap, self._integral(hi) - self._integral(lo))
+            day_start = day_end
+        return total
+
+    def _integral_array(self, minutes: np.ndarray) -> np.ndarray:
+        weeks, offsets = np.divmod(minutes, MINUTES_PER_WEEK)
+        bounds = np.asarray(self.bounds, dtype=np.int64)
+        i = np.searchsorted(bounds, offsets, side="right") - 1
+        rates = np.asarray(self.rates, dtype=np.int64)[i]
+        return weeks * self.week_total + np.asarray(self.cumulative, dtype=np.int64)[i] + rates * (offsets - bounds[i])
+
+    def cost_kopecks(self, entry_minutes: np.ndarray, durations: np.ndarray) -> np.ndarray:
+        """
+        Vectorized cost(): kopecks for many sessions at once. `entry_minutes`
+        are whole minutes since the schedule epoch (see entry_minutes()),
+        `durations` are rounded minutes, both int64.
+        """
+        start = entry_minutes + self.free_minutes
+        end = entry_minutes + durations
+        if self.daily_cap_kop is None:
+            charge = np.where(end > start, self._integral_array(end) - self._integral_array(np.minimum(start, end)), 0)
+        else:
+            # one pass per calendar day, over the sessions that reach it
+            cap = self.daily_cap_kop * 60
+            charge = np.zeros(len(start), dtype=np.int64)
+            day_start = start - start % MINUTES_PER_DAY
+            active = np.flatnonzero(end > start)
+            while len(active):
+                lo = np.maximum(start[active], day_start[active])
+                hi = np.minimum(end[active], day_start[active] + MINUTES_PER_DAY)
+                charge[active] += np.minimum(cap, self._integral_array(hi) - self._integral_array(lo))
+                day_start[active] += MINUTES_PER_DAY
+                active = active[day_start[active] < end[active]]
+        # round half up, like cost()
+        return (charge * 2 + 60) // 120
+
+    def cost(self, entry_time: datetime, exit_time: datetime) -> Decimal:
+        """Parking cost for the interval, rounded to kopecks"""
+        # duration is rounded to whole minutes like the SQL function does
+        seconds = (exit_time - entry_time).total_seconds()
+        duration = int(Decimal(seconds / 60).to_integral_value(ROUND_HALF_UP))
+        entry_minute = int((entry_time - _EPOCH).total_seconds() // 60)
+
+        charge = self._charge(entry_minute + self.free_minutes, entry_minute + duration)
+        # charge is in kopecks * minutes / hour; ROUND_HALF_UP like SQL ROUND()
+        return (Decimal(charge) / 6000).quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+
+def entry_minutes(entry_times: np.ndarray) -> np.ndarray:
+    """Whole minutes since the schedule epoch for datetime64 entry times, as cost() computes them"""
+    return (entry_times.astype("datetime64[us]") - np.datetime64(_EPOCH, "us")) // np.timedelta64(1, "m")
+
+
+def compile_tariff(tariff: Tariff) -> CompiledTariff:
+    base = _to_kopecks(tariff.price_per_hour)
+    weekend = _to_kopecks(tariff.weekend_price_per_hour)
+    night = _to_kopecks(tariff.night_price_per_hour)
+
+    night_ranges = []
+    if night is not None and tariff.night_start is not None and tariff.night_end is not None:
+        ns, ne = _minute_of_day(tariff.night_start), _minute_of_day(tariff.night_end)
+        if ns < ne:
+            night_ranges = [(ns, ne)]
+        elif ns > ne:
+            night_ranges = [(0, ne), (ns, MINUTES_PER_DAY)]
+
+    # night rate takes precedence over the weekend rate, which overrides the base rate
+    points = []
+    for day in range(7):
+        offset = day * MINUTES_PER_DAY
+        day_rate = weekend if day >= 5 and weekend is not None else base
+        points.append((offset, day_rate))
+        for lo, hi in night_ranges:
+            points.append((offset + lo, night))
+            if hi < MINUTES_PER_DAY:
+                points.append((offset + hi, day_rate))
+
+    bounds: List[int] = []
+    rates: List[int] = []
+    for minute, rate in sorted(points, key=lambda p: p[0]):
+        if bounds and bounds[-1] == minute:
+            rates[-1] = rate
+            if len(rates) > 1 and rates[-2] == rate:
+                bounds.pop()
+                rates.pop()
+        elif not rates or rates[-1] != rate:
+            bounds.append(minute)
+            rates.append(rate)
+
+    cumulative = [0]
+    for i in range(1, len(bounds)):
+        cumulative.append(cumulative[-1] + rates[i - 1] * (bounds[i] - bounds[i - 1]))
+
+    return CompiledTariff(
+        tariff_id=str(tariff.id),
+        free_minutes=tariff.free_minutes or 0,
+        daily_cap_kop=_to_kopecks(tariff.daily_cap),
+        bounds=bounds,
+        rates=rates,
+        cumulative=cumulative,
+    )
+
+
+_cache: Dict[str, CompiledTariff] = {}
+_lock = threading.Lock()
+
+
+def get_compiled_tariff(db: Session, tariff_id) -> Optional[CompiledTariff]:
+    key = str(tariff_id)
+    compiled = _cache.get(key)
+    if compiled is not None:
+        return compiled
+
+    tariff = db.query(Tariff).filter(Tariff.id == key).first()
+    if not tariff:
+        return None
+    compiled = compile_tariff(tariff)
+    with _lock:
+        _cache[key] = compiled
+    return compiled
+
+
+def invalidate_tariff(tariff_id=None) -> None:
+    """Drop one compiled tariff (or all of them) after a write"""
+    with _lock:
+        if tariff_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(str(tariff_id), None)
+
+
+def calculate_cost(db: Session, tariff_id, entry_time: datetime, exit_time: datetime) -> Optional[Decimal]:
+    compiled = get_compiled_tariff(db, tariff_id)
+    if compiled is None:
+        return None
+    return compiled.cost(entry_time, exit_time)
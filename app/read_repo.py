@@ -0,0 +1,44 @@
+"""
+Read-only list queries that bypass the ORM.
+
+`db.query(Model).all()` builds a full instance per row: identity map entry,
+attribute state for change tracking, relationship loaders. The list endpoints
+only serialize the rows once, so here they select exactly the columns of the
+response schema with a Core select on the model's table and get plain row
+tuples back (in schema field order), which fast_json encodes directly.
+
+    stmt = read_repo.select_for(Car, CarResponse).where(Car.user_id == user_id)
+    return read_repo.list_response(db, CarResponse, stmt)
+
+Every field of the schema must be a column of the model; otherwise the
+first request raises a KeyError.
+"""
+
+from typing import Dict, List, Tuple
+
+from fastapi import Response
+from sqlalchemy import Column, Select, inspect, select
+from sqlalchemy.orm import Session
+
+from app import fast_json
+
+_columns: Dict[Tuple[type, type], List[Column]] = {}
+
+
+def columns(model: type, schema: type) -> List[Column]:
+    """Table columns of `model` backing the fields of `schema`, in field order"""
+    key = (model, schema)
+    cols = _columns.get(key)
+    if cols is None:
+        mapped = inspect(model).columns
+        cols = _columns[key] = [mapped[name] for name in schema.model_fields]
+    return cols
+
+
+def select_for(model: type, schema: type) -> Select:
+    return select(*columns(model, schema))
+
+
+def list_response(db: Session, schema: type, stmt: Select) -> Response:
+    """Run a select built by select_for() and return its rows as a JSON list of `schema`"""
+    return fast_json.tuple_list_response(schema, db.execute(stmt).tuples())
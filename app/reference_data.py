@@ -0,0 +1,125 @@
+"""
+Cache of rarely changing reference tables: tariffs, parking zones, gates and
+access levels.
+
+Each table is kept as ready-to-send JSON: one encoded body per row and the
+list body built from them, with a strong ETag derived from the bytes. Every
+worker therefore produces the same ETag for the same data, and a client
+polling with If-None-Match gets an empty 304 without reading or encoding the
+table (authentication still looks the user up, so one query remains). Write
+endpoints call invalidate() after commit (other workers hear about it via
+cache_bus); the next request reloads the table and bumps its version.
+"""
+
+import threading
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Dict, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app import read_repo
+from app.models import AccessLevel, Gate, ParkingZone, Tariff
+from app.schemas import AccessLevelResponse, GateResponse, ParkingZoneResponse, TariffResponse
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    body: bytes
+    etag: str
+    items: Dict[str, bytes]
+
+
+def _etag(body: bytes) -> str:
+    return '"' + sha256(body).hexdigest()[:32] + '"'
+
+
+class ReferenceTable:
+    def __init__(self, model, schema, order_by, not_found: str):
+        self.model = model
+        self.schema = schema
+        self.adapter = TypeAdapter(schema)
+        self.order_by = order_by
+        self.not_found = not_found
+        self._snapshot: Optional[Snapshot] = None
+        self._version = 0
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> Snapshot:
+        invalidations = self._invalidations
+        rows = db.execute(read_repo.select_for(self.model, self.schema).order_by(self.order_by))
+        items = {
+            str(row.id): self.adapter.dump_json(self.adapter.validate_python(row, from_attributes=True))
+            for row in rows
+        }
+        body = b"[" + b",".join(items.values()) + b"]"
+        with self._lock:
+            self._version += 1
+            snapshot = Snapshot(self._version, body, _etag(body), items)
+            # a write committed while we were reading: serve this result once, do not keep it
+            if invalidations == self._invalidations:
+                self._snapshot = snapshot
+            return snapshot
+
+    def snapshot(self, db: Session) -> Snapshot:
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.load(db)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._invalidations += 1
+            self._snapshot = None
+
+
+tables: Dict[str, ReferenceTable] = {
+    "tariffs": ReferenceTable(Tariff, TariffResponse, Tariff.name, "Tariff not found"),
+    "parking_zones": ReferenceTable(ParkingZone, ParkingZoneResponse, ParkingZone.name, "Parking zone not found"),
+    "gates": ReferenceTable(Gate, GateResponse, Gate.name, "Gate not found"),
+    "access_levels": ReferenceTable(AccessLevel, AccessLevelResponse, AccessLevel.code, "Access level not found"),
+}
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or "W/" + etag in candidates
+
+
+def _send(request: Request, body: bytes, etag: str, version: int) -> Response:
+    headers = {"ETag": etag, "X-Reference-Version": str(version), "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def list_response(request: Request, db: Session, name: str) -> Response:
+    snapshot = tables[name].snapshot(db)
+    return _send(request, snapshot.body, snapshot.etag, snapshot.version)
+
+
+def item_response(request: Request, db: Session, name: str, item_id: str) -> Response:
+    table = tables[name]
+    snapshot = table.snapshot(db)
+    try:
+        body = snapshot.items.get(str(UUID(item_id)))
+    except ValueError:
+        body = None
+    if body is None:
+        raise HTTPException(status_code=404, detail=table.not_found)
+    return _send(request, body, _etag(body), snapshot.version)
+
+
+def invalidate(name: str) -> None:
+    tables[name].invalidate()
+
+
+def startup(db: Session) -> None:
+    for table in tables.values():
+        table.load(db)
@@ -0,0 +1,222 @@
+"""
+In-memory index of time-bounded spot reservations.
+
+The `spot_reservations` table has an exclusion constraint, so reservations
+of one spot never overlap. Per spot they are therefore kept as a list sorted
+by start time, and "does [t1, t2) collide with anything" is a binary search.
+Only spots that actually have reservations are tracked per zone, so zone
+availability touches those alone. Which spots are reserved right now is kept
+on a timeline of two heaps (waiting to start, running) that is advanced on
+each query, so an entry pays only for reservations that started or ended
+since the previous one.
+The database constraint stays the source of truth for concurrent bookings.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import ParkingSpot, SpotReservation
+
+
+@dataclass(frozen=True)
+class Reservation:
+    id: str
+    spot_id: str
+    car_id: Optional[str]
+    starts_at: datetime
+    ends_at: datetime
+
+
+class SpotIntervals:
+    """Non-overlapping reservations of one spot, sorted by start"""
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.items: List[Reservation] = []
+
+    def add(self, reservation: Reservation) -> None:
+        i = bisect_right(self.starts, reservation.starts_at)
+        self.starts.insert(i, reservation.starts_at)
+        self.items.insert(i, reservation)
+
+    def remove(self, reservation_id: str) -> None:
+        for i, item in enumerate(self.items):
+            if item.id == reservation_id:
+                del self.starts[i]
+                del self.items[i]
+                return
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # the only candidate is the last reservation starting before `end`
+        i = bisect_left(self.starts, end) - 1
+        return i >= 0 and self.items[i].ends_at > start
+
+    def at(self, moment: datetime) -> Optional[Reservation]:
+        i = bisect_right(self.starts, moment) - 1
+        if i >= 0 and self.items[i].ends_at > moment:
+            return self.items[i]
+        return None
+
+
+class ReservationIndex:
+    def __init__(self):
+        self._by_spot: Dict[str, SpotIntervals] = {}
+        self._by_car: Dict[str, Set[Reservation]] = {}
+        self._zone_of_spot: Dict[str, str] = {}
+        # spots of each zone that have at least one reservation not yet expired
+        self._reserved_by_zone: Dict[str, Set[str]] = {}
+        # timeline for "reserved right now": reservations waiting to start and
+        # running ones, both as heaps; removed entries are skipped lazily
+        self._live: Dict[str, Reservation] = {}
+        self._upcoming: List[Tuple[datetime, str, Reservation]] = []
+        self._running: List[Tuple[datetime, str, Reservation]] = []
+        self._current: Dict[str, Reservation] = {}
+        self._clock: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._dirty = True
+
+    def rebuild(self, db: Session) -> None:
+        now = datetime.now()
+        spots = (
+            db.query(ParkingSpot.id, ParkingSpot.zone_id)
+            .filter(ParkingSpot.is_active == True, ParkingSpot.is_reserved == False)  # noqa: E712
+            .all()
+        )
+        rows = db.query(SpotReservation).filter(SpotReservation.ends_at > now).all()
+        zone_of_spot = {str(spot_id): str(zone_id) for spot_id, zone_id in spots}
+
+        with self._lock:
+            self._by_spot = {}
+            self._by_car = {}
+            self._zone_of_spot = zone_of_spot
+            self._reserved_by_zone = {}
+            self._live = {}
+            self._upcoming = []
+            self._running = []
+            self._current = {}
+            self._clock = None
+            for row in rows:
+                self._add(_to_reservation(row))
+            self._dirty = False
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._dirty:
+            self.rebuild(db)
+
+    def _add(self, reservation: Reservation) -> None:
+        self._live[reservation.id] = reservation
+        self._by_spot.setdefault(reservation.spot_id, SpotIntervals()).add(reservation)
+        if reservation.car_id:
+            self._by_car.setdefault(reservation.car_id, set()).add(reservation)
+        zone_id = self._zone_of_spot.get(reservation.spot_id)
+        if zone_id is None:
+            # a spot this index has not seen yet: reload the zone layout
+            self._dirty = True
+        else:
+            self._reserved_by_zone.setdefault(zone_id, set()).add(reservation.spot_id)
+        heapq.heappush(self._upcoming, (reservation.starts_at, reservation.id, reservation))
+
+    def _drop(self, reservation: Reservation) -> None:
+        if self._live.pop(reservation.id, None) is None:
+            return
+        intervals = self._by_spot.get(reservation.spot_id)
+        if intervals is not None:
+            intervals.remove(reservation.id)
+            if not intervals.items:
+                del self._by_spot[reservation.spot_id]
+                zone_id = self._zone_of_spot.get(reservation.spot_id)
+                self._reserved_by_zone.get(zone_id, set()).discard(reservation.spot_id)
+        if reservation.car_id:
+            self._by_car.get(reservation.car_id, set()).discard(reservation)
+        current = self._current.get(reservation.spot_id)
+        if current is not None and current.id == reservation.id:
+            del self._current[reservation.spot_id]
+
+    def _advance(self, moment: datetime) -> None:
+        """Move the timeline forward: start due reservations, expire finished ones"""
+        while self._upcoming and self._upcoming[0][0] <= moment:
+            _, reservation_id, reservation = heapq.heappop(self._upcoming)
+            if reservation_id not in self._live:
+                continue
+            if reservation.ends_at > moment:
+                self._current[reservation.spot_id] = reservation
+                heapq.heappush(self._running, (reservation.ends_at, reservation_id, reservation))
+            else:
+                self._drop(reservation)
+        while self._running and self._running[0][0] <= moment:
+            _, _, reservation = heapq.heappop(self._running)
+            self._drop(reservation)
+        self._clock = moment
+
+    def add(self, reservation: Reservation) -> None:
+        with self._lock:
+            self._add(reservation)
+
+    def remove(self, reservation: Reservation) -> None:
+        with self._lock:
+            self._drop(reservation)
+
+    def has_conflict(self, db: Session, spot_id, start: datetime, end: datetime) -> bool:
+        self.ensure_loaded(db)
+        with self._lock:
+            intervals = self._by_spot.get(str(spot_id))
+            return intervals is not None and intervals.overlaps(start, end)
+
+    def reserved_in_zone(self, db: Session, zone_id, start: datetime, end: datetime) -> Set[str]:
+        """Spots of the zone with a reservation overlapping [start, end); only reserved spots are visited"""
+        self.ensure_loaded(db)
+        with self._lock:
+            return {
+                spot_id
+                for spot_id in self._reserved_by_zone.get(str(zone_id), ())
+                if self._by_spot[spot_id].overlaps(start, end)
+            }
+
+    def reserved_spot_ids(self, db: Session, moment: datetime) -> Set[str]:
+        """Spots held by a reservation at `moment`"""
+        self.ensure_loaded(db)
+        with self._lock:
+            if self._clock is not None and moment < self._clock:
+                # the timeline only moves forward; answer an earlier moment directly
+                return {spot_id for spot_id, intervals in self._by_spot.items() if intervals.at(moment)}
+            self._advance(moment)
+            return set(self._current)
+
+    def spot_for_car(self, db: Session, car_id, moment: datetime) -> Optional[str]:
+        """Spot reserved for the car at `moment`, if any"""
+        self.ensure_loaded(db)
+        with self._lock:
+            for reservation in self._by_car.get(str(car_id), ()):
+                if reservation.starts_at <= moment < reservation.ends_at:
+                    return reservation.spot_id
+        return None
+
+
+def _to_reservation(row: SpotReservation) -> Reservation:
+    return Reservation(
+        id=str(row.id),
+        spot_id=str(row.spot_id),
+        car_id=str(row.car_id) if row.car_id else None,
+        starts_at=row.starts_at,
+        ends_at=row.ends_at,
+    )
+
+
+index = ReservationIndex()
+
+
+def remember(row: SpotReservation) -> None:
+    index.add(_to_reservation(row))
+
+
+def forget(row: SpotReservation) -> None:
+    index.remove(_to_reservation(row))
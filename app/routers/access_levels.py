@@ -1,8 +1,9 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app import reference_data
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
@@ -45,20 +46,27 @@ async def create_access_level(
     log_audit(db, admin.id, obj.id, "create", {"code": obj.code})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("access_levels")
     return obj
 
 
 @router.get("/{access_level_id}", response_model=AccessLevelResponse)
-async def get_access_level(access_level_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    obj = db.query(AccessLevel).filter(AccessLevel.id == access_level_id).first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="Access level not found")
-    return obj
+async def get_access_level(
+    access_level_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.item_response(request, db, "access_levels", access_level_id)
 
 
 @router.get("", response_model=List[AccessLevelResponse])
-async def list_access_levels(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(AccessLevel).all()
+async def list_access_levels(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.list_response(request, db, "access_levels")
 
 
 @router.put("/{access_level_id}", response_model=AccessLevelResponse)
@@ -83,6 +91,7 @@ async def update_access_level(
     log_audit(db, admin.id, obj.id, "update", {"code": obj.code, "description": obj.description})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("access_levels")
     return obj
 
 
@@ -99,4 +108,5 @@ async def delete_access_level(
     db.delete(obj)
     log_audit(db, admin.id, access_level_id, "delete", {"code": obj.code})
     db.commit()
+    reference_data.invalidate("access_levels")
     return None
@@ -1,15 +1,16 @@
 from datetime import datetime, timedelta
-from decimal import Decimal
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, text
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app import db_report, fast_json, plate_index, sampling_profiler, sql_profiler
 from app.auth import get_current_user
 from app.database import get_db
-from app.models import Car, ParkingSession, User, Wallet, WalletTransaction
-from app.schemas import OccupancyStats, RevenueStats, UserStats
+from app.deps import require_admin
+from app.models import User
 
 router = APIRouter()
 
@@ -20,20 +21,14 @@ async def get_occupancy_stats(
     current_user: User = Depends(get_current_user),
 ):
     """Get current parking occupancy by zone"""
-    result = db.execute(text("SELECT * FROM parking_occupancy"))
-    rows = result.fetchall()
-    
-    return [
-        {
-            "zone_id": str(row[0]),
-            "zone_name": row[1],
-            "total_spots": row[2],
-            "occupied_spots": row[3],
-            "free_spots": row[4],
-            "occupancy_percent": float(row[5]) if row[5] else 0
-        }
-        for row in rows
-    ]
+    result = db.execute(
+        text("""
+            SELECT zone_id, zone_name, total_spots, occupied_spots, free_spots,
+                   COALESCE(occupancy_percent, 0) AS occupancy_percent
+            FROM parking_occupancy
+        """)
+    )
+    return fast_json.rows_response(result)
 
 
 @router.get("/stats/revenue", response_model=List[dict])
@@ -51,28 +46,23 @@ async def get_revenue_stats(
     
     result = db.execute(
         text("""
-            SELECT * FROM revenue_analytics
+            SELECT
+                date,
+                tariff_id,
+                tariff_name,
+                zone_id,
+                zone_name,
+                sessions_count,
+                COALESCE(total_revenue, 0) AS total_revenue,
+                COALESCE(avg_session_cost, 0) AS avg_session_cost,
+                COALESCE(avg_duration_minutes, 0) AS avg_duration_minutes
+            FROM revenue_analytics
             WHERE date BETWEEN :start_date AND :end_date
             ORDER BY date DESC, total_revenue DESC
         """),
         {"start_date": start_date.date(), "end_date": end_date.date()}
     )
-    rows = result.fetchall()
-    
-    return [
-        {
-            "date": row[0],
-            "tariff_id": str(row[1]),
-            "tariff_name": row[2],
-            "zone_id": str(row[3]) if row[3] else None,
-            "zone_name": row[4],
-            "sessions_count": row[5],
-            "total_revenue": float(row[6]) if row[6] else 0,
-            "avg_session_cost": float(row[7]) if row[7] else 0,
-            "avg_duration_minutes": float(row[8]) if row[8] else 0
-        }
-        for row in rows
-    ]
+    return fast_json.rows_response(result)
 
 
 @router.get("/users/debtors", response_model=List[dict])
@@ -81,18 +71,15 @@ async def get_debtors(
     current_user: User = Depends(get_current_user),
 ):
     """Get users with negative balance"""
-    users = db.query(User, Wallet).join(Wallet).filter(Wallet.balance < 0).all()
-    
-    return [
-        {
-            "user_id": str(user.id),
-            "phone": user.phone,
-            "email": user.email,
-            "balance": float(wallet.balance),
-            "is_blocked": user.is_blocked
-        }
-        for user, wallet in users
-    ]
+    result = db.execute(
+        text("""
+            SELECT u.id AS user_id, u.phone, u.email, w.balance, u.is_blocked
+            FROM users u
+            JOIN wallets w ON w.user_id = u.id
+            WHERE w.balance < 0
+        """)
+    )
+    return fast_json.rows_response(result)
 
 
 @router.get("/stats/top-users", response_model=List[dict])
@@ -119,18 +106,7 @@ async def get_top_users(
         """),
         {"limit": limit}
     )
-    rows = result.fetchall()
-    
-    return [
-        {
-            "user_id": str(row[0]),
-            "phone": row[1],
-            "total_sessions": row[2],
-            "total_spent": float(row[3]) if row[3] else 0,
-            "avg_session_cost": float(row[4]) if row[4] else 0
-        }
-        for row in rows
-    ]
+    return fast_json.rows_response(result)
 
 
 @router.get("/stats/suspicious-sessions", response_model=List[dict])
@@ -143,12 +119,12 @@ async def get_suspicious_sessions(
     result = db.execute(
         text("""
             SELECT 
-                ps.id,
+                ps.id as session_id,
                 c.plate_number,
                 u.phone,
                 ps.entry_time,
                 ps.exit_time,
-                ps.total_cost,
+                COALESCE(ps.total_cost, 0) as total_cost,
                 EXTRACT(EPOCH FROM (ps.exit_time - ps.entry_time)) / 3600 as duration_hours
             FROM parking_sessions ps
             JOIN cars c ON c.id = ps.car_id
@@ -160,20 +136,7 @@ async def get_suspicious_sessions(
         """),
         {"max_hours": max_hours}
     )
-    rows = result.fetchall()
-    
-    return [
-        {
-            "session_id": str(row[0]),
-            "plate_number": row[1],
-            "phone": row[2],
-            "entry_time": row[3],
-            "exit_time": row[4],
-            "total_cost": float(row[5]) if row[5] else 0,
-            "duration_hours": float(row[6])
-        }
-        for row in rows
-    ]
+    return fast_json.rows_response(result)
 
 
 @router.get("/stats/peak-hours", response_model=List[dict])
@@ -186,21 +149,117 @@ async def get_peak_hours(
     result = db.execute(
         text("""
             SELECT 
-                EXTRACT(HOUR FROM entry_time) as hour,
+                EXTRACT(HOUR FROM entry_time)::int as hour,
                 COUNT(*) as entries_count
             FROM parking_sessions
             WHERE entry_time >= CURRENT_DATE - (:days || ' days')::interval
-            GROUP BY EXTRACT(HOUR FROM entry_time)
+            GROUP BY 1
             ORDER BY entries_count DESC
         """),
         {"days": days}
     )
-    rows = result.fetchall()
-    
+    return fast_json.rows_response(result)
+
+
+@router.get("/plates/search", response_model=List[dict])
+async def search_plates(
+    plate_number: str,
+    max_distance: int = plate_index.MAX_DISTANCE,
+    limit: int = 5,
+    source: str = "memory",
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """Registered plates closest to a (possibly misread) plate number"""
+    if source == "db":
+        return [
+            {"plate_number": plate, "similarity": score}
+            for plate, score in plate_index.search_in_db(db, plate_number, limit)
+        ]
+    if source != "memory":
+        raise HTTPException(status_code=400, detail="source must be 'memory' or 'db'")
+
     return [
-        {
-            "hour": int(row[0]),
-            "entries_count": row[1]
-        }
-        for row in rows
+        {"plate_number": plate, "distance": distance}
+        for plate, distance in plate_index.index.search(db, plate_number, max_distance, limit)
     ]
+
+
+@router.get("/sql-profiles", response_model=List[dict])
+async def list_sql_profiles(limit: int = 50, admin: User = Depends(require_admin)):
+    """Most recent request profiles of this worker (SQL_PROFILER=on)"""
+    if not sql_profiler.ENABLED:
+        raise HTTPException(status_code=404, detail="SQL profiler is disabled (SQL_PROFILER=on)")
+    return sql_profiler.recent(limit)
+
+
+@router.get("/sql-profiles/{profile_id}", response_model=dict)
+async def get_sql_profile(profile_id: int, admin: User = Depends(require_admin)):
+    """Statements of one profiled request, with repeated statement shapes"""
+    if not sql_profiler.ENABLED:
+        raise HTTPException(status_code=404, detail="SQL profiler is disabled (SQL_PROFILER=on)")
+    profile = sql_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (expired or served by another worker)")
+    return profile
+
+
+@router.post("/profiles/arm", response_model=dict)
+async def arm_profiler(
+    path: str = Query(..., description="Path prefix, e.g. /api/parking/entry"),
+    count: int = Query(10, ge=1, le=1000),
+    admin: User = Depends(require_admin),
+):
+    """Profile the next `count` requests of this worker whose path starts with `path`"""
+    sampling_profiler.arm(path, count)
+    return {"armed": sampling_profiler.armed()}
+
+
+@router.get("/profiles", response_model=List[dict])
+async def list_profiles(admin: User = Depends(require_admin)):
+    """Stored request profiles of this worker, newest first"""
+    return sampling_profiler.list_profiles()
+
+
+@router.get("/profiles/{name}", response_class=PlainTextResponse)
+async def get_profile(name: str, admin: User = Depends(require_admin)):
+    """Folded stacks of one request (input for flamegraph.pl or speedscope)"""
+    body = sampling_profiler.read_profile(name)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(body)
+
+
+@router.get("/db-report", response_model=dict)
+async def get_db_report(
+    limit: int = Query(20, ge=1, le=db_report.SNAPSHOT_STATEMENTS),
+    compare_to: Optional[int] = None,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """Top statements, index usage and table sizes, diffed against a saved snapshot (the latest by default)"""
+    previous = db_report.load_snapshot(db, compare_to)
+    if previous is None and compare_to is not None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return db_report.build(db, limit, previous=previous)
+
+
+@router.post("/db-report/snapshots", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_db_report_snapshot(
+    limit: int = Query(20, ge=1, le=db_report.SNAPSHOT_STATEMENTS),
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """Save the current statistics as a snapshot; returns the report diffed against the previous snapshot"""
+    previous = db_report.load_snapshot(db)
+    return db_report.build(db, limit, save_snapshot=True, previous=previous)
+
+
+@router.get("/db-report/snapshots", response_model=List[dict])
+async def list_db_report_snapshots(
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """Saved database statistics snapshots, newest first"""
+    return db_report.list_snapshots(db, limit)
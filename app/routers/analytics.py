@@ -0,0 +1,176 @@
+"""
+Reports of database/analytics_queries.sql served from the analytics store
+(app/analytics_store.py) instead of the OLTP database.
+
+The data is as fresh as the last refresh (see GET /status). The endpoints
+are plain functions on purpose: FastAPI runs them in its threadpool, so a
+long DuckDB scan never blocks the event loop that serves the gates.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app import analytics_store, fast_json
+from app.deps import require_admin
+from app.models import User
+
+router = APIRouter()
+
+Days = Query(30, ge=1, le=3650, description="Report window: entries since this many days before today")
+AllDays = Query(None, ge=1, le=3650, description="Report window in days (all history by default)")
+
+
+def _store_ready(admin: User = Depends(require_admin)) -> User:
+    reason = analytics_store.unavailable_reason()
+    if reason is not None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=reason)
+    return admin
+
+
+def _since(days: Optional[int]) -> datetime:
+    if days is None:
+        return datetime.min
+    return datetime.combine(date.today() - timedelta(days=days), time.min)
+
+
+def _report(report: str, days: Optional[int], **params):
+    keys, rows = analytics_store.query(report, since=_since(days), **params)
+    return fast_json.records_response(keys, rows)
+
+
+@router.get("/status", response_model=dict)
+def get_status(admin: User = Depends(require_admin)):
+    """Last refresh of the analytics store and row counts per table"""
+    return {
+        "enabled": analytics_store.ANALYTICS_STORE == "on",
+        "unavailable_reason": analytics_store.unavailable_reason(),
+        "state": analytics_store.read_state(),
+    }
+
+
+@router.post("/refresh", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+def refresh_store(full: bool = False, admin: User = Depends(require_admin)):
+    """Start a refresh of the analytics store (full=true copies all months again)"""
+    if not analytics_store.installed():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="duckdb is not installed")
+    return {"started": analytics_store.refresh_in_background(full)}
+
+
+@router.get("/load/hourly", response_model=List[dict])
+def hourly_load(days: int = Days, admin: User = Depends(_store_ready)):
+    """Entries and distinct cars by hour of day"""
+    return _report("hourly_load", days)
+
+
+@router.get("/load/daily", response_model=List[dict])
+def daily_load(days: int = Days, limit: int = Query(10, ge=1, le=3650), admin: User = Depends(_store_ready)):
+    """Busiest days by completed sessions, with revenue"""
+    return _report("daily_load", days, limit=limit)
+
+
+@router.get("/load/peak-hours", response_model=List[dict])
+def peak_hours(days: int = Days, limit: int = Query(20, ge=1, le=1000), admin: User = Depends(_store_ready)):
+    """Busiest (day, hour) pairs, ranked within the day and overall"""
+    return _report("peak_hours", days, limit=limit)
+
+
+@router.get("/revenue/tariff-zone", response_model=List[dict])
+def revenue_by_tariff_zone(days: int = Days, admin: User = Depends(_store_ready)):
+    """Revenue and session cost statistics by tariff and zone"""
+    return _report("revenue_by_tariff_zone", days)
+
+
+@router.get("/revenue/daily-tariff", response_model=List[dict])
+def daily_revenue_by_tariff(days: int = Query(7, ge=1, le=3650), admin: User = Depends(_store_ready)):
+    """Revenue by day and tariff"""
+    return _report("daily_revenue_by_tariff", days)
+
+
+@router.get("/revenue/daily", response_model=List[dict])
+def daily_revenue(days: int = Days, admin: User = Depends(_store_ready)):
+    """Revenue by day with the change against the previous day"""
+    return _report("daily_revenue", days)
+
+
+@router.get("/tariffs/durations", response_model=List[dict])
+def tariff_durations(days: Optional[int] = AllDays, admin: User = Depends(_store_ready)):
+    """Average session duration and cost by tariff"""
+    return _report("tariff_durations", days)
+
+
+@router.get("/zones/usage", response_model=List[dict])
+def zone_usage(days: int = Days, admin: User = Depends(_store_ready)):
+    """Sessions, active sessions, used spots and average duration by zone"""
+    return _report("zone_usage", days)
+
+
+@router.get("/sessions/long", response_model=List[dict])
+def long_sessions(
+    min_hours: float = Query(24, gt=0),
+    days: Optional[int] = AllDays,
+    limit: int = Query(100, ge=1, le=10000),
+    admin: User = Depends(_store_ready),
+):
+    """Completed sessions longer than min_hours"""
+    return _report("long_sessions", days, min_hours=min_hours, limit=limit)
+
+
+@router.get("/sessions/expensive", response_model=List[dict])
+def expensive_sessions(
+    factor: float = Query(3, gt=0, description="Cost threshold as a multiple of the average session cost"),
+    days: Optional[int] = AllDays,
+    limit: int = Query(100, ge=1, le=10000),
+    admin: User = Depends(_store_ready),
+):
+    """Completed sessions costing more than factor times the average"""
+    return _report("expensive_sessions", days, factor=factor, limit=limit)
+
+
+@router.get("/users/top", response_model=List[dict])
+def top_users(days: Optional[int] = AllDays, limit: int = Query(20, ge=1, le=1000), admin: User = Depends(_store_ready)):
+    """Users with the most completed sessions"""
+    return _report("top_users", days, limit=limit)
+
+
+@router.get("/users/top-spenders", response_model=List[dict])
+def top_spenders(days: Optional[int] = AllDays, limit: int = Query(20, ge=1, le=1000), admin: User = Depends(_store_ready)):
+    """Users by total spent, with the wallet balance as of the last refresh"""
+    return _report("top_spenders", days, limit=limit)
+
+
+@router.get("/users/debtors", response_model=List[dict])
+def debtors(limit: int = Query(1000, ge=1, le=100000), admin: User = Depends(_store_ready)):
+    """Users with a negative balance as of the last refresh, with their active sessions"""
+    return _report("debtors", None, limit=limit)
+
+
+@router.get("/cars/top", response_model=List[dict])
+def top_cars(days: Optional[int] = AllDays, limit: int = Query(30, ge=1, le=1000), admin: User = Depends(_store_ready)):
+    """Active cars with the most completed sessions"""
+    return _report("top_cars", days, limit=limit)
+
+
+@router.get("/entries/results", response_model=List[dict])
+def entry_results(days: int = Days, admin: User = Depends(_store_ready)):
+    """Allowed and denied entry attempts with their share"""
+    return _report("entry_results", days)
+
+
+@router.get("/entries/denial-reasons", response_model=List[dict])
+def denial_reasons(days: int = Days, admin: User = Depends(_store_ready)):
+    """Denied entry attempts by reason"""
+    return _report("denial_reasons", days)
+
+
+@router.get("/wallet/operations", response_model=List[dict])
+def wallet_operations(days: int = Days, admin: User = Depends(_store_ready)):
+    """Wallet transactions by operation type"""
+    return _report("wallet_operations", days)
+
+
+@router.get("/wallet/daily", response_model=List[dict])
+def daily_wallet_operations(days: int = Days, admin: User = Depends(_store_ready)):
+    """Wallet transactions by day and operation type"""
+    return _report("daily_wallet_operations", days)
@@ -3,6 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app import read_repo
 from app.deps import require_admin
 from app.database import get_db
 from app.models import AuditLog, User
@@ -44,7 +45,7 @@ async def get_audit_log(
 
 @router.get("", response_model=List[AuditLogResponse])
 async def list_audit_logs(db: Session = Depends(get_db), admin: User = Depends(require_admin)):
-    return db.query(AuditLog).all()
+    return read_repo.list_response(db, AuditLogResponse, read_repo.select_for(AuditLog, AuditLogResponse))
 
 
 @router.put("/{log_id}", response_model=AuditLogResponse)
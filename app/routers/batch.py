@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+from app import plate_index
 from app.auth import get_current_user, get_password_hash
 from app.database import get_db
 from app.models import AuditLog, Car, User
@@ -71,6 +72,8 @@ async def batch_import(
 
             if not payload.dry_run:
                 db.commit()
+                for car_payload in user_payload.cars:
+                    plate_index.index.add(car_payload.plate_number)
             else:
                 db.rollback()
         except IntegrityError as ie:
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
+from app import active_sessions, denial_cache, plate_index, read_repo
 from app.auth import get_current_user
 from app.database import get_db
 from app.models import AuditLog, Car, User
@@ -58,6 +59,8 @@ async def create_car(
     )
     db.commit()
 
+    plate_index.index.add(new_car.plate_number)
+    denial_cache.cache.forget_plate(new_car.plate_number)
     return new_car
 
 
@@ -66,8 +69,8 @@ async def get_cars(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    cars = db.query(Car).filter(Car.user_id == current_user.id).all()
-    return cars
+    stmt = read_repo.select_for(Car, CarResponse).where(Car.user_id == current_user.id)
+    return read_repo.list_response(db, CarResponse, stmt)
 
 
 @router.put("/{car_id}", response_model=CarResponse)
@@ -87,6 +90,7 @@ async def update_car(
         if conflict:
             raise HTTPException(status_code=400, detail="Car with this plate number already exists")
 
+    old_plate = car.plate_number
     car.plate_number = car_data.plate_number
     car.model = car_data.model
     log_audit(
@@ -98,6 +102,12 @@ async def update_car(
     )
     db.commit()
     db.refresh(car)
+
+    if car.plate_number != old_plate:
+        plate_index.index.remove(old_plate)
+        plate_index.index.add(car.plate_number)
+        denial_cache.cache.forget_plate(car.plate_number)
+        active_sessions.refresh_car(db, car.id)
     return car
 
 
@@ -112,13 +122,16 @@ async def delete_car(
         raise HTTPException(status_code=404, detail="Car not found")
     ensure_car_owner(car, current_user.id)
 
+    plate_number = car.plate_number
     db.delete(car)
     log_audit(
         db,
         current_user.id,
         car.id,
         action="delete",
-        details={"plate_number": car.plate_number},
+        details={"plate_number": plate_number},
     )
     db.commit()
+
+    plate_index.index.remove(plate_number)
     return None
@@ -1,12 +1,16 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
+from app import read_repo
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
-from app.models import EntryLog, Car, User, AuditLog
+from app.models import EntryLog, User, AuditLog
 from app.schemas import (
     EntryLogCreate,
     EntryLogUpdate,
@@ -61,7 +65,7 @@ async def get_entry_log(
     from app.deps import ADMIN_PHONE
 
     if current_user.phone != ADMIN_PHONE:
-        q = q.join(Car, Car.plate_number == EntryLog.plate_number).filter(Car.user_id == current_user.id)
+        q = q.filter(EntryLog.user_id == current_user.id)
     obj = q.filter(EntryLog.id == log_id).first()
     if not obj:
         raise HTTPException(status_code=404, detail="Entry log not found")
@@ -70,15 +74,29 @@ async def get_entry_log(
 
 @router.get("", response_model=List[EntryLogResponse])
 async def list_entry_logs(
+    limit: int = Query(100, ge=1, le=1000),
+    before: Optional[datetime] = None,
+    before_id: Optional[UUID] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    q = db.query(EntryLog)
+    """
+    Entry attempts, newest first. Pass the attempt_time and id of the last
+    item as `before` and `before_id` for the next page; for a regular user
+    this is a range scan of the (user_id, attempt_time) index.
+    """
+    stmt = read_repo.select_for(EntryLog, EntryLogResponse)
     from app.deps import ADMIN_PHONE
 
     if current_user.phone != ADMIN_PHONE:
-        q = q.join(Car, Car.plate_number == EntryLog.plate_number).filter(Car.user_id == current_user.id)
-    return q.all()
+        stmt = stmt.where(EntryLog.user_id == current_user.id)
+    if before is not None and before_id is not None:
+        stmt = stmt.where(tuple_(EntryLog.attempt_time, EntryLog.id) < tuple_(before, before_id))
+    elif before is not None:
+        stmt = stmt.where(EntryLog.attempt_time < before)
+
+    stmt = stmt.order_by(EntryLog.attempt_time.desc(), EntryLog.id.desc()).limit(limit)
+    return read_repo.list_response(db, EntryLogResponse, stmt)
 
 
 @router.put("/{log_id}", response_model=EntryLogResponse)
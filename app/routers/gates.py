@@ -1,8 +1,9 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
+from app import allowlist, reference_data
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
@@ -37,20 +38,59 @@ async def create_gate(
     log_audit(db, admin.id, obj.id, "create", {"name": obj.name, "type": obj.type})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("gates")
     return obj
 
 
+@router.get("/allowlist", response_class=Response)
+async def get_allowlist(db: Session = Depends(get_db), admin: User = Depends(require_admin)):
+    """Full binary allowlist snapshot for offline decisions at the gate controllers"""
+    version, blob = allowlist.build_snapshot(db)
+    return Response(
+        content=blob,
+        media_type="application/octet-stream",
+        headers={"X-Allowlist-Version": str(version)},
+    )
+
+
+@router.post("/allowlist/prune", status_code=status.HTTP_204_NO_CONTENT)
+async def prune_allowlist_changes(db: Session = Depends(get_db), admin: User = Depends(require_admin)):
+    """Drop allowlist change history older than the retention period (run periodically, e.g. from cron)"""
+    allowlist.prune_changes(db)
+    return None
+
+
+@router.get("/allowlist/delta", response_class=Response)
+async def get_allowlist_delta(since: int, db: Session = Depends(get_db), admin: User = Depends(require_admin)):
+    """Allowlist records changed since a previously received version"""
+    delta = allowlist.build_delta(db, since)
+    if delta is None:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Changes since this version are no longer kept, download the full allowlist")
+    version, blob = delta
+    return Response(
+        content=blob,
+        media_type="application/octet-stream",
+        headers={"X-Allowlist-Version": str(version)},
+    )
+
+
 @router.get("/{gate_id}", response_model=GateResponse)
-async def get_gate(gate_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    obj = db.query(Gate).filter(Gate.id == gate_id).first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="Gate not found")
-    return obj
+async def get_gate(
+    gate_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.item_response(request, db, "gates", gate_id)
 
 
 @router.get("", response_model=List[GateResponse])
-async def list_gates(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(Gate).all()
+async def list_gates(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.list_response(request, db, "gates")
 
 
 @router.put("/{gate_id}", response_model=GateResponse)
@@ -72,6 +112,7 @@ async def update_gate(
     log_audit(db, admin.id, obj.id, "update", {"name": obj.name, "type": obj.type})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("gates")
     return obj
 
 
@@ -88,4 +129,5 @@ async def delete_gate(
     db.delete(obj)
     log_audit(db, admin.id, gate_id, "delete", {"name": obj.name})
     db.commit()
+    reference_data.invalidate("gates")
     return None
@@ -1,24 +1,44 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app import active_sessions, denial_cache, metrics, plate_index, pricing, read_repo, reservations, spot_allocator
 from app.auth import get_current_user
 from app.database import get_db
+from app.deps import ADMIN_PHONE
 from app.models import Car, EntryLog, Gate, ParkingSession, Tariff, User
-from app.schemas import EntryLogResponse, ParkingEntry, ParkingExit, ParkingSessionResponse
+from app.schemas import EntryLogResponse, ParkingEntry, ParkingExit, ParkingQuoteResponse, ParkingSessionResponse
 
 router = APIRouter()
 
 
+def _check_entry(db: Session, plate_number: str, gate_id):
+    result = db.execute(
+        text("SELECT * FROM check_entry_allowed(:plate_number, :gate_id)"),
+        {"plate_number": plate_number, "gate_id": str(gate_id)}
+    ).fetchone()
+    if not result:
+        raise HTTPException(status_code=500, detail="Failed to check entry")
+    return result
+
+
 @router.post("/entry", response_model=dict)
 async def process_entry(
     entry_data: ParkingEntry,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    # Repeated read of a plate that was just denied at this gate
+    cached_reason = denial_cache.cache.hit(entry_data.gate_id, entry_data.plate_number)
+    if cached_reason is not None:
+        metrics.gate_decision("entry", False, cached_reason, source="cache")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=cached_reason)
+    
     # Verify gate exists and is entry gate
     gate = db.query(Gate).filter(Gate.id == entry_data.gate_id).first()
     if not gate:
@@ -27,56 +47,112 @@ async def process_entry(
         raise HTTPException(status_code=400, detail="Gate is not an entry gate")
     
     # Call database function to check entry
-    result = db.execute(
-        text("SELECT * FROM check_entry_allowed(:plate_number, :gate_id)"),
-        {"plate_number": entry_data.plate_number, "gate_id": str(entry_data.gate_id)}
-    ).fetchone()
+    plate_number = entry_data.plate_number
+    result = _check_entry(db, plate_number, entry_data.gate_id)
     
-    if not result:
-        raise HTTPException(status_code=500, detail="Failed to check entry")
+    # Unknown plate: it may be a camera misread of a registered one
+    if result[2] is None:
+        matched = plate_index.index.best_match(db, plate_number)
+        if matched:
+            plate_number = matched
+            result = _check_entry(db, plate_number, entry_data.gate_id)
     
     allowed = result[0]
     reason = result[1]
     car_id = result[2]
     user_id = result[3]
-    wallet_id = result[4]
     balance = result[5]
+    if plate_number != entry_data.plate_number:
+        reason = f"{reason} (read as {entry_data.plate_number})"
     
-    # Log entry attempt
-    entry_log = EntryLog(
-        plate_number=entry_data.plate_number,
-        gate_id=entry_data.gate_id,
-        result="allowed" if allowed else "denied",
-        reason=reason
-    )
-    db.add(entry_log)
-    
+    # Log entry attempt (repeated denials are folded into one row)
+    denial_cache.cache.flush(db)
     if not allowed:
+        denial_cache.cache.record(
+            db, entry_data.gate_id, entry_data.plate_number, plate_number, reason, car_id=car_id, user_id=user_id
+        )
         db.commit()
+        metrics.gate_decision("entry", False, reason)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=reason
         )
     
+    denial_cache.cache.allowed(db, entry_data.gate_id, entry_data.plate_number)
+    entry_log = EntryLog(
+        plate_number=plate_number,
+        gate_id=entry_data.gate_id,
+        result="allowed",
+        reason=reason,
+        car_id=car_id,
+        user_id=user_id,
+    )
+    db.add(entry_log)
+    
     # Get default tariff (in production, determine by user access level)
     tariff = db.query(Tariff).first()
     if not tariff:
         raise HTTPException(status_code=500, detail="No tariffs configured")
     
-    # Create parking session
-    session = ParkingSession(
-        car_id=UUID(car_id),
-        tariff_id=tariff.id,
-        status="active"
-    )
-    db.add(session)
-    db.commit()
+    # Use the car's reserved spot unless someone is still parked on it,
+    # otherwise assign a free one (in the tariff's zone if it has one)
+    spot_id = reservations.index.spot_for_car(db, car_id, datetime.now())
+    if not spot_id or not spot_allocator.claim_spot(db, spot_id):
+        spot_id = spot_allocator.allocate_spot(db, tariff.zone_id)
+    
+    # Create parking session; the unique active-spot index rejects a spot another
+    # gate filled after our scan, then the next free one is tried
+    for attempt in range(spot_allocator.SPOT_CONFLICT_RETRIES + 1):
+        session = ParkingSession(
+            car_id=UUID(car_id),
+            spot_id=spot_id,
+            tariff_id=tariff.id,
+            status="active"
+        )
+        try:
+            with db.begin_nested():
+                db.add(session)
+            break
+        except IntegrityError as exc:
+            if not spot_allocator.is_spot_conflict(exc):
+                db.rollback()
+                spot_allocator.release_spot(spot_id)
+                raise
+            if attempt == spot_allocator.SPOT_CONFLICT_RETRIES:
+                db.rollback()
+                spot_allocator.settle_spot(spot_id)
+                raise HTTPException(status_code=503, detail="Could not assign a parking spot, try again")
+            # the spot is occupied: drop it from the pending set, it stays taken
+            spot_allocator.settle_spot(spot_id)
+            spot_id = spot_allocator.allocate_spot(db, tariff.zone_id)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        spot_allocator.release_spot(spot_id)
+        raise
+    spot_allocator.settle_spot(spot_id)
+    # counted only once the session exists: a failed entry is not an allowed one
+    metrics.gate_decision("entry", True, reason)
     db.refresh(session)
     
+    active_sessions.remember(
+        active_sessions.ActiveSession(
+            session_id=str(session.id),
+            car_id=str(session.car_id),
+            plate_number=plate_number,
+            tariff_id=str(session.tariff_id),
+            entry_time=session.entry_time,
+            spot_id=str(session.spot_id) if session.spot_id else None,
+        )
+    )
+    
     return {
         "message": "Entry allowed",
         "session_id": str(session.id),
+        "spot_id": str(spot_id) if spot_id else None,
         "car_id": str(car_id),
+        "plate_number": plate_number,
         "balance": float(balance) if balance else 0
     }
 
@@ -90,15 +166,37 @@ async def process_exit(exit_data: ParkingExit, db: Session = Depends(get_db)):
     if gate.type != "exit":
         raise HTTPException(status_code=400, detail="Gate is not an exit gate")
     
-    # Find car
-    car = db.query(Car).filter(Car.plate_number == exit_data.plate_number).first()
-    if not car:
-        raise HTTPException(status_code=404, detail="Car not found")
+    # Find the active session in the registry; a miss is confirmed in the database
+    active = active_sessions.get_by_plate(db, exit_data.plate_number, confirm_miss=True)
+    if not active:
+        # No auto-correction here: a wrong match would charge someone else's wallet.
+        # Close plates of cars that are inside are returned for the operator to confirm.
+        candidates = [
+            plate
+            for plate, _ in plate_index.index.search(db, exit_data.plate_number, plate_index.AUTO_MATCH_DISTANCE)
+            if plate != exit_data.plate_number and active_sessions.get_by_plate(db, plate)
+        ]
+        car = db.query(Car.id).filter(Car.plate_number == exit_data.plate_number).first()
+        reason = "No active session found" if car else "Car not found"
+        metrics.gate_decision("exit", False, reason)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST if car else status.HTTP_404_NOT_FOUND,
+            detail={"message": reason, "candidates": candidates} if candidates else reason,
+        )
+    
+    # Price the session with the in-memory tariff engine
+    exit_time = datetime.now()
+    cost = pricing.calculate_cost(db, active.tariff_id, active.entry_time, exit_time)
     
-    # Call database function to process exit
+    # Call database function to process exit (it charges the car's current owner's wallet)
     result = db.execute(
-        text("SELECT * FROM process_exit(:car_id, :exit_time)"),
-        {"car_id": str(car.id), "exit_time": datetime.now()}
+        text("SELECT * FROM process_exit(:car_id, :exit_time, :cost, :session_id)"),
+        {
+            "car_id": active.car_id,
+            "exit_time": exit_time,
+            "cost": cost,
+            "session_id": active.session_id,
+        }
     ).fetchone()
     
     if not result:
@@ -110,13 +208,20 @@ async def process_exit(exit_data: ParkingExit, db: Session = Depends(get_db)):
     message = result[3]
     
     db.commit()
+    metrics.gate_decision("exit", success, None if success else message)
     
     if not success:
+        if session_id is None:
+            # the registry was behind: the session is already closed
+            active_sessions.forget(session_id=active.session_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=message
         )
     
+    active_sessions.forget(session_id=session_id, plate_number=active.plate_number)
+    spot_allocator.release_spot(active.spot_id)
+    
     return {
         "message": message,
         "session_id": str(session_id) if session_id else None,
@@ -126,5 +231,61 @@ async def process_exit(exit_data: ParkingExit, db: Session = Depends(get_db)):
 
 @router.get("/sessions/active", response_model=list[ParkingSessionResponse])
 async def get_active_sessions(db: Session = Depends(get_db)):
-    sessions = db.query(ParkingSession).filter(ParkingSession.status == "active").all()
-    return sessions
+    stmt = read_repo.select_for(ParkingSession, ParkingSessionResponse).where(ParkingSession.status == "active")
+    return read_repo.list_response(db, ParkingSessionResponse, stmt)
+
+
+@router.get("/plates/{plate_number}/inside", response_model=dict)
+async def is_car_inside(plate_number: str, db: Session = Depends(get_db)):
+    """Whether the car currently has an active session (answered from the session registry)"""
+    session = active_sessions.get_by_plate(db, plate_number)
+    return {
+        "plate_number": plate_number,
+        "inside": session is not None,
+        "session_id": session.session_id if session else None,
+        "entry_time": session.entry_time if session else None,
+        "spot_id": session.spot_id if session else None,
+    }
+
+
+def _quote(session: Optional[active_sessions.ActiveSession], db: Session, current_user: User) -> dict:
+    # users see only their own cars' sessions; the admin sees every session
+    if session is not None and current_user.phone != ADMIN_PHONE:
+        owned = db.query(Car.id).filter(Car.id == session.car_id, Car.user_id == current_user.id).first()
+        if not owned:
+            session = None
+    if session is None:
+        raise HTTPException(status_code=404, detail="Active session not found")
+    now = datetime.now()
+    cost = pricing.calculate_cost(db, session.tariff_id, session.entry_time, now)
+    if cost is None:
+        raise HTTPException(status_code=500, detail="Tariff not found")
+    return {
+        "session_id": session.session_id,
+        "plate_number": session.plate_number,
+        "tariff_id": session.tariff_id,
+        "entry_time": session.entry_time,
+        "quoted_at": now,
+        "duration_minutes": int((now - session.entry_time).total_seconds() // 60),
+        "cost": cost,
+    }
+
+
+@router.get("/sessions/{session_id}/quote", response_model=ParkingQuoteResponse)
+async def quote_session(
+    session_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Current cost of an active session (read-only, nothing is charged)"""
+    return _quote(active_sessions.get_by_id(db, session_id), db, current_user)
+
+
+@router.get("/plates/{plate_number}/quote", response_model=ParkingQuoteResponse)
+async def quote_plate(
+    plate_number: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Current cost of the active session for a plate (read-only, nothing is charged)"""
+    return _quote(active_sessions.get_by_plate(db, plate_number), db, current_user)
@@ -1,16 +1,21 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 
+from app import active_sessions, read_repo, spot_allocator
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
-from app.models import ParkingSession, Car, AuditLog, User
+from app.models import ParkingSession, ParkingSpot, ParkingZone, Car, AuditLog, Tariff, User
 from app.schemas import (
     ParkingSessionCreate,
     ParkingSessionUpdate,
     ParkingSessionResponse,
+    ParkingSessionDetailResponse,
 )
 
 router = APIRouter()
@@ -59,10 +64,61 @@ async def create_parking_session(
 
     log_audit(db, current_user.id, obj.id, "create", {"car_id": str(obj.car_id)})
     db.commit()
+    spot_allocator.invalidate()
     db.refresh(obj)
     return obj
 
 
+@router.get("/history", response_model=List[ParkingSessionDetailResponse])
+async def list_session_history(
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
+    before_id: Optional[UUID] = None,
+    car_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Sessions with plate, tariff, spot and zone in one query, newest first.
+
+    Keyset pagination: pass the entry_time and id of the last item as
+    `before` and `before_id` to get the next page. Served by the
+    (car_id, entry_time) index for one user's cars.
+    """
+    stmt = (
+        select(
+            ParkingSession.id,
+            ParkingSession.car_id,
+            Car.plate_number,
+            ParkingSession.tariff_id,
+            Tariff.name,
+            ParkingSession.spot_id,
+            ParkingSpot.spot_number,
+            ParkingSpot.zone_id,
+            ParkingZone.name,
+            ParkingSession.entry_time,
+            ParkingSession.exit_time,
+            ParkingSession.total_cost,
+            ParkingSession.status,
+        )
+        .join(Car, Car.id == ParkingSession.car_id)
+        .join(Tariff, Tariff.id == ParkingSession.tariff_id)
+        .outerjoin(ParkingSpot, ParkingSpot.id == ParkingSession.spot_id)
+        .outerjoin(ParkingZone, ParkingZone.id == ParkingSpot.zone_id)
+    )
+    if not is_admin(current_user):
+        stmt = stmt.where(Car.user_id == current_user.id)
+    if car_id is not None:
+        stmt = stmt.where(ParkingSession.car_id == car_id)
+    if before is not None and before_id is not None:
+        stmt = stmt.where(tuple_(ParkingSession.entry_time, ParkingSession.id) < tuple_(before, before_id))
+    elif before is not None:
+        stmt = stmt.where(ParkingSession.entry_time < before)
+
+    stmt = stmt.order_by(ParkingSession.entry_time.desc(), ParkingSession.id.desc()).limit(limit)
+    return read_repo.list_response(db, ParkingSessionDetailResponse, stmt)
+
+
 @router.get("/{session_id}", response_model=ParkingSessionResponse)
 async def get_parking_session(
     session_id: str,
@@ -83,10 +139,10 @@ async def list_parking_sessions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    q = db.query(ParkingSession)
+    stmt = read_repo.select_for(ParkingSession, ParkingSessionResponse)
     if not is_admin(current_user):
-        q = q.join(Car).filter(Car.user_id == current_user.id)
-    return q.all()
+        stmt = stmt.join(Car, Car.id == ParkingSession.car_id).where(Car.user_id == current_user.id)
+    return read_repo.list_response(db, ParkingSessionResponse, stmt)
 
 
 @router.put("/{session_id}", response_model=ParkingSessionResponse)
@@ -131,6 +187,8 @@ async def update_parking_session(
         },
     )
     db.commit()
+    active_sessions.forget(session_id=obj.id)
+    spot_allocator.invalidate()
     db.refresh(obj)
     return obj
 
@@ -151,4 +209,6 @@ async def delete_parking_session(
     db.delete(obj)
     log_audit(db, current_user.id, session_id, "delete", {"car_id": str(obj.car_id)})
     db.commit()
+    active_sessions.forget(session_id=session_id)
+    spot_allocator.invalidate()
     return None
@@ -3,6 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app import read_repo, reservations, spot_allocator
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
@@ -53,6 +54,8 @@ async def create_parking_spot(
 
     log_audit(db, admin.id, obj.id, "create", {"zone_id": str(obj.zone_id), "spot_number": obj.spot_number})
     db.commit()
+    spot_allocator.invalidate()
+    reservations.index.invalidate()
     db.refresh(obj)
     return obj
 
@@ -67,7 +70,7 @@ async def get_parking_spot(spot_id: str, db: Session = Depends(get_db), current_
 
 @router.get("", response_model=List[ParkingSpotResponse])
 async def list_parking_spots(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(ParkingSpot).all()
+    return read_repo.list_response(db, ParkingSpotResponse, read_repo.select_for(ParkingSpot, ParkingSpotResponse))
 
 
 @router.put("/{spot_id}", response_model=ParkingSpotResponse)
@@ -111,6 +114,8 @@ async def update_parking_spot(
         },
     )
     db.commit()
+    spot_allocator.invalidate()
+    reservations.index.invalidate()
     db.refresh(obj)
     return obj
 
@@ -128,4 +133,6 @@ async def delete_parking_spot(
     db.delete(obj)
     log_audit(db, admin.id, spot_id, "delete", {"spot_number": obj.spot_number})
     db.commit()
+    spot_allocator.invalidate()
+    reservations.index.invalidate()
     return None
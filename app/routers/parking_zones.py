@@ -1,8 +1,9 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app import reference_data
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
@@ -41,20 +42,27 @@ async def create_parking_zone(
     log_audit(db, admin.id, obj.id, "create", {"name": obj.name})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("parking_zones")
     return obj
 
 
 @router.get("/{zone_id}", response_model=ParkingZoneResponse)
-async def get_parking_zone(zone_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    obj = db.query(ParkingZone).filter(ParkingZone.id == zone_id).first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="Parking zone not found")
-    return obj
+async def get_parking_zone(
+    zone_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.item_response(request, db, "parking_zones", zone_id)
 
 
 @router.get("", response_model=List[ParkingZoneResponse])
-async def list_parking_zones(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(ParkingZone).all()
+async def list_parking_zones(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.list_response(request, db, "parking_zones")
 
 
 @router.put("/{zone_id}", response_model=ParkingZoneResponse)
@@ -76,6 +84,7 @@ async def update_parking_zone(
     log_audit(db, admin.id, obj.id, "update", {"name": obj.name, "description": obj.description})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("parking_zones")
     return obj
 
 
@@ -92,4 +101,5 @@ async def delete_parking_zone(
     db.delete(obj)
     log_audit(db, admin.id, zone_id, "delete", {"name": obj.name})
     db.commit()
+    reference_data.invalidate("parking_zones")
     return None
@@ -0,0 +1,186 @@
+import os
+from datetime import datetime, timedelta
+from typing import List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import read_repo, reservations
+from app.auth import get_current_user
+from app.database import get_db
+from app.deps import ADMIN_PHONE
+from app.models import AuditLog, Car, ParkingSpot, SpotReservation, User
+from app.schemas import ParkingSpotResponse, SpotReservationCreate, SpotReservationResponse
+
+router = APIRouter()
+
+# limits for non-admin bookings; admins book VIP/event spots without them
+RESERVATION_MAX_HOURS = int(os.getenv("RESERVATION_MAX_HOURS", "24"))
+RESERVATION_MAX_DAYS_AHEAD = int(os.getenv("RESERVATION_MAX_DAYS_AHEAD", "14"))
+RESERVATION_MAX_ACTIVE = int(os.getenv("RESERVATION_MAX_ACTIVE", "2"))
+
+
+def log_audit(db: Session, user_id, entity_id, action: str, details: dict):
+    audit = AuditLog(
+        user_id=user_id,
+        entity_type="spot_reservations",
+        entity_id=entity_id,
+        action=action,
+        details=details,
+    )
+    db.add(audit)
+
+
+def is_admin(current_user: User) -> bool:
+    return current_user.phone == ADMIN_PHONE
+
+
+def to_local(value: datetime) -> datetime:
+    # timestamps are stored without time zone, in server local time
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def check_user_limits(db: Session, current_user: User, starts_at: datetime, ends_at: datetime) -> None:
+    """Keep one account from booking the lot: bounded length, horizon and number of bookings"""
+    now = datetime.now()
+    if ends_at <= now:
+        raise HTTPException(status_code=400, detail="Reservation is in the past")
+    if ends_at - starts_at > timedelta(hours=RESERVATION_MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"Reservation cannot be longer than {RESERVATION_MAX_HOURS} hours")
+    if starts_at > now + timedelta(days=RESERVATION_MAX_DAYS_AHEAD):
+        raise HTTPException(
+            status_code=400, detail=f"Reservation cannot start more than {RESERVATION_MAX_DAYS_AHEAD} days ahead"
+        )
+
+    # the user row lock serializes concurrent bookings of one account, so the count holds
+    db.query(User).filter(User.id == current_user.id).with_for_update().first()
+    active = (
+        db.query(SpotReservation)
+        .filter(SpotReservation.user_id == current_user.id, SpotReservation.ends_at > now)
+        .count()
+    )
+    if active >= RESERVATION_MAX_ACTIVE:
+        raise HTTPException(
+            status_code=400, detail=f"No more than {RESERVATION_MAX_ACTIVE} active reservations per user"
+        )
+
+
+@router.get("/availability", response_model=List[ParkingSpotResponse])
+async def get_free_spots(
+    zone_id: UUID,
+    start: datetime,
+    end: datetime,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Spots of the zone that have no reservation overlapping [start, end)"""
+    start, end = to_local(start), to_local(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="End must be after start")
+
+    busy = reservations.index.reserved_in_zone(db, zone_id, start, end)
+    stmt = read_repo.select_for(ParkingSpot, ParkingSpotResponse).where(
+        ParkingSpot.zone_id == zone_id,
+        ParkingSpot.is_active == True,  # noqa: E712
+        ParkingSpot.is_reserved == False,  # noqa: E712
+    )
+    if busy:
+        stmt = stmt.where(ParkingSpot.id.notin_(busy))
+    return read_repo.list_response(db, ParkingSpotResponse, stmt.order_by(ParkingSpot.spot_number))
+
+
+@router.post("", response_model=SpotReservationResponse, status_code=status.HTTP_201_CREATED)
+async def create_reservation(
+    payload: SpotReservationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    starts_at, ends_at = to_local(payload.starts_at), to_local(payload.ends_at)
+    if ends_at <= starts_at:
+        raise HTTPException(status_code=400, detail="End must be after start")
+
+    spot = db.query(ParkingSpot).filter(ParkingSpot.id == payload.spot_id).first()
+    if not spot or not spot.is_active:
+        raise HTTPException(status_code=404, detail="Parking spot not found")
+    if spot.is_reserved:
+        raise HTTPException(status_code=400, detail="Parking spot is permanently reserved")
+
+    if not is_admin(current_user):
+        check_user_limits(db, current_user, starts_at, ends_at)
+
+    if payload.car_id is not None:
+        car = db.query(Car).filter(Car.id == payload.car_id).first()
+        if not car:
+            raise HTTPException(status_code=404, detail="Car not found")
+        if car.user_id != current_user.id and not is_admin(current_user):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed for this car")
+    elif not is_admin(current_user):
+        raise HTTPException(status_code=400, detail="car_id is required")
+
+    if reservations.index.has_conflict(db, payload.spot_id, starts_at, ends_at):
+        raise HTTPException(status_code=400, detail="Spot is already reserved for this period")
+
+    obj = SpotReservation(
+        spot_id=payload.spot_id,
+        car_id=payload.car_id,
+        user_id=current_user.id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        comment=payload.comment,
+    )
+    db.add(obj)
+    try:
+        db.flush()
+    except IntegrityError:
+        # reservation_no_overlap caught a concurrent booking the local index did not know about
+        db.rollback()
+        reservations.index.invalidate()
+        raise HTTPException(status_code=400, detail="Spot is already reserved for this period")
+
+    log_audit(
+        db,
+        current_user.id,
+        obj.id,
+        "create",
+        {"spot_id": str(obj.spot_id), "starts_at": starts_at.isoformat(), "ends_at": ends_at.isoformat()},
+    )
+    db.commit()
+    db.refresh(obj)
+
+    reservations.remember(obj)
+    return obj
+
+
+@router.get("", response_model=List[SpotReservationResponse])
+async def list_reservations(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    stmt = read_repo.select_for(SpotReservation, SpotReservationResponse)
+    if not is_admin(current_user):
+        stmt = stmt.where(SpotReservation.user_id == current_user.id)
+    return read_repo.list_response(db, SpotReservationResponse, stmt.order_by(SpotReservation.starts_at))
+
+
+@router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_reservation(
+    reservation_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    q = db.query(SpotReservation).filter(SpotReservation.id == reservation_id)
+    if not is_admin(current_user):
+        q = q.filter(SpotReservation.user_id == current_user.id)
+    obj = q.first()
+    if not obj:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+
+    db.delete(obj)
+    log_audit(db, current_user.id, reservation_id, "delete", {"spot_id": str(obj.spot_id)})
+    db.commit()
+    reservations.forget(obj)
+    return None
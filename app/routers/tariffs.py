@@ -1,13 +1,15 @@
+from datetime import datetime, timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app import pricing, reference_data, tariff_simulation
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
 from app.models import Tariff, AuditLog, User
-from app.schemas import TariffCreate, TariffUpdate, TariffResponse
+from app.schemas import TariffCreate, TariffUpdate, TariffResponse, TariffSimulationRequest
 
 router = APIRouter()
 
@@ -37,6 +39,11 @@ async def create_tariff(
         name=payload.name,
         price_per_hour=payload.price_per_hour,
         free_minutes=payload.free_minutes,
+        night_price_per_hour=payload.night_price_per_hour,
+        night_start=payload.night_start,
+        night_end=payload.night_end,
+        weekend_price_per_hour=payload.weekend_price_per_hour,
+        daily_cap=payload.daily_cap,
         zone_id=payload.zone_id,
         access_level_id=payload.access_level_id,
     )
@@ -47,20 +54,42 @@ async def create_tariff(
     log_audit(db, admin.id, obj.id, "create", {"name": obj.name})
     db.commit()
     db.refresh(obj)
+    reference_data.invalidate("tariffs")
     return obj
 
 
+@router.post("/simulate", response_model=dict)
+async def simulate_tariffs(
+    payload: TariffSimulationRequest,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """Re-price completed sessions under candidate tariffs and return revenue deltas by zone and day"""
+    end_date = payload.end_date or datetime.now()
+    start_date = payload.start_date or end_date - timedelta(days=365)
+
+    cols = tariff_simulation.load_completed_sessions(db, start_date, end_date)
+    current = tariff_simulation.load_current_tariffs(db)
+    return tariff_simulation.simulate(cols, current, [s.model_dump() for s in payload.scenarios])
+
+
 @router.get("/{tariff_id}", response_model=TariffResponse)
-async def get_tariff(tariff_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    obj = db.query(Tariff).filter(Tariff.id == tariff_id).first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="Tariff not found")
-    return obj
+async def get_tariff(
+    tariff_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.item_response(request, db, "tariffs", tariff_id)
 
 
 @router.get("", response_model=List[TariffResponse])
-async def list_tariffs(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(Tariff).all()
+async def list_tariffs(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return reference_data.list_response(request, db, "tariffs")
 
 
 @router.put("/{tariff_id}", response_model=TariffResponse)
@@ -83,6 +112,10 @@ async def update_tariff(
         obj.price_per_hour = payload.price_per_hour
     if payload.free_minutes is not None:
         obj.free_minutes = payload.free_minutes
+    # schedule fields are optional: an explicit null switches the rate or the cap off
+    for field in ("night_price_per_hour", "night_start", "night_end", "weekend_price_per_hour", "daily_cap"):
+        if field in payload.model_fields_set:
+            setattr(obj, field, getattr(payload, field))
     if payload.zone_id is not None:
         obj.zone_id = payload.zone_id
     if payload.access_level_id is not None:
@@ -100,7 +133,9 @@ async def update_tariff(
         },
     )
     db.commit()
+    pricing.invalidate_tariff(obj.id)
     db.refresh(obj)
+    reference_data.invalidate("tariffs")
     return obj
 
 
@@ -117,4 +152,6 @@ async def delete_tariff(
     db.delete(obj)
     log_audit(db, admin.id, tariff_id, "delete", {"name": obj.name})
     db.commit()
+    pricing.invalidate_tariff(tariff_id)
+    reference_data.invalidate("tariffs")
     return None
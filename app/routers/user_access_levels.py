@@ -3,6 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app import read_repo
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
@@ -65,7 +66,7 @@ async def get_user_access_level(ua_id: str, db: Session = Depends(get_db), curre
 
 @router.get("", response_model=List[UserAccessLevelResponse])
 async def list_user_access_levels(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(UserAccessLevel).all()
+    return read_repo.list_response(db, UserAccessLevelResponse, read_repo.select_for(UserAccessLevel, UserAccessLevelResponse))
 
 
 @router.put("/{ua_id}", response_model=UserAccessLevelResponse)
@@ -4,9 +4,10 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app import denial_cache
 from app.auth import get_current_user
 from app.database import get_db
-from app.models import AuditLog, Wallet, WalletTransaction, User
+from app.models import AuditLog, Car, Wallet, WalletTransaction, User
 from app.schemas import WalletResponse, WalletTopup
 
 router = APIRouter()
@@ -61,6 +62,10 @@ async def topup_wallet(
     db.commit()
     db.refresh(wallet)
 
+    # cars denied for low balance may enter right away
+    for (plate_number,) in db.query(Car.plate_number).filter(Car.user_id == current_user.id):
+        denial_cache.cache.forget_plate(plate_number)
+
     return {
         "message": "Wallet topped up successfully",
         "new_balance": float(wallet.balance),
@@ -3,6 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app import read_repo
 from app.auth import get_current_user
 from app.deps import require_admin
 from app.database import get_db
@@ -71,10 +72,10 @@ async def list_wallet_transactions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    q = db.query(WalletTransaction).join(Wallet)
+    stmt = read_repo.select_for(WalletTransaction, WalletTransactionResponse)
     if not isinstance(current_user, User) or current_user.phone != "000":
-        q = q.filter(Wallet.user_id == current_user.id)
-    return q.all()
+        stmt = stmt.join(Wallet, Wallet.id == WalletTransaction.wallet_id).where(Wallet.user_id == current_user.id)
+    return read_repo.list_response(db, WalletTransactionResponse, stmt)
 
 
 @router.put("/{tx_id}", response_model=WalletTransactionResponse)
@@ -0,0 +1,293 @@
+"""
+On-demand statistical profiler for single requests.
+
+A profiled request gets a sampler thread that every PROFILE_INTERVAL_MS reads
+the event loop thread's stack (sys._current_frames) while the request's task
+is the one running on the loop. The endpoints are `async def`, so ORM work,
+serialization, bcrypt and blocking DB calls all run there. A statement
+waiting in the driver gets a "[db] <VERB>" leaf (set by engine cursor
+events). Samples taken while the task is suspended are attributed to
+"[await]" (loop idle, threadpool) or "[other task]" (the loop was busy with
+another request), so the total is wall-clock time.
+
+Output is the folded-stacks format ("frame;frame;frame count" per line)
+read by flamegraph.pl, speedscope and inferno. Files go to PROFILE_DIR, which
+keeps at most PROFILE_MAX_FILES profiles (oldest removed first).
+
+A request is profiled when:
+  - it falls into the random PROFILE_SAMPLE_RATE fraction (0 by default);
+  - an admin armed the next N requests of a path prefix (POST /api/admin/profiles/arm);
+  - it carries `X-Profile: 1` together with the admin's bearer token.
+The response then names the file in the X-Profile header.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.auth import decode_token
+from app.database import SessionLocal
+from app.deps import ADMIN_PHONE
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/parking-profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+HEADER = "X-Profile"
+SUFFIX = ".folded"
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# thread id -> statement verb, only maintained while something is being profiled
+_in_db: Dict[int, str] = {}
+_active = 0
+_active_lock = threading.Lock()
+_files_lock = threading.Lock()
+_ids = itertools.count(1)
+
+# path prefix -> number of requests still to profile
+_armed: Dict[str, int] = {}
+_armed_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active:
+        verb = statement.lstrip()[:7].split(None, 1)
+        _in_db[threading.get_ident()] = verb[0].upper() if verb else "SQL"
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active:
+        _in_db.pop(threading.get_ident(), None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT_DIR):
+        filename = os.path.relpath(filename, _ROOT_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _stack(frame) -> List[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+class Sampler:
+    def __init__(self, root: str, loop: asyncio.AbstractEventLoop, task: asyncio.Task):
+        self.root = root
+        self.loop = loop
+        self.task = task
+        self.thread_id = threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self) -> None:
+        global _active
+        with _active_lock:
+            _active += 1
+        self._thread.start()
+
+    def stop(self) -> None:
+        global _active
+        self._stop.set()
+        self._thread.join()
+        with _active_lock:
+            _active -= 1
+
+    def _run(self) -> None:
+        interval = PROFILE_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            running = asyncio.current_task(self.loop)
+            if running is not self.task:
+                self.samples["[other task]" if running is not None else "[await]"] += 1
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = _stack(frame)
+            verb = _in_db.get(self.thread_id)
+            if verb is not None:
+                stack.append(f"[db] {verb}")
+            self.samples[";".join(stack)] += 1
+
+    def folded(self) -> str:
+        root = self.root.replace(";", ",")
+        return "".join(f"{root};{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _write(name: str, body: str) -> None:
+    with _files_lock:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, name), "w") as f:
+            f.write(body)
+        names = sorted(n for n in os.listdir(PROFILE_DIR) if n.endswith(SUFFIX))
+        for old in names[:-PROFILE_MAX_FILES] if len(names) > PROFILE_MAX_FILES else []:
+            os.remove(os.path.join(PROFILE_DIR, old))
+
+
+def list_profiles() -> List[dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    result = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if name.endswith(SUFFIX):
+            path = os.path.join(PROFILE_DIR, name)
+            result.append({"name": name, "size": os.path.getsize(path)})
+    return result
+
+
+def read_profile(name: str) -> Optional[str]:
+    if os.path.basename(name) != name or not name.endswith(SUFFIX):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def arm(path_prefix: str, count: int) -> None:
+    with _armed_lock:
+        _armed[path_prefix] = count
+
+
+def armed() -> Dict[str, int]:
+    with _armed_lock:
+        return dict(_armed)
+
+
+def _take_armed(path: str) -> bool:
+    with _armed_lock:
+        for prefix, remaining in _armed.items():
+            if path.startswith(prefix):
+                if remaining <= 1:
+                    del _armed[prefix]
+                else:
+                    _armed[prefix] = remaining - 1
+                return True
+    return False
+
+
+# token subject -> (is admin, monotonic expiry); negative answers are cached too
+ADMIN_CACHE_TTL = float(os.getenv("PROFILE_ADMIN_CACHE_TTL", "60"))
+_admin_cache: Dict[str, Tuple[bool, float]] = {}
+
+
+def _lookup_admin(subject: str) -> bool:
+    """The checks of get_current_user + require_admin"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == subject).first()
+    finally:
+        db.close()
+    return user is not None and not user.is_blocked and user.phone == ADMIN_PHONE
+
+
+async def _is_admin_token(scope) -> bool:
+    """Bearer token of a non-blocked admin; the user lookup runs in the threadpool, off the event loop"""
+    headers = dict(scope.get("headers", []))
+    authorization = headers.get(b"authorization", b"").decode()
+    if not authorization.lower().startswith("bearer "):
+        return False
+
+    try:
+        subject = str(decode_token(authorization[7:]).get("sub"))
+    except Exception:
+        return False
+    now = time.monotonic()
+    cached = _admin_cache.get(subject)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    try:
+        is_admin = await run_in_threadpool(_lookup_admin, subject)
+    except Exception:
+        logger.exception("Could not check the profiling token")
+        is_admin = False
+    if len(_admin_cache) > 1000:
+        _admin_cache.clear()
+    _admin_cache[subject] = (is_admin, now + ADMIN_CACHE_TTL)
+    return is_admin
+
+
+async def _wanted(scope) -> bool:
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return True
+    if _armed and _take_armed(scope["path"]):
+        return True
+    for key, value in scope.get("headers", []):
+        if key == b"x-profile" and value == b"1":
+            return await _is_admin_token(scope)
+    return False
+
+
+class SamplingProfilerMiddleware:
+    """Pure ASGI middleware; costs one dict lookup per request unless the request is profiled"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await _wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{datetime.now():%Y%m%dT%H%M%S}-{next(_ids):05d}-{scope['method']}{_SAFE.sub('_', scope['path'])}{SUFFIX}"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((HEADER.lower().encode(), name.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        sampler = Sampler(f"{scope['method']} {scope['path']}", asyncio.get_running_loop(), asyncio.current_task())
+        sampler.start()
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # joining the sampler thread and writing the file block, keep them off the event loop
+            await run_in_threadpool(sampler.stop)
+            # the route template is known once routing has run
+            route = scope.get("route")
+            if route is not None:
+                sampler.root = f"{scope['method']} {route.path}"
+            elapsed_ms = (time.perf_counter() - began) * 1000
+            try:
+                await run_in_threadpool(_write, name, sampler.folded())
+            except OSError:
+                logger.exception("Could not write profile %s", name)
+            else:
+                logger.info("Profiled %s %s in %.1f ms: %s", scope["method"], scope["path"], elapsed_ms, name)
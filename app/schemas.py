@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, time
 from decimal import Decimal
 from uuid import UUID
 from enum import Enum
@@ -200,10 +200,37 @@ class ParkingSpotResponse(ParkingSpotBase):
         from_attributes = True
 
 
+class SpotReservationCreate(BaseModel):
+    spot_id: UUID
+    car_id: Optional[UUID] = None
+    starts_at: datetime
+    ends_at: datetime
+    comment: Optional[str] = None
+
+
+class SpotReservationResponse(BaseModel):
+    id: UUID
+    spot_id: UUID
+    car_id: Optional[UUID]
+    user_id: Optional[UUID]
+    starts_at: datetime
+    ends_at: datetime
+    comment: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class TariffBase(BaseModel):
     name: str
     price_per_hour: Decimal
     free_minutes: int = 0
+    night_price_per_hour: Optional[Decimal] = None
+    night_start: Optional[time] = None
+    night_end: Optional[time] = None
+    weekend_price_per_hour: Optional[Decimal] = None
+    daily_cap: Optional[Decimal] = None
     zone_id: Optional[UUID] = None
     access_level_id: Optional[UUID] = None
 
@@ -216,6 +243,11 @@ class TariffUpdate(BaseModel):
     name: Optional[str] = None
     price_per_hour: Optional[Decimal] = None
     free_minutes: Optional[int] = None
+    night_price_per_hour: Optional[Decimal] = None
+    night_start: Optional[time] = None
+    night_end: Optional[time] = None
+    weekend_price_per_hour: Optional[Decimal] = None
+    daily_cap: Optional[Decimal] = None
     zone_id: Optional[UUID] = None
     access_level_id: Optional[UUID] = None
 
@@ -227,6 +259,23 @@ class TariffResponse(TariffBase):
         from_attributes = True
 
 
+class TariffOverride(BaseModel):
+    tariff_id: UUID
+    price_per_hour: Optional[Decimal] = None
+    free_minutes: Optional[int] = None
+
+
+class TariffScenario(BaseModel):
+    name: str
+    overrides: List[TariffOverride] = []
+
+
+class TariffSimulationRequest(BaseModel):
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    scenarios: List[TariffScenario]
+
+
 class GateTypeEnum(str, Enum):
     entry = "entry"
     exit = "exit"
@@ -300,6 +349,32 @@ class ParkingSessionResponse(BaseModel):
         from_attributes = True
 
 
+class ParkingSessionDetailResponse(BaseModel):
+    id: UUID
+    car_id: UUID
+    plate_number: str
+    tariff_id: UUID
+    tariff_name: str
+    spot_id: Optional[UUID]
+    spot_number: Optional[str]
+    zone_id: Optional[UUID]
+    zone_name: Optional[str]
+    entry_time: datetime
+    exit_time: Optional[datetime]
+    total_cost: Optional[Decimal]
+    status: str
+
+
+class ParkingQuoteResponse(BaseModel):
+    session_id: UUID
+    plate_number: str
+    tariff_id: UUID
+    entry_time: datetime
+    quoted_at: datetime
+    duration_minutes: int
+    cost: Decimal
+
+
 class OperationTypeEnum(str, Enum):
     topup = "topup"
     parking_charge = "parking_charge"
@@ -365,6 +440,10 @@ class EntryLogResponse(BaseModel):
     attempt_time: datetime
     result: str
     reason: Optional[str]
+    attempt_count: int = 1
+    last_attempt_time: Optional[datetime] = None
+    car_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,269 @@
+"""
+Automatic parking spot assignment.
+
+By default allocation happens in the database: the first free spot is
+locked with `FOR UPDATE SKIP LOCKED`, so concurrent gates in any number of
+workers skip each other's picks. The lock does not cover a session committed
+just before the scan reaches the spot, so the unique partial index on
+active sessions' spot_id is the final guard: the entry retries with the next
+free spot on that violation (see is_spot_conflict).
+
+A deployment known to run a single worker can opt in to SPOT_ALLOCATOR=memory:
+free spots are then tracked per zone as a bitset (a Python int, bit i set =
+spot i free), so picking the lowest free spot and releasing it are
+constant-time bit operations. The state is rebuilt from `parking_spots` and
+active sessions at startup. It is not shared between processes, so it must
+not be enabled under `uvicorn --workers N` or gunicorn.
+
+Spots with a reservation covering the current moment are never handed out
+to other cars.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import reservations
+from app.models import ParkingSession, ParkingSpot
+
+
+# "memory" is only safe with a single worker process
+SPOT_ALLOCATOR = os.getenv("SPOT_ALLOCATOR", "db")
+# how many other spots an entry tries after losing its pick to a concurrent gate
+SPOT_CONFLICT_RETRIES = int(os.getenv("SPOT_CONFLICT_RETRIES", "3"))
+ACTIVE_SPOT_INDEX = "uq_parking_sessions_active_spot"
+
+
+class ZoneSpots:
+    def __init__(self, spot_ids: List[str]):
+        self.spot_ids = spot_ids
+        self.index = {spot_id: i for i, spot_id in enumerate(spot_ids)}
+        self.free = (1 << len(spot_ids)) - 1
+
+    def take(self, blocked: int = 0) -> Optional[str]:
+        candidates = self.free & ~blocked
+        if not candidates:
+            return None
+        lowest = candidates & -candidates
+        self.free ^= lowest
+        return self.spot_ids[lowest.bit_length() - 1]
+
+    def mask(self, spot_ids) -> int:
+        result = 0
+        for spot_id in spot_ids:
+            i = self.index.get(spot_id)
+            if i is not None:
+                result |= 1 << i
+        return result
+
+    def take_spot(self, spot_id: str) -> bool:
+        i = self.index.get(spot_id)
+        if i is None or not self.free >> i & 1:
+            return False
+        self.free &= ~(1 << i)
+        return True
+
+    def mark_taken(self, spot_id: str) -> None:
+        i = self.index.get(spot_id)
+        if i is not None:
+            self.free &= ~(1 << i)
+
+    def release(self, spot_id: str) -> None:
+        i = self.index.get(spot_id)
+        if i is not None:
+            self.free |= 1 << i
+
+    @property
+    def free_count(self) -> int:
+        return bin(self.free).count("1")
+
+
+class SpotAllocator:
+    def __init__(self):
+        self._zones: Dict[str, ZoneSpots] = {}
+        self._zone_of_spot: Dict[str, str] = {}
+        # spots handed out whose session is not committed yet: a rebuild cannot see them
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._dirty = True
+
+    def rebuild(self, db: Session) -> None:
+        with self._lock:
+            self._rebuild(db)
+
+    def _rebuild(self, db: Session) -> None:
+        """Load usable spots and mark the ones held by active or pending sessions as taken; caller holds the lock"""
+        spots = (
+            db.query(ParkingSpot.id, ParkingSpot.zone_id)
+            .filter(ParkingSpot.is_active == True, ParkingSpot.is_reserved == False)  # noqa: E712
+            .order_by(ParkingSpot.zone_id, ParkingSpot.spot_number)
+            .all()
+        )
+        occupied = (
+            db.query(ParkingSession.spot_id)
+            .filter(ParkingSession.status == "active", ParkingSession.spot_id.isnot(None))
+            .all()
+        )
+
+        by_zone: Dict[str, List[str]] = {}
+        for spot_id, zone_id in spots:
+            by_zone.setdefault(str(zone_id), []).append(str(spot_id))
+
+        zones = {zone_id: ZoneSpots(ids) for zone_id, ids in by_zone.items()}
+        zone_of_spot = {spot_id: zone_id for zone_id, ids in by_zone.items() for spot_id in ids}
+        for spot_id in [str(row[0]) for row in occupied] + list(self._pending):
+            zone_id = zone_of_spot.get(spot_id)
+            if zone_id is not None:
+                zones[zone_id].mark_taken(spot_id)
+
+        self._zones = zones
+        self._zone_of_spot = zone_of_spot
+        self._dirty = False
+
+    def invalidate(self) -> None:
+        """Schedule a rebuild before the next allocation (spots or sessions changed out of band)"""
+        self._dirty = True
+
+    def allocate(self, db: Session, zone_id=None, blocked: Set[str] = frozenset()) -> Optional[str]:
+        with self._lock:
+            # rebuilt under the lock so that no spot is taken between the read and the swap
+            if self._dirty:
+                self._rebuild(db)
+            if zone_id is not None:
+                zone = self._zones.get(str(zone_id))
+                zones = [zone] if zone else []
+            else:
+                zones = list(self._zones.values())
+            for zone in zones:
+                spot_id = zone.take(zone.mask(blocked))
+                if spot_id is not None:
+                    self._pending.add(spot_id)
+                    return spot_id
+        return None
+
+    def claim(self, db: Session, spot_id) -> bool:
+        """Take a specific spot; False if it is occupied or not allocatable"""
+        key = str(spot_id)
+        with self._lock:
+            if self._dirty:
+                self._rebuild(db)
+            zone_id = self._zone_of_spot.get(key)
+            if zone_id is None or not self._zones[zone_id].take_spot(key):
+                return False
+            self._pending.add(key)
+            return True
+
+    def settle(self, spot_id) -> None:
+        """The session holding the spot is committed, a rebuild will now see it"""
+        if spot_id is None:
+            return
+        with self._lock:
+            self._pending.discard(str(spot_id))
+
+    def release(self, spot_id) -> None:
+        if spot_id is None:
+            return
+        key = str(spot_id)
+        with self._lock:
+            self._pending.discard(key)
+            zone_id = self._zone_of_spot.get(key)
+            if zone_id is not None:
+                self._zones[zone_id].release(key)
+
+    def free_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {zone_id: zone.free_count for zone_id, zone in self._zones.items()}
+
+
+allocator = SpotAllocator()
+
+
+def _allocate_in_db(db: Session, zone_id=None) -> Optional[str]:
+    row = db.execute(
+        text("""
+            SELECT ps.id
+            FROM parking_spots ps
+            WHERE ps.is_active = TRUE
+              AND ps.is_reserved = FALSE
+              AND (CAST(:zone_id AS UUID) IS NULL OR ps.zone_id = CAST(:zone_id AS UUID))
+              AND NOT EXISTS (
+                  SELECT 1 FROM parking_sessions s
+                  WHERE s.spot_id = ps.id AND s.status = 'active'
+              )
+              AND NOT EXISTS (
+                  SELECT 1 FROM spot_reservations r
+                  WHERE r.spot_id = ps.id AND tsrange(r.starts_at, r.ends_at) @> LOCALTIMESTAMP
+              )
+            ORDER BY ps.zone_id, ps.spot_number
+            LIMIT 1
+            FOR UPDATE OF ps SKIP LOCKED
+        """),
+        {"zone_id": str(zone_id) if zone_id else None},
+    ).fetchone()
+    return str(row[0]) if row else None
+
+
+def _claim_in_db(db: Session, spot_id) -> bool:
+    row = db.execute(
+        text("""
+            SELECT ps.id
+            FROM parking_spots ps
+            WHERE ps.id = CAST(:spot_id AS UUID)
+              AND ps.is_active = TRUE
+              AND NOT EXISTS (
+                  SELECT 1 FROM parking_sessions s
+                  WHERE s.spot_id = ps.id AND s.status = 'active'
+              )
+            FOR UPDATE OF ps SKIP LOCKED
+        """),
+        {"spot_id": str(spot_id)},
+    ).fetchone()
+    return row is not None
+
+
+def is_spot_conflict(exc: IntegrityError) -> bool:
+    """The insert lost the spot to a session committed by another gate"""
+    diag = getattr(exc.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == ACTIVE_SPOT_INDEX
+
+
+def allocate_spot(db: Session, zone_id=None) -> Optional[str]:
+    """Pick a free, currently unreserved spot (in the tariff's zone if given); None when the parking is full"""
+    if SPOT_ALLOCATOR == "db":
+        return _allocate_in_db(db, zone_id)
+    blocked = reservations.index.reserved_spot_ids(db, datetime.now())
+    return allocator.allocate(db, zone_id, blocked)
+
+
+def claim_spot(db: Session, spot_id) -> bool:
+    """Take a specific spot (e.g. a reserved one); False when a session already occupies it"""
+    if SPOT_ALLOCATOR == "db":
+        return _claim_in_db(db, spot_id)
+    return allocator.claim(db, spot_id)
+
+
+def settle_spot(spot_id) -> None:
+    """Call once the session holding the spot is committed"""
+    if SPOT_ALLOCATOR == "db":
+        return
+    allocator.settle(spot_id)
+
+
+def release_spot(spot_id) -> None:
+    if SPOT_ALLOCATOR == "db":
+        return
+    allocator.release(spot_id)
+
+
+def invalidate() -> None:
+    allocator.invalidate()
+
+
+def startup(db: Session) -> None:
+    if SPOT_ALLOCATOR == "memory":
+        allocator.rebuild(db)
@@ -0,0 +1,217 @@
+"""
+Opt-in per-request SQL profiler (SQL_PROFILER=on; off by default).
+
+For every HTTP request it records each statement the request sent to the
+database: normalized text, duration, the shape of the parameters (names and
+types, never values) and the first frame in the application code that issued
+it. After the request:
+
+- statements slower than SQL_PROFILER_SLOW_MS are logged;
+- statement shapes executed SQL_PROFILER_REPEAT or more times within the
+  request are flagged (the usual N+1 pattern) and logged;
+- the profile is kept in a ring of the last SQL_PROFILER_KEEP requests,
+  readable through GET /api/admin/sql-profiles[/{id}];
+- the response carries X-SQL-Profile: <id>; queries=..; time_ms=..; repeated=..
+
+Walking the stack for every statement costs a few microseconds, which is why
+this is not part of the always-on metrics.
+"""
+
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("SQL_PROFILER", "off") == "on"
+SLOW_MS = float(os.getenv("SQL_PROFILER_SLOW_MS", "100"))
+REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILER_REPEAT", "3"))
+KEEP = int(os.getenv("SQL_PROFILER_KEEP", "200"))
+
+HEADER = "X-SQL-Profile"
+# reading the profiles should not push them out of the ring
+_UNPROFILED_PREFIXES = ("/api/admin/sql-profiles", "/metrics")
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_ROOT_DIR = os.path.dirname(_APP_DIR)
+_SKIP_FILES = {os.path.join(_APP_DIR, name) for name in ("sql_profiler.py", "metrics.py", "database.py")}
+
+# expanded IN lists: "IN (%(id_1_1)s, %(id_1_2)s, ...)" -> "IN (...)"
+_IN_LIST = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def _shape(statement: str) -> str:
+    return _IN_LIST.sub("(...)", _SPACES.sub(" ", statement).strip())
+
+
+def _param_shape(parameters, executemany: bool):
+    if executemany and parameters:
+        return {"rows": len(parameters), "row": _param_shape(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _origin() -> Optional[str]:
+    """First frame of the application code (outside this module) that led to the statement"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename not in _SKIP_FILES:
+            return f"{os.path.relpath(filename, _ROOT_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class Profile:
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self.duration_ms = 0.0
+        self.status: Optional[int] = None
+        self.statements: List[dict] = []
+
+    @property
+    def db_time_ms(self) -> float:
+        return round(sum(s["duration_ms"] for s in self.statements), 3)
+
+    def repeated(self) -> Dict[str, int]:
+        counts = Counter(s["statement"] for s in self.statements)
+        return {statement: count for statement, count in counts.items() if count >= REPEAT_THRESHOLD}
+
+    def header(self) -> str:
+        return f"{self.id}; queries={len(self.statements)}; time_ms={self.db_time_ms}; repeated={len(self.repeated())}"
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "queries": len(self.statements),
+            "db_time_ms": self.db_time_ms,
+            "repeated": len(self.repeated()),
+            "slow": sum(1 for s in self.statements if s["duration_ms"] >= SLOW_MS),
+        }
+
+    def detail(self) -> dict:
+        result = self.summary()
+        result["statements"] = self.statements
+        result["repeated_statements"] = [
+            {"statement": statement, "count": count} for statement, count in self.repeated().items()
+        ]
+        return result
+
+
+_current: ContextVar[Optional[Profile]] = ContextVar("sql_profile", default=None)
+_ids = itertools.count(1)
+_profiles: "OrderedDict[int, Profile]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["profiler_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.pop("profiler_started", None)
+    if profile is None or started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    profile.statements.append(
+        {
+            "statement": _shape(statement),
+            "duration_ms": round(duration_ms, 3),
+            "parameters": _param_shape(parameters, executemany),
+            "origin": _origin(),
+        }
+    )
+
+
+def instrument_engine(engine: Engine) -> None:
+    if ENABLED:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _finish(profile: Profile) -> None:
+    for s in profile.statements:
+        if s["duration_ms"] >= SLOW_MS:
+            logger.warning(
+                "Slow SQL %.1f ms in %s %s at %s: %s",
+                s["duration_ms"], profile.method, profile.path, s["origin"], s["statement"],
+            )
+    for statement, count in profile.repeated().items():
+        origins = sorted({s["origin"] or "?" for s in profile.statements if s["statement"] == statement})
+        logger.warning(
+            "Repeated SQL (%dx, possible N+1) in %s %s at %s: %s",
+            count, profile.method, profile.path, ", ".join(origins), statement,
+        )
+
+    with _lock:
+        _profiles[profile.id] = profile
+        while len(_profiles) > KEEP:
+            _profiles.popitem(last=False)
+
+
+def recent(limit: int = 50) -> List[dict]:
+    with _lock:
+        profiles = list(_profiles.values())[-limit:]
+    return [profile.summary() for profile in reversed(profiles)]
+
+
+def get(profile_id: int) -> Optional[dict]:
+    with _lock:
+        profile = _profiles.get(profile_id)
+    return profile.detail() if profile is not None else None
+
+
+class SQLProfilerMiddleware:
+    """Pure ASGI middleware; add it only when ENABLED"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(_UNPROFILED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(next(_ids), scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((HEADER.lower().encode(), profile.header().encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            _finish(profile)
@@ -0,0 +1,62 @@
+"""
+Application startup: schema preparation and timing of startup phases.
+
+SCHEMA_INIT selects what happens to the schema when a worker starts:
+  check      - read schema_version and refuse to start on a mismatch
+               (one tiny query; the schema itself comes from init.sql and
+               database/migrations)
+  create_all - the old behavior, SQLAlchemy create_all(); reflects every
+               table and is noticeably slower
+  skip       - nothing, for deployments that verify the schema elsewhere
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+
+logger = logging.getLogger(__name__)
+
+# bump together with a new file in database/migrations
+SCHEMA_VERSION = 15
+SCHEMA_INIT = os.getenv("SCHEMA_INIT", "check")
+
+
+class StartupTimer:
+    def __init__(self, started: float):
+        self.started = started
+        self.timings: Dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        """Record the time elapsed since the process started importing the app"""
+        self.timings[name] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - began) * 1000, 1)
+
+    def report(self) -> None:
+        logger.info("Startup timings (ms): %s", ", ".join(f"{k}={v}" for k, v in self.timings.items()))
+
+
+def prepare_schema(engine: Engine) -> None:
+    if SCHEMA_INIT == "create_all":
+        Base.metadata.create_all(bind=engine)
+    elif SCHEMA_INIT == "check":
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+        if version != SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Database schema version is {version}, the application needs {SCHEMA_VERSION}: "
+                "apply the scripts from database/migrations"
+            )
@@ -0,0 +1,191 @@
+"""
+What-if simulation of tariff changes over completed parking sessions.
+
+Sessions are loaded once into columnar numpy arrays and re-priced with the
+tariff engine (`pricing.CompiledTariff.cost_kopecks`, the full schedule with
+night and weekend rates and the daily cap) one tariff at a time, so a year of
+history is evaluated in a few vectorized passes instead of row by row.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import pricing
+from app.models import Tariff
+
+# tariff columns a scenario may change
+OVERRIDE_FIELDS = ("price_per_hour", "free_minutes")
+
+
+@dataclass
+class SessionColumns:
+    tariff_codes: np.ndarray  # int32, index into tariff_ids
+    zone_codes: np.ndarray  # int32, index into zone_ids
+    day_codes: np.ndarray  # int32, index into days
+    entry_minutes: np.ndarray  # int64, minutes since the pricing schedule epoch
+    duration_minutes: np.ndarray  # int64, rounded like the SQL function does
+    actual_cost_kop: np.ndarray  # int64, stored total_cost in kopecks
+    tariff_ids: List[str]
+    zone_ids: List[Optional[str]]
+    zone_names: List[Optional[str]]
+    days: List[date]
+
+    def __len__(self) -> int:
+        return len(self.duration_minutes)
+
+
+def load_completed_sessions(db: Session, start_date: datetime, end_date: datetime) -> SessionColumns:
+    """Load completed sessions into columnar arrays (zone is taken from the spot, as in revenue_analytics)"""
+    rows = db.execute(
+        text("""
+            SELECT
+                ps.tariff_id::text,
+                pspot.zone_id::text,
+                z.name,
+                DATE(ps.entry_time),
+                EXTRACT(EPOCH FROM (ps.exit_time - ps.entry_time)),
+                ps.entry_time,
+                COALESCE(ps.total_cost, 0)
+            FROM parking_sessions ps
+            LEFT JOIN parking_spots pspot ON pspot.id = ps.spot_id
+            LEFT JOIN parking_zones z ON z.id = pspot.zone_id
+            WHERE ps.status = 'completed'
+              AND ps.exit_time IS NOT NULL
+              AND ps.entry_time >= :start_date AND ps.entry_time < :end_date
+        """),
+        {"start_date": start_date, "end_date": end_date},
+    ).fetchall()
+
+    n = len(rows)
+    tariff_col = np.array([r[0] for r in rows], dtype=object)
+    zone_col = np.array([r[1] or "" for r in rows], dtype=object)
+    day_col = np.array([r[3] for r in rows], dtype="datetime64[D]")
+    seconds = np.fromiter((r[4] for r in rows), dtype=np.float64, count=n)
+    actual = np.fromiter((r[6] for r in rows), dtype=np.float64, count=n)
+    entry_col = np.array([r[5] for r in rows], dtype="datetime64[us]")
+
+    tariff_ids, tariff_codes = np.unique(tariff_col, return_inverse=True)
+    zone_keys, zone_codes = np.unique(zone_col, return_inverse=True)
+    days, day_codes = np.unique(day_col, return_inverse=True)
+
+    zone_names_by_id = {r[1]: r[2] for r in rows if r[1]}
+
+    return SessionColumns(
+        tariff_codes=tariff_codes.astype(np.int32),
+        zone_codes=zone_codes.astype(np.int32),
+        day_codes=day_codes.astype(np.int32),
+        entry_minutes=pricing.entry_minutes(entry_col),
+        # integer assignment in PL/pgSQL rounds half away from zero
+        duration_minutes=np.floor(seconds / 60.0 + 0.5).astype(np.int64),
+        actual_cost_kop=np.rint(actual * 100).astype(np.int64),
+        tariff_ids=[str(t) for t in tariff_ids],
+        zone_ids=[z or None for z in zone_keys],
+        zone_names=[zone_names_by_id.get(z) for z in zone_keys],
+        days=[d.astype(date) for d in days],
+    )
+
+
+def price_sessions(cols: SessionColumns, compiled: List[pricing.CompiledTariff]) -> np.ndarray:
+    """Cost in kopecks per session; `compiled` is indexed by tariff code"""
+    cost = np.zeros(len(cols), dtype=np.int64)
+    for code, tariff in enumerate(compiled):
+        rows = np.flatnonzero(cols.tariff_codes == code)
+        if len(rows):
+            cost[rows] = tariff.cost_kopecks(cols.entry_minutes[rows], cols.duration_minutes[rows])
+    return cost
+
+
+def compile_for(cols: SessionColumns, tariffs: Dict[str, Tariff]) -> List[pricing.CompiledTariff]:
+    """Compiled tariff for every tariff code of the sessions"""
+    missing = [tariff_id for tariff_id in cols.tariff_ids if tariff_id not in tariffs]
+    if missing:
+        # sessions reference tariffs with ON DELETE RESTRICT, so this is a tariff deleted mid-request
+        raise HTTPException(status_code=409, detail=f"Tariff not found: {missing[0]}")
+    return [pricing.compile_tariff(tariffs[tariff_id]) for tariff_id in cols.tariff_ids]
+
+
+def load_current_tariffs(db: Session) -> Dict[str, Tariff]:
+    return {str(t.id): t for t in db.query(Tariff).all()}
+
+
+def _copy_tariff(tariff: Tariff, **changes) -> Tariff:
+    # a transient instance: never added to the session, only compiled
+    fields = {column.name: getattr(tariff, column.name) for column in Tariff.__table__.columns}
+    fields.update(changes)
+    return Tariff(**fields)
+
+
+def apply_overrides(tariffs: Dict[str, Tariff], overrides: List[dict]) -> Dict[str, Tariff]:
+    result = dict(tariffs)
+    for o in overrides:
+        tid = str(o["tariff_id"])
+        if tid not in result:
+            raise HTTPException(status_code=400, detail=f"Unknown tariff in overrides: {tid}")
+        changes = {field: o[field] for field in OVERRIDE_FIELDS if o.get(field) is not None}
+        result[tid] = _copy_tariff(result[tid], **changes)
+    return result
+
+
+def _kop(values: np.ndarray) -> List[float]:
+    return [round(v / 100.0, 2) for v in values.tolist()]
+
+
+def simulate(cols: SessionColumns, tariffs: Dict[str, dict], scenarios: List[dict]) -> dict:
+    """Re-price sessions under each scenario and aggregate revenue deltas by zone and by day"""
+    # overrides are checked before the baseline is computed, so a bad request fails fast
+    scenario_tariffs = [apply_overrides(tariffs, scenario.get("overrides", [])) for scenario in scenarios]
+    baseline = price_sessions(cols, compile_for(cols, tariffs))
+
+    n_zones = len(cols.zone_ids)
+    n_days = len(cols.days)
+    base_by_zone = np.bincount(cols.zone_codes, weights=baseline, minlength=n_zones).astype(np.int64)
+    base_by_day = np.bincount(cols.day_codes, weights=baseline, minlength=n_days).astype(np.int64)
+
+    results = []
+    for scenario, scenario_tariff in zip(scenarios, scenario_tariffs):
+        simulated = price_sessions(cols, compile_for(cols, scenario_tariff))
+        sim_by_zone = np.bincount(cols.zone_codes, weights=simulated, minlength=n_zones).astype(np.int64)
+        sim_by_day = np.bincount(cols.day_codes, weights=simulated, minlength=n_days).astype(np.int64)
+
+        zone_base, zone_sim, zone_delta = _kop(base_by_zone), _kop(sim_by_zone), _kop(sim_by_zone - base_by_zone)
+        day_base, day_sim, day_delta = _kop(base_by_day), _kop(sim_by_day), _kop(sim_by_day - base_by_day)
+
+        results.append(
+            {
+                "name": scenario["name"],
+                "baseline_revenue": round(int(baseline.sum()) / 100.0, 2),
+                "simulated_revenue": round(int(simulated.sum()) / 100.0, 2),
+                "revenue_delta": round(int(simulated.sum() - baseline.sum()) / 100.0, 2),
+                "by_zone": [
+                    {
+                        "zone_id": cols.zone_ids[i],
+                        "zone_name": cols.zone_names[i],
+                        "baseline_revenue": zone_base[i],
+                        "simulated_revenue": zone_sim[i],
+                        "revenue_delta": zone_delta[i],
+                    }
+                    for i in range(n_zones)
+                ],
+                "by_day": [
+                    {
+                        "date": cols.days[i],
+                        "baseline_revenue": day_base[i],
+                        "simulated_revenue": day_sim[i],
+                        "revenue_delta": day_delta[i],
+                    }
+                    for i in range(n_days)
+                ],
+            }
+        )
+
+    return {
+        "sessions_count": len(cols),
+        "actual_revenue": round(int(cols.actual_cost_kop.sum()) / 100.0, 2),
+        "scenarios": results,
+    }
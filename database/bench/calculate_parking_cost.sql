@@ -0,0 +1,4 @@
+-- calculate_parking_cost() для случайного тарифа и длительности до суток
+\set t random(1, 4)
+\set minutes random(1, 1440)
+SELECT calculate_parking_cost(LOCALTIMESTAMP - make_interval(mins => :minutes), LOCALTIMESTAMP, md5('bench-tariff-' || :t)::uuid);
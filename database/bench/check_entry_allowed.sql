@@ -0,0 +1,4 @@
+-- check_entry_allowed() для случайного номера из всех автомобилей
+-- (разрешено, заблокирован, недостаточно средств — в пропорции seed.sql)
+\set n random(1, :cars)
+SELECT * FROM check_entry_allowed('B' || :n, :gate);
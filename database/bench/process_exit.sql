@@ -0,0 +1,7 @@
+-- process_exit() как его вызывает приложение: сессия и стоимость известны, кошелек ищет функция;
+-- транзакция откатывается, чтобы сессия осталась активной для следующих итераций
+\set n random(1, :active_cars)
+\set cost random(0, 50000) / 100.0
+BEGIN;
+SELECT * FROM process_exit(md5('bench-car-' || :n)::uuid, LOCALTIMESTAMP, :cost, md5('bench-active-' || :n)::uuid);
+ROLLBACK;
@@ -0,0 +1,6 @@
+-- process_exit() только по автомобилю: поиск активной сессии и кошелька,
+-- стоимость по calculate_parking_cost(); транзакция откатывается
+\set n random(1, :active_cars)
+BEGIN;
+SELECT * FROM process_exit(md5('bench-car-' || :n)::uuid);
+ROLLBACK;
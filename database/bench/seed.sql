@@ -0,0 +1,66 @@
+-- данные для микробенчмарков функций (scripts/bench_functions.py)
+-- запускается на пустой базе после init.sql:
+--   psql -v sessions=1000000 -f database/bench/seed.sql
+--
+-- идентификаторы детерминированы (md5 от номера), чтобы скрипты pgbench
+-- вычисляли их из случайного номера без лишних запросов:
+--   пользователь, автомобиль, кошелек n:  md5('bench-user-' || n), md5('bench-car-' || n), md5('bench-wallet-' || n)
+--   номер автомобиля n:                   'B' || n
+--   активная сессия автомобиля n:         md5('bench-active-' || n), есть у автомобилей 1 .. :active_cars
+--   тарифы 1..4:                          md5('bench-tariff-' || n)
+-- у каждого пользователя один автомобиль; каждый 50-й пользователь заблокирован,
+-- у каждого 10-го баланс ниже минимального (все ветки check_entry_allowed)
+
+\set ON_ERROR_STOP on
+
+SELECT GREATEST(1000, :sessions / 20) AS cars \gset
+SELECT :cars / 10 AS active_cars \gset
+
+-- без триггеров (кошельки создаются здесь же, уведомления и офлайн-список не нужны)
+-- и без проверки внешних ключей: данные согласованы по построению
+SET session_replication_role = replica;
+
+INSERT INTO tariffs (id, name, price_per_hour, free_minutes)
+SELECT md5('bench-tariff-' || n)::uuid, 'Bench ' || n, 50 * n, 15 * (n - 1)
+FROM generate_series(1, 4) AS n;
+
+INSERT INTO users (id, phone, password_hash, created_at, is_blocked)
+SELECT md5('bench-user-' || n)::uuid, '7' || lpad(n::text, 10, '0'), '$2b$12$bench',
+       LOCALTIMESTAMP - interval '2 years', n % 50 = 0
+FROM generate_series(1, :cars) AS n;
+
+INSERT INTO wallets (id, user_id, balance)
+SELECT md5('bench-wallet-' || n)::uuid, md5('bench-user-' || n)::uuid,
+       CASE WHEN n % 10 = 1 THEN 10 ELSE 100000 END
+FROM generate_series(1, :cars) AS n;
+
+INSERT INTO cars (id, user_id, plate_number, created_at)
+SELECT md5('bench-car-' || n)::uuid, md5('bench-user-' || n)::uuid, 'B' || n, LOCALTIMESTAMP - interval '2 years'
+FROM generate_series(1, :cars) AS n;
+
+-- завершенные сессии за последний год, по возрастанию времени въезда, автомобили по кругу
+INSERT INTO parking_sessions (car_id, tariff_id, entry_time, exit_time, total_cost, status)
+SELECT md5('bench-car-' || (1 + i % :cars))::uuid,
+       md5('bench-tariff-' || (1 + i % 4))::uuid,
+       t,
+       t + make_interval(mins => 15 + (i * 7919) % 600),
+       ((i * 7919) % 600) * 1.5,
+       'completed'
+FROM generate_series(1, :sessions) AS i,
+     LATERAL (SELECT LOCALTIMESTAMP - interval '1 year' + (interval '364 days' * i / :sessions) AS t) AS s;
+
+-- по одному списанию на сессию, как после process_exit()
+INSERT INTO wallet_transactions (wallet_id, session_id, amount, operation_type, created_at, comment)
+SELECT w.id, s.id, -s.total_cost, 'parking_charge', s.exit_time, 'Parking session ' || s.id
+FROM parking_sessions s
+JOIN cars c ON c.id = s.car_id
+JOIN wallets w ON w.user_id = c.user_id;
+
+INSERT INTO parking_sessions (id, car_id, tariff_id, entry_time, status)
+SELECT md5('bench-active-' || n)::uuid, md5('bench-car-' || n)::uuid,
+       md5('bench-tariff-' || (1 + n % 4))::uuid, LOCALTIMESTAMP - make_interval(mins => 30 + n % 600), 'active'
+FROM generate_series(1, :active_cars) AS n;
+
+SET session_replication_role = DEFAULT;
+
+VACUUM ANALYZE;
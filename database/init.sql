@@ -6,6 +6,15 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 -- расширение для криптографии
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
+-- расширение для gist-индексов по uuid (ограничение исключения для бронирований)
+CREATE EXTENSION IF NOT EXISTS "btree_gist";
+
+-- расширение для нечеткого поиска номеров (триграммы)
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- статистика выполнения запросов (нужен shared_preload_libraries = 'pg_stat_statements', см. docker-compose.yml)
+CREATE EXTENSION IF NOT EXISTS "pg_stat_statements";
+
 
 -- таблицы
 
@@ -80,12 +89,35 @@ CREATE TABLE parking_spots (
 );
 
 
+-- бронирования мест (на интервал времени, без пересечений для одного места)
+CREATE TABLE spot_reservations (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    spot_id UUID NOT NULL REFERENCES parking_spots(id) ON DELETE CASCADE,
+    car_id UUID REFERENCES cars(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    starts_at TIMESTAMP NOT NULL,
+    ends_at TIMESTAMP NOT NULL,
+    comment TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT reservation_period CHECK (ends_at > starts_at),
+    CONSTRAINT reservation_no_overlap EXCLUDE USING gist (
+        spot_id WITH =,
+        tsrange(starts_at, ends_at) WITH &&
+    )
+);
+
+
 -- тарифы
 CREATE TABLE tariffs (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     name VARCHAR(255) NOT NULL,
     price_per_hour NUMERIC(10,2) NOT NULL CHECK (price_per_hour >= 0),
     free_minutes INTEGER NOT NULL DEFAULT 0 CHECK (free_minutes >= 0),
+    night_price_per_hour NUMERIC(10,2) CHECK (night_price_per_hour >= 0), -- ночной тариф
+    night_start TIME,
+    night_end TIME,
+    weekend_price_per_hour NUMERIC(10,2) CHECK (weekend_price_per_hour >= 0), -- тариф выходного дня
+    daily_cap NUMERIC(10,2) CHECK (daily_cap >= 0), -- максимум за сутки
     zone_id UUID REFERENCES parking_zones(id) ON DELETE SET NULL,
     access_level_id UUID REFERENCES access_levels(id) ON DELETE SET NULL
 );
@@ -132,7 +164,13 @@ CREATE TABLE entry_logs (
     gate_id UUID NOT NULL REFERENCES gates(id) ON DELETE RESTRICT,
     attempt_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     result VARCHAR(10) NOT NULL CHECK (result IN ('allowed', 'denied')),
-    reason TEXT
+    reason TEXT,
+    -- повторные отказы одного номера на одних воротах сворачиваются в одну запись
+    attempt_count INTEGER NOT NULL DEFAULT 1 CHECK (attempt_count >= 1),
+    last_attempt_time TIMESTAMP,
+    -- автомобиль и владелец на момент попытки (журнал пользователя без соединения по номеру)
+    car_id UUID REFERENCES cars(id) ON DELETE SET NULL,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL
 );
 
 
@@ -148,53 +186,143 @@ CREATE TABLE audit_logs (
 );
 
 
+-- изменения, влияющие на офлайн-список допуска ворот (заполняются триггерами)
+CREATE TABLE allowlist_changes (
+    id BIGSERIAL PRIMARY KEY,
+    plate_number VARCHAR(20) NOT NULL,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- граница очистки allowlist_changes (одна строка)
+CREATE TABLE allowlist_sync (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    pruned_txid BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO allowlist_sync DEFAULT VALUES;
+
+
+-- снимки статистики БД (запросы, индексы, таблицы) для сравнения до и после выкладки (app/db_report.py)
+CREATE TABLE db_stats_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    taken_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    report JSONB NOT NULL
+);
+
+
+-- версия схемы: проверяется приложением при старте (app/startup.py), повышается каждой миграцией
+CREATE TABLE schema_version (
+    version INTEGER NOT NULL
+);
+
+INSERT INTO schema_version (version) VALUES (15);
+
+
 CREATE INDEX idx_parking_sessions_car_entry ON parking_sessions(car_id, entry_time, exit_time);
 CREATE INDEX idx_parking_sessions_status ON parking_sessions(status) WHERE status = 'active';
 CREATE INDEX idx_wallet_transactions_wallet_created ON wallet_transactions(wallet_id, created_at);
 CREATE INDEX idx_cars_plate_number ON cars(plate_number);
 CREATE INDEX idx_entry_logs_plate_time ON entry_logs(plate_number, attempt_time);
+CREATE INDEX idx_entry_logs_user_time ON entry_logs(user_id, attempt_time) WHERE user_id IS NOT NULL;
 CREATE INDEX idx_audit_logs_entity ON audit_logs(entity_type, entity_id);
 CREATE INDEX idx_parking_sessions_entry_time ON parking_sessions(entry_time);
 CREATE INDEX idx_wallets_user_id ON wallets(user_id);
+-- одно место — не больше одной активной сессии (гонка между въездами, app/spot_allocator.py)
+CREATE UNIQUE INDEX uq_parking_sessions_active_spot ON parking_sessions(spot_id) WHERE status = 'active';
+CREATE INDEX idx_spot_reservations_car ON spot_reservations(car_id, starts_at);
+CREATE INDEX idx_allowlist_changes_txid ON allowlist_changes(txid);
 
 
 -- функции
 
--- расчет стоимости парковки
+-- нормализация номера для нечеткого поиска: без разделителей, кириллица -> латиница, О и O -> 0
+-- (должна совпадать с app/plate_index.py)
+CREATE OR REPLACE FUNCTION normalize_plate(p_plate_number TEXT)
+RETURNS TEXT AS $$
+    SELECT translate(upper(regexp_replace(p_plate_number, '[^[:alnum:]]', '', 'g')),
+                     'АВЕКМНОРСТУХO', 'ABEKMH0PCTYX0');
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+-- триграммный индекс по нормализованному номеру (поиск при ошибках распознавания)
+CREATE INDEX idx_cars_plate_trgm ON cars USING gin (normalize_plate(plate_number) gin_trgm_ops);
+
+
+-- расчет стоимости парковки: та же недельная сетка ставок, что в app/pricing.py
+-- (ночная ставка важнее ставки выходного дня, лимит за календарные сутки)
 CREATE OR REPLACE FUNCTION calculate_parking_cost(
     p_entry_time TIMESTAMP,
     p_exit_time TIMESTAMP,
     p_tariff_id UUID
 ) RETURNS NUMERIC AS $$
 DECLARE
-    v_price_per_hour NUMERIC;
-    v_free_minutes INTEGER;
-    v_duration_minutes INTEGER;
-    v_billable_minutes INTEGER;
-    v_cost NUMERIC;
+    v_tariff tariffs%ROWTYPE;
+    v_entry TIMESTAMP;
+    v_offset INTEGER;
+    v_start INTEGER;
+    v_end INTEGER;
+    v_day INTEGER;
+    v_lo INTEGER;
+    v_hi INTEGER;
+    v_night_start INTEGER;
+    v_night_end INTEGER;
+    v_rate NUMERIC;
+    v_day_cost NUMERIC;
+    v_cost NUMERIC := 0;
 BEGIN
-    SELECT price_per_hour, free_minutes
-    INTO v_price_per_hour, v_free_minutes
-    FROM tariffs
-    WHERE id = p_tariff_id;
+    SELECT * INTO v_tariff FROM tariffs WHERE id = p_tariff_id;
     
-    IF v_price_per_hour IS NULL THEN
+    IF NOT FOUND THEN
         RAISE EXCEPTION 'Tariff not found';
     END IF;
     
-    -- длительность в минутах
-    v_duration_minutes := EXTRACT(EPOCH FROM (p_exit_time - p_entry_time)) / 60;
+    -- минуты считаются от начала суток въезда; длительность округляется до целых минут
+    v_entry := date_trunc('minute', p_entry_time);
+    v_offset := EXTRACT(HOUR FROM v_entry)::INTEGER * 60 + EXTRACT(MINUTE FROM v_entry)::INTEGER;
+    v_start := v_offset + v_tariff.free_minutes;
+    v_end := v_offset + ROUND(EXTRACT(EPOCH FROM (p_exit_time - p_entry_time)) / 60)::INTEGER;
     
-    -- вычитаем бесплатные минуты
-    v_billable_minutes := GREATEST(0, v_duration_minutes - v_free_minutes);
+    IF v_tariff.night_price_per_hour IS NOT NULL
+       AND v_tariff.night_start IS NOT NULL AND v_tariff.night_end IS NOT NULL THEN
+        v_night_start := EXTRACT(HOUR FROM v_tariff.night_start)::INTEGER * 60 + EXTRACT(MINUTE FROM v_tariff.night_start)::INTEGER;
+        v_night_end := EXTRACT(HOUR FROM v_tariff.night_end)::INTEGER * 60 + EXTRACT(MINUTE FROM v_tariff.night_end)::INTEGER;
+    END IF;
     
-    -- расчет стоимости (почасовая тарификация)
-    v_cost := (v_billable_minutes / 60.0) * v_price_per_hour;
+    -- стоимость в рублях * минуты / час, по суткам
+    v_day := v_start / 1440;
+    WHILE v_start < v_end AND v_day * 1440 < v_end LOOP
+        v_lo := GREATEST(v_start, v_day * 1440) - v_day * 1440;
+        v_hi := LEAST(v_end, (v_day + 1) * 1440) - v_day * 1440;
+        
+        v_rate := v_tariff.price_per_hour;
+        IF v_tariff.weekend_price_per_hour IS NOT NULL
+           AND EXTRACT(ISODOW FROM v_entry::DATE + v_day) >= 6 THEN
+            v_rate := v_tariff.weekend_price_per_hour;
+        END IF;
+        v_day_cost := v_rate * (v_hi - v_lo);
+        
+        -- ночные минуты (интервал может переходить через полночь)
+        IF v_night_start < v_night_end THEN
+            v_day_cost := v_day_cost + (v_tariff.night_price_per_hour - v_rate)
+                * GREATEST(0, LEAST(v_hi, v_night_end) - GREATEST(v_lo, v_night_start));
+        ELSIF v_night_start > v_night_end THEN
+            v_day_cost := v_day_cost + (v_tariff.night_price_per_hour - v_rate)
+                * (GREATEST(0, LEAST(v_hi, v_night_end) - v_lo) + GREATEST(0, v_hi - GREATEST(v_lo, v_night_start)));
+        END IF;
+        
+        IF v_tariff.daily_cap IS NOT NULL THEN
+            v_day_cost := LEAST(v_day_cost, v_tariff.daily_cap * 60);
+        END IF;
+        
+        v_cost := v_cost + v_day_cost;
+        v_day := v_day + 1;
+    END LOOP;
     
     -- округление до 2 знаков
-    RETURN ROUND(v_cost, 2);
+    RETURN ROUND(v_cost / 60, 2);
 END;
-$$ LANGUAGE plpgsql;
+$$ LANGUAGE plpgsql STABLE;
 
 
 -- получение баланса пользователя
@@ -276,9 +404,15 @@ $$ LANGUAGE plpgsql;
 
 
 -- обработка выезда
+-- p_cost передаётся приложением (движок тарифов app/pricing.py);
+-- если не передан, стоимость считается по тому же расписанию через calculate_parking_cost();
+-- p_session_id приложение берёт из реестра активных сессий, чтобы не искать сессию заново;
+-- кошелек всегда определяется здесь по текущему владельцу автомобиля
 CREATE OR REPLACE FUNCTION process_exit(
     p_car_id UUID,
-    p_exit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    p_exit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    p_cost NUMERIC DEFAULT NULL,
+    p_session_id UUID DEFAULT NULL
 ) RETURNS TABLE(
     success BOOLEAN,
     session_id UUID,
@@ -295,13 +429,20 @@ DECLARE
     v_user_id UUID;
     v_new_balance NUMERIC;
 BEGIN
-    -- поиск активной сессии
-    SELECT id, tariff_id, entry_time, car_id
-    INTO v_session_id, v_tariff_id, v_entry_time, v_car_id
-    FROM parking_sessions
-    WHERE car_id = p_car_id AND status = 'active'
-    ORDER BY entry_time DESC
-    LIMIT 1;
+    -- поиск активной сессии (по id, если приложение его знает)
+    IF p_session_id IS NOT NULL THEN
+        SELECT id, tariff_id, entry_time, car_id
+        INTO v_session_id, v_tariff_id, v_entry_time, v_car_id
+        FROM parking_sessions
+        WHERE id = p_session_id AND car_id = p_car_id AND status = 'active';
+    ELSE
+        SELECT id, tariff_id, entry_time, car_id
+        INTO v_session_id, v_tariff_id, v_entry_time, v_car_id
+        FROM parking_sessions
+        WHERE car_id = p_car_id AND status = 'active'
+        ORDER BY entry_time DESC
+        LIMIT 1;
+    END IF;
     
     IF v_session_id IS NULL THEN
         RETURN QUERY SELECT FALSE, NULL::UUID, NULL::NUMERIC, 'No active session found'::TEXT;
@@ -309,7 +450,7 @@ BEGIN
     END IF;
     
     -- расчет стоимости
-    SELECT calculate_parking_cost(v_entry_time, p_exit_time, v_tariff_id) INTO v_cost;
+    v_cost := COALESCE(p_cost, calculate_parking_cost(v_entry_time, p_exit_time, v_tariff_id));
     
     -- получение id кошелька
     SELECT w.id, c.user_id INTO v_wallet_id, v_user_id
@@ -347,6 +488,36 @@ END;
 $$ LANGUAGE plpgsql;
 
 
+-- флаги записи офлайн-списка допуска: биты 0-1 — уровень баланса (0: < 50, 1: < 500, 2: < 2000, 3: больше),
+-- бит 7 — пользователь заблокирован
+CREATE OR REPLACE FUNCTION allowlist_flags(p_balance NUMERIC, p_is_blocked BOOLEAN)
+RETURNS SMALLINT AS $$
+    SELECT (CASE
+                WHEN p_balance IS NULL OR p_balance < 50 THEN 0
+                WHEN p_balance < 500 THEN 1
+                WHEN p_balance < 2000 THEN 2
+                ELSE 3
+            END
+            + CASE WHEN p_is_blocked THEN 128 ELSE 0 END)::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+
+-- очистка истории изменений списка допуска старше p_keep
+CREATE OR REPLACE FUNCTION prune_allowlist_changes(p_keep INTERVAL)
+RETURNS VOID AS $$
+BEGIN
+    WITH deleted AS (
+        DELETE FROM allowlist_changes
+        WHERE changed_at < LOCALTIMESTAMP - p_keep
+        RETURNING txid
+    )
+    UPDATE allowlist_sync
+    SET pruned_txid = GREATEST(pruned_txid, (SELECT MAX(txid) + 1 FROM deleted))
+    WHERE EXISTS (SELECT 1 FROM deleted);
+END;
+$$ LANGUAGE plpgsql;
+
+
 -- триггеры
 
 -- функция обновления времени кошелька
@@ -382,6 +553,210 @@ FOR EACH ROW
 EXECUTE FUNCTION create_wallet_for_user();
 
 
+-- автомобиль и владелец записи журнала въезда по номеру на момент записи;
+-- приложение передает их само, триггер заполняет пропуски (ручные записи, скрипты, смена номера)
+CREATE OR REPLACE FUNCTION fill_entry_log_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- номер не менялся или автомобиль указан явно
+        IF NEW.plate_number IS NOT DISTINCT FROM OLD.plate_number OR NEW.car_id IS DISTINCT FROM OLD.car_id THEN
+            RETURN NEW;
+        END IF;
+        NEW.car_id := NULL;
+        NEW.user_id := NULL;
+    END IF;
+
+    IF NEW.car_id IS NULL THEN
+        SELECT id, user_id INTO NEW.car_id, NEW.user_id
+        FROM cars
+        WHERE plate_number = NEW.plate_number;
+    ELSIF NEW.user_id IS NULL THEN
+        SELECT user_id INTO NEW.user_id FROM cars WHERE id = NEW.car_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER trigger_fill_entry_log_owner
+BEFORE INSERT OR UPDATE OF plate_number ON entry_logs
+FOR EACH ROW
+EXECUTE FUNCTION fill_entry_log_owner();
+
+
+-- запись номеров, у которых изменилась запись в офлайн-списке допуска
+CREATE OR REPLACE FUNCTION track_allowlist_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'cars' THEN
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO allowlist_changes (plate_number) VALUES (OLD.plate_number);
+        END IF;
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO allowlist_changes (plate_number) VALUES (NEW.plate_number);
+        ELSIF TG_OP = 'UPDATE' AND NEW.plate_number <> OLD.plate_number THEN
+            INSERT INTO allowlist_changes (plate_number) VALUES (NEW.plate_number);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'users' THEN
+        INSERT INTO allowlist_changes (plate_number)
+        SELECT plate_number FROM cars WHERE user_id = NEW.id;
+    ELSE
+        INSERT INTO allowlist_changes (plate_number)
+        SELECT plate_number FROM cars WHERE user_id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER trigger_allowlist_cars
+AFTER INSERT OR DELETE OR UPDATE OF plate_number, is_active, user_id ON cars
+FOR EACH ROW
+EXECUTE FUNCTION track_allowlist_change();
+
+
+CREATE TRIGGER trigger_allowlist_users
+AFTER UPDATE OF is_blocked ON users
+FOR EACH ROW
+WHEN (OLD.is_blocked IS DISTINCT FROM NEW.is_blocked)
+EXECUTE FUNCTION track_allowlist_change();
+
+
+-- баланс меняется при каждом выезде, запись нужна только при смене уровня
+CREATE TRIGGER trigger_allowlist_wallets
+AFTER UPDATE OF balance ON wallets
+FOR EACH ROW
+WHEN (allowlist_flags(OLD.balance, FALSE) IS DISTINCT FROM allowlist_flags(NEW.balance, FALSE))
+EXECUTE FUNCTION track_allowlist_change();
+
+
+-- уведомление воркеров об открытии и закрытии сессий (реестр активных сессий в памяти)
+CREATE OR REPLACE FUNCTION notify_active_session_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_payload JSON;
+BEGIN
+    IF TG_OP <> 'DELETE' AND NEW.status = 'active' THEN
+        SELECT json_build_object(
+            'op', 'open',
+            'session_id', NEW.id,
+            'car_id', NEW.car_id,
+            'plate_number', c.plate_number,
+            'tariff_id', NEW.tariff_id,
+            'entry_time', NEW.entry_time,
+            'spot_id', NEW.spot_id
+        )
+        INTO v_payload
+        FROM cars c
+        WHERE c.id = NEW.car_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        v_payload := json_build_object('op', 'close', 'session_id', OLD.id);
+    ELSE
+        v_payload := json_build_object('op', 'close', 'session_id', NEW.id);
+    END IF;
+
+    PERFORM pg_notify('active_sessions', v_payload::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER trigger_notify_active_sessions
+AFTER INSERT OR UPDATE OR DELETE ON parking_sessions
+FOR EACH ROW
+EXECUTE FUNCTION notify_active_session_change();
+
+
+-- рассылка воркерам инвалидации кэшей (канал cache_invalidation);
+-- необязательный аргумент триггера — колонка, старое и новое значение которой передаются в keys
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_id UUID;
+    v_keys JSONB := '[]'::JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_id := OLD.id;
+    ELSE
+        v_id := NEW.id;
+    END IF;
+
+    IF TG_NARGS > 0 THEN
+        IF TG_OP <> 'INSERT' THEN
+            v_keys := v_keys || jsonb_build_array(to_jsonb(OLD) ->> TG_ARGV[0]);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            v_keys := v_keys || jsonb_build_array(to_jsonb(NEW) ->> TG_ARGV[0]);
+        END IF;
+    END IF;
+
+    PERFORM pg_notify(
+        'cache_invalidation',
+        json_build_object('entity', TG_TABLE_NAME, 'id', v_id, 'keys', v_keys)::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER trigger_cache_tariffs
+AFTER INSERT OR UPDATE OR DELETE ON tariffs
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_parking_zones
+AFTER INSERT OR UPDATE OR DELETE ON parking_zones
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_parking_spots
+AFTER INSERT OR UPDATE OR DELETE ON parking_spots
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_spot_reservations
+AFTER INSERT OR UPDATE OR DELETE ON spot_reservations
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_gates
+AFTER INSERT OR UPDATE OR DELETE ON gates
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_access_levels
+AFTER INSERT OR UPDATE OR DELETE ON access_levels
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_cars
+AFTER INSERT OR DELETE OR UPDATE OF plate_number, is_active ON cars
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation('plate_number');
+
+
+CREATE TRIGGER trigger_cache_users
+AFTER UPDATE OF is_blocked ON users
+FOR EACH ROW
+WHEN (OLD.is_blocked IS DISTINCT FROM NEW.is_blocked)
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+-- только пополнения: после них машине, которой отказали из-за баланса, можно въехать
+CREATE TRIGGER trigger_cache_wallets
+AFTER UPDATE OF balance ON wallets
+FOR EACH ROW
+WHEN (NEW.balance > OLD.balance)
+EXECUTE FUNCTION notify_cache_invalidation('user_id');
+
+
 -- представления
 
 -- текущая загрузка парковки
@@ -0,0 +1,85 @@
+-- миграция: ночной/выходной тариф и лимит за сутки (для существующих баз)
+
+ALTER TABLE tariffs
+    ADD COLUMN IF NOT EXISTS night_price_per_hour NUMERIC(10,2) CHECK (night_price_per_hour >= 0),
+    ADD COLUMN IF NOT EXISTS night_start TIME,
+    ADD COLUMN IF NOT EXISTS night_end TIME,
+    ADD COLUMN IF NOT EXISTS weekend_price_per_hour NUMERIC(10,2) CHECK (weekend_price_per_hour >= 0),
+    ADD COLUMN IF NOT EXISTS daily_cap NUMERIC(10,2) CHECK (daily_cap >= 0);
+
+-- у process_exit() появился параметр p_cost, старую сигнатуру удаляем
+DROP FUNCTION IF EXISTS process_exit(UUID, TIMESTAMP);
+
+-- обработка выезда
+-- p_cost передаётся приложением (движок тарифов с ночными/выходными ставками и лимитом за сутки);
+-- если не передан, стоимость считается по базовому тарифу через calculate_parking_cost()
+CREATE OR REPLACE FUNCTION process_exit(
+    p_car_id UUID,
+    p_exit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    p_cost NUMERIC DEFAULT NULL
+) RETURNS TABLE(
+    success BOOLEAN,
+    session_id UUID,
+    cost NUMERIC,
+    message TEXT
+) AS $$
+DECLARE
+    v_session_id UUID;
+    v_tariff_id UUID;
+    v_entry_time TIMESTAMP;
+    v_car_id UUID;  
+    v_cost NUMERIC;
+    v_wallet_id UUID;
+    v_user_id UUID;
+    v_new_balance NUMERIC;
+BEGIN
+    -- поиск активной сессии
+    SELECT id, tariff_id, entry_time, car_id
+    INTO v_session_id, v_tariff_id, v_entry_time, v_car_id
+    FROM parking_sessions
+    WHERE car_id = p_car_id AND status = 'active'
+    ORDER BY entry_time DESC
+    LIMIT 1;
+    
+    IF v_session_id IS NULL THEN
+        RETURN QUERY SELECT FALSE, NULL::UUID, NULL::NUMERIC, 'No active session found'::TEXT;
+        RETURN;
+    END IF;
+    
+    -- расчет стоимости
+    v_cost := COALESCE(p_cost, calculate_parking_cost(v_entry_time, p_exit_time, v_tariff_id));
+    
+    -- получение id кошелька
+    SELECT w.id, c.user_id INTO v_wallet_id, v_user_id
+    FROM cars c
+    JOIN wallets w ON w.user_id = c.user_id
+    WHERE c.id = p_car_id;
+    
+    -- обновление баланса и создание транзакции
+    BEGIN
+        -- списание средств
+        UPDATE wallets
+        SET balance = balance - v_cost,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = v_wallet_id
+        RETURNING balance INTO v_new_balance;
+        
+        -- закрытие сессии
+        UPDATE parking_sessions
+        SET exit_time = p_exit_time,
+            total_cost = v_cost,
+            status = 'completed'
+        WHERE id = v_session_id;
+        
+        -- запись транзакции
+        INSERT INTO wallet_transactions (wallet_id, session_id, amount, operation_type, comment)
+        VALUES (v_wallet_id, v_session_id, -v_cost, 'parking_charge', 
+                format('Parking session %s', v_session_id));
+        
+        RETURN QUERY SELECT TRUE, v_session_id, v_cost, format('Exit processed. Cost: %.2f, New balance: %.2f', v_cost, v_new_balance)::TEXT;
+        
+    EXCEPTION WHEN OTHERS THEN
+        RETURN QUERY SELECT FALSE, v_session_id, NULL::NUMERIC, format('Error processing exit: %s', SQLERRM)::TEXT;
+    END;
+END;
+$$ LANGUAGE plpgsql;
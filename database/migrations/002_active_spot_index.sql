@@ -0,0 +1,3 @@
+-- миграция: индекс для поиска занятых мест (автоматическое назначение места при въезде)
+
+CREATE INDEX IF NOT EXISTS idx_parking_sessions_active_spot ON parking_sessions(spot_id) WHERE status = 'active';
@@ -0,0 +1,21 @@
+-- миграция: бронирования мест на интервал времени
+
+CREATE EXTENSION IF NOT EXISTS "btree_gist";
+
+CREATE TABLE IF NOT EXISTS spot_reservations (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    spot_id UUID NOT NULL REFERENCES parking_spots(id) ON DELETE CASCADE,
+    car_id UUID REFERENCES cars(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    starts_at TIMESTAMP NOT NULL,
+    ends_at TIMESTAMP NOT NULL,
+    comment TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT reservation_period CHECK (ends_at > starts_at),
+    CONSTRAINT reservation_no_overlap EXCLUDE USING gist (
+        spot_id WITH =,
+        tsrange(starts_at, ends_at) WITH &&
+    )
+);
+
+CREATE INDEX IF NOT EXISTS idx_spot_reservations_car ON spot_reservations(car_id, starts_at);
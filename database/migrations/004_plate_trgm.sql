@@ -0,0 +1,12 @@
+-- миграция: нечеткий поиск номеров при ошибках распознавания
+
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- должна совпадать с app/plate_index.py
+CREATE OR REPLACE FUNCTION normalize_plate(p_plate_number TEXT)
+RETURNS TEXT AS $$
+    SELECT translate(upper(regexp_replace(p_plate_number, '[^[:alnum:]]', '', 'g')),
+                     'АВЕКМНОРСТУХO', 'ABEKMH0PCTYX0');
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+CREATE INDEX IF NOT EXISTS idx_cars_plate_trgm ON cars USING gin (normalize_plate(plate_number) gin_trgm_ops);
@@ -0,0 +1,4 @@
+-- миграция: счетчик попыток в entry_logs (свертка повторных отказов)
+
+ALTER TABLE entry_logs ADD COLUMN IF NOT EXISTS attempt_count INTEGER NOT NULL DEFAULT 1 CHECK (attempt_count >= 1);
+ALTER TABLE entry_logs ADD COLUMN IF NOT EXISTS last_attempt_time TIMESTAMP;
@@ -0,0 +1,97 @@
+-- миграция: офлайн-список допуска для контроллеров ворот (снимок и дельты)
+
+CREATE TABLE IF NOT EXISTS allowlist_changes (
+    id BIGSERIAL PRIMARY KEY,
+    plate_number VARCHAR(20) NOT NULL,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS allowlist_sync (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    pruned_txid BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO allowlist_sync DEFAULT VALUES ON CONFLICT DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_allowlist_changes_txid ON allowlist_changes(txid);
+
+
+-- флаги записи офлайн-списка допуска: биты 0-1 — уровень баланса (0: < 50, 1: < 500, 2: < 2000, 3: больше),
+-- бит 7 — пользователь заблокирован
+CREATE OR REPLACE FUNCTION allowlist_flags(p_balance NUMERIC, p_is_blocked BOOLEAN)
+RETURNS SMALLINT AS $$
+    SELECT (CASE
+                WHEN p_balance IS NULL OR p_balance < 50 THEN 0
+                WHEN p_balance < 500 THEN 1
+                WHEN p_balance < 2000 THEN 2
+                ELSE 3
+            END
+            + CASE WHEN p_is_blocked THEN 128 ELSE 0 END)::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+
+-- очистка истории изменений списка допуска старше p_keep
+CREATE OR REPLACE FUNCTION prune_allowlist_changes(p_keep INTERVAL)
+RETURNS VOID AS $$
+BEGIN
+    WITH deleted AS (
+        DELETE FROM allowlist_changes
+        WHERE changed_at < LOCALTIMESTAMP - p_keep
+        RETURNING txid
+    )
+    UPDATE allowlist_sync
+    SET pruned_txid = GREATEST(pruned_txid, (SELECT MAX(txid) + 1 FROM deleted))
+    WHERE EXISTS (SELECT 1 FROM deleted);
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trigger_allowlist_cars ON cars;
+DROP TRIGGER IF EXISTS trigger_allowlist_users ON users;
+DROP TRIGGER IF EXISTS trigger_allowlist_wallets ON wallets;
+
+-- запись номеров, у которых изменилась запись в офлайн-списке допуска
+CREATE OR REPLACE FUNCTION track_allowlist_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'cars' THEN
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO allowlist_changes (plate_number) VALUES (OLD.plate_number);
+        END IF;
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO allowlist_changes (plate_number) VALUES (NEW.plate_number);
+        ELSIF TG_OP = 'UPDATE' AND NEW.plate_number <> OLD.plate_number THEN
+            INSERT INTO allowlist_changes (plate_number) VALUES (NEW.plate_number);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'users' THEN
+        INSERT INTO allowlist_changes (plate_number)
+        SELECT plate_number FROM cars WHERE user_id = NEW.id;
+    ELSE
+        INSERT INTO allowlist_changes (plate_number)
+        SELECT plate_number FROM cars WHERE user_id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER trigger_allowlist_cars
+AFTER INSERT OR DELETE OR UPDATE OF plate_number, is_active, user_id ON cars
+FOR EACH ROW
+EXECUTE FUNCTION track_allowlist_change();
+
+
+CREATE TRIGGER trigger_allowlist_users
+AFTER UPDATE OF is_blocked ON users
+FOR EACH ROW
+WHEN (OLD.is_blocked IS DISTINCT FROM NEW.is_blocked)
+EXECUTE FUNCTION track_allowlist_change();
+
+
+-- баланс меняется при каждом выезде, запись нужна только при смене уровня
+CREATE TRIGGER trigger_allowlist_wallets
+AFTER UPDATE OF balance ON wallets
+FOR EACH ROW
+WHEN (allowlist_flags(OLD.balance, FALSE) IS DISTINCT FROM allowlist_flags(NEW.balance, FALSE))
+EXECUTE FUNCTION track_allowlist_change();
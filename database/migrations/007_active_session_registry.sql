@@ -0,0 +1,133 @@
+-- миграция: реестр активных сессий (process_exit по id сессии, уведомления воркерам)
+
+-- у process_exit() появились параметры p_session_id и p_wallet_id, старую сигнатуру удаляем
+DROP FUNCTION IF EXISTS process_exit(UUID, TIMESTAMP, NUMERIC);
+
+-- обработка выезда
+-- p_cost передаётся приложением (движок тарифов с ночными/выходными ставками и лимитом за сутки);
+-- если не передан, стоимость считается по базовому тарифу через calculate_parking_cost();
+-- p_session_id приложение берёт из реестра активных сессий, чтобы не искать сессию заново
+-- (p_wallet_id удален миграцией 015: кошелек всегда определяется по владельцу автомобиля)
+CREATE OR REPLACE FUNCTION process_exit(
+    p_car_id UUID,
+    p_exit_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    p_cost NUMERIC DEFAULT NULL,
+    p_session_id UUID DEFAULT NULL,
+    p_wallet_id UUID DEFAULT NULL
+) RETURNS TABLE(
+    success BOOLEAN,
+    session_id UUID,
+    cost NUMERIC,
+    message TEXT
+) AS $$
+DECLARE
+    v_session_id UUID;
+    v_tariff_id UUID;
+    v_entry_time TIMESTAMP;
+    v_car_id UUID;  
+    v_cost NUMERIC;
+    v_wallet_id UUID;
+    v_user_id UUID;
+    v_new_balance NUMERIC;
+BEGIN
+    -- поиск активной сессии (по id, если приложение его знает)
+    IF p_session_id IS NOT NULL THEN
+        SELECT id, tariff_id, entry_time, car_id
+        INTO v_session_id, v_tariff_id, v_entry_time, v_car_id
+        FROM parking_sessions
+        WHERE id = p_session_id AND car_id = p_car_id AND status = 'active';
+    ELSE
+        SELECT id, tariff_id, entry_time, car_id
+        INTO v_session_id, v_tariff_id, v_entry_time, v_car_id
+        FROM parking_sessions
+        WHERE car_id = p_car_id AND status = 'active'
+        ORDER BY entry_time DESC
+        LIMIT 1;
+    END IF;
+    
+    IF v_session_id IS NULL THEN
+        RETURN QUERY SELECT FALSE, NULL::UUID, NULL::NUMERIC, 'No active session found'::TEXT;
+        RETURN;
+    END IF;
+    
+    -- расчет стоимости
+    v_cost := COALESCE(p_cost, calculate_parking_cost(v_entry_time, p_exit_time, v_tariff_id));
+    
+    -- получение id кошелька
+    v_wallet_id := p_wallet_id;
+    IF v_wallet_id IS NULL THEN
+        SELECT w.id, c.user_id INTO v_wallet_id, v_user_id
+        FROM cars c
+        JOIN wallets w ON w.user_id = c.user_id
+        WHERE c.id = p_car_id;
+    END IF;
+    
+    -- обновление баланса и создание транзакции
+    BEGIN
+        -- списание средств
+        UPDATE wallets
+        SET balance = balance - v_cost,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = v_wallet_id
+        RETURNING balance INTO v_new_balance;
+        
+        -- закрытие сессии
+        UPDATE parking_sessions
+        SET exit_time = p_exit_time,
+            total_cost = v_cost,
+            status = 'completed'
+        WHERE id = v_session_id;
+        
+        -- запись транзакции
+        INSERT INTO wallet_transactions (wallet_id, session_id, amount, operation_type, comment)
+        VALUES (v_wallet_id, v_session_id, -v_cost, 'parking_charge', 
+                format('Parking session %s', v_session_id));
+        
+        RETURN QUERY SELECT TRUE, v_session_id, v_cost, format('Exit processed. Cost: %.2f, New balance: %.2f', v_cost, v_new_balance)::TEXT;
+        
+    EXCEPTION WHEN OTHERS THEN
+        RETURN QUERY SELECT FALSE, v_session_id, NULL::NUMERIC, format('Error processing exit: %s', SQLERRM)::TEXT;
+    END;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trigger_notify_active_sessions ON parking_sessions;
+
+-- уведомление воркеров об открытии и закрытии сессий (реестр активных сессий в памяти)
+CREATE OR REPLACE FUNCTION notify_active_session_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_payload JSON;
+BEGIN
+    IF TG_OP <> 'DELETE' AND NEW.status = 'active' THEN
+        SELECT json_build_object(
+            'op', 'open',
+            'session_id', NEW.id,
+            'car_id', NEW.car_id,
+            'plate_number', c.plate_number,
+            'tariff_id', NEW.tariff_id,
+            'entry_time', NEW.entry_time,
+            'spot_id', NEW.spot_id,
+            'wallet_id', w.id
+        )
+        INTO v_payload
+        FROM cars c
+        LEFT JOIN wallets w ON w.user_id = c.user_id
+        WHERE c.id = NEW.car_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        v_payload := json_build_object('op', 'close', 'session_id', OLD.id);
+    ELSE
+        v_payload := json_build_object('op', 'close', 'session_id', NEW.id);
+    END IF;
+
+    PERFORM pg_notify('active_sessions', v_payload::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER trigger_notify_active_sessions
+AFTER INSERT OR UPDATE OR DELETE ON parking_sessions
+FOR EACH ROW
+EXECUTE FUNCTION notify_active_session_change();
@@ -0,0 +1,100 @@
+-- миграция: инвалидация кэшей воркеров через LISTEN/NOTIFY
+
+-- рассылка воркерам инвалидации кэшей (канал cache_invalidation);
+-- необязательный аргумент триггера — колонка, старое и новое значение которой передаются в keys
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_id UUID;
+    v_keys JSONB := '[]'::JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_id := OLD.id;
+    ELSE
+        v_id := NEW.id;
+    END IF;
+
+    IF TG_NARGS > 0 THEN
+        IF TG_OP <> 'INSERT' THEN
+            v_keys := v_keys || jsonb_build_array(to_jsonb(OLD) ->> TG_ARGV[0]);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            v_keys := v_keys || jsonb_build_array(to_jsonb(NEW) ->> TG_ARGV[0]);
+        END IF;
+    END IF;
+
+    PERFORM pg_notify(
+        'cache_invalidation',
+        json_build_object('entity', TG_TABLE_NAME, 'id', v_id, 'keys', v_keys)::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS trigger_cache_tariffs ON tariffs;
+DROP TRIGGER IF EXISTS trigger_cache_parking_zones ON parking_zones;
+DROP TRIGGER IF EXISTS trigger_cache_parking_spots ON parking_spots;
+DROP TRIGGER IF EXISTS trigger_cache_spot_reservations ON spot_reservations;
+DROP TRIGGER IF EXISTS trigger_cache_gates ON gates;
+DROP TRIGGER IF EXISTS trigger_cache_access_levels ON access_levels;
+DROP TRIGGER IF EXISTS trigger_cache_cars ON cars;
+DROP TRIGGER IF EXISTS trigger_cache_users ON users;
+DROP TRIGGER IF EXISTS trigger_cache_wallets ON wallets;
+
+
+CREATE TRIGGER trigger_cache_tariffs
+AFTER INSERT OR UPDATE OR DELETE ON tariffs
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_parking_zones
+AFTER INSERT OR UPDATE OR DELETE ON parking_zones
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_parking_spots
+AFTER INSERT OR UPDATE OR DELETE ON parking_spots
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_spot_reservations
+AFTER INSERT OR UPDATE OR DELETE ON spot_reservations
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_gates
+AFTER INSERT OR UPDATE OR DELETE ON gates
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_access_levels
+AFTER INSERT OR UPDATE OR DELETE ON access_levels
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+CREATE TRIGGER trigger_cache_cars
+AFTER INSERT OR DELETE OR UPDATE OF plate_number, is_active ON cars
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation('plate_number');
+
+
+CREATE TRIGGER trigger_cache_users
+AFTER UPDATE OF is_blocked ON users
+FOR EACH ROW
+WHEN (OLD.is_blocked IS DISTINCT FROM NEW.is_blocked)
+EXECUTE FUNCTION notify_cache_invalidation();
+
+
+-- только пополнения: после них машине, которой отказали из-за баланса, можно въехать
+CREATE TRIGGER trigger_cache_wallets
+AFTER UPDATE OF balance ON wallets
+FOR EACH ROW
+WHEN (NEW.balance > OLD.balance)
+EXECUTE FUNCTION notify_cache_invalidation('user_id');
@@ -0,0 +1,9 @@
+-- миграция: версия схемы для быстрой проверки при старте приложения
+-- (каждая следующая миграция должна обновлять schema_version)
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL
+);
+
+DELETE FROM schema_version;
+INSERT INTO schema_version (version) VALUES (9);
@@ -0,0 +1,40 @@
+-- миграция: автомобиль и владелец в entry_logs (журнал пользователя без соединения по номеру)
+-- старые записи заполняет скрипт: python scripts/backfill_entry_log_owners.py
+-- CREATE INDEX CONCURRENTLY: выполнять через psql -f без --single-transaction
+
+ALTER TABLE entry_logs ADD COLUMN IF NOT EXISTS car_id UUID REFERENCES cars(id) ON DELETE SET NULL;
+ALTER TABLE entry_logs ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users(id) ON DELETE SET NULL;
+
+CREATE OR REPLACE FUNCTION fill_entry_log_owner()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- номер не менялся или автомобиль указан явно
+        IF NEW.plate_number IS NOT DISTINCT FROM OLD.plate_number OR NEW.car_id IS DISTINCT FROM OLD.car_id THEN
+            RETURN NEW;
+        END IF;
+        NEW.car_id := NULL;
+        NEW.user_id := NULL;
+    END IF;
+
+    IF NEW.car_id IS NULL THEN
+        SELECT id, user_id INTO NEW.car_id, NEW.user_id
+        FROM cars
+        WHERE plate_number = NEW.plate_number;
+    ELSIF NEW.user_id IS NULL THEN
+        SELECT user_id INTO NEW.user_id FROM cars WHERE id = NEW.car_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_fill_entry_log_owner ON entry_logs;
+CREATE TRIGGER trigger_fill_entry_log_owner
+BEFORE INSERT OR UPDATE OF plate_number ON entry_logs
+FOR EACH ROW
+EXECUTE FUNCTION fill_entry_log_owner();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_entry_logs_user_time ON entry_logs(user_id, attempt_time) WHERE user_id IS NOT NULL;
+
+DELETE FROM schema_version;
+INSERT INTO schema_version (version) VALUES (10);
@@ -0,0 +1,13 @@
+-- миграция: отчет по статистике БД (pg_stat_statements, использование индексов, размеры таблиц)
+-- расширению нужен shared_preload_libraries = 'pg_stat_statements' (перезапуск PostgreSQL)
+
+CREATE EXTENSION IF NOT EXISTS "pg_stat_statements";
+
+CREATE TABLE IF NOT EXISTS db_stats_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    taken_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    report JSONB NOT NULL
+);
+
+DELETE FROM schema_version;
+INSERT INTO schema_version (version) VALUES (11);
@@ -0,0 +1,13 @@
+-- миграция: normalize_plate() переводит кириллическую О в ноль, как латинскую O
+-- (должна совпадать с app/plate_index.py); индекс по выражению строится заново
+
+CREATE OR REPLACE FUNCTION normalize_plate(p_plate_number TEXT)
+RETURNS TEXT AS $$
+    SELECT translate(upper(regexp_replace(p_plate_number, '[^[:alnum:]]', '', 'g')),
+                     'АВЕКМНОРСТУХO', 'ABEKMH0PCTYX0');
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+REINDEX INDEX idx_cars_plate_trgm;
+
+DELETE FROM schema_version;
+INSERT INTO schema_version (version) VALUES (12);
@@ -0,0 +1,80 @@
+-- миграция: calculate_parking_cost() учитывает ночную ставку, ставку выходного дня
+-- и лимит за сутки, как app/pricing.py (process_exit() без p_cost, прямые вызовы из SQL)
+
+-- расчет стоимости парковки: та же недельная сетка ставок, что в app/pricing.py
+-- (ночная ставка важнее ставки выходного дня, лимит за календарные сутки)
+CREATE OR REPLACE FUNCTION calculate_parking_cost(
+    p_entry_time TIMESTAMP,
+    p_exit_time TIMESTAMP,
+    p_tariff_id UUID
+) RETURNS NUMERIC AS $$
+DECLARE
+    v_tariff tariffs%ROWTYPE;
+    v_entry TIMESTAMP;
+    v_offset INTEGER;
+    v_start INTEGER;
+    v_end INTEGER;
+    v_day INTEGER;
+    v_lo INTEGER;
+    v_hi INTEGER;
+    v_night_start INTEGER;
+    v_night_end INTEGER;
+    v_rate NUMERIC;
+    v_day_cost NUMERIC;
+    v_cost NUMERIC := 0;
+BEGIN
+    SELECT * INTO v_tariff FROM tariffs WHERE id = p_tariff_id;
+    
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Tariff not found';
+    END IF;
+    
+    -- минуты считаются от начала суток въезда; длительность округляется до целых минут
+    v_entry := date_trunc('minute', p_entry_time);
+    v_offset := EXTRACT(HOUR FROM v_entry)::INTEGER * 60 + EXTRACT(MINUTE FROM v_entry)::INTEGER;
+    v_start := v_offset + v_tariff.free_minutes;
+    v_end := v_offset + ROUND(EXTRACT(EPOCH FROM (p_exit_time - p_entry_time)) / 60)::INTEGER;
+    
+    IF v_tariff.night_price_per_hour IS NOT NULL
+       AND v_tariff.night_start IS NOT NULL AND v_tariff.night_end IS NOT NULL THEN
+        v_night_start := EXTRACT(HOUR FROM v_tariff.night_start)::INTEGER * 60 + EXTRACT(MINUTE FROM v_tariff.night_start)::INTEGER;
+        v_night_end := EXTRACT(HOUR FROM v_tariff.night_end)::INTEGER * 60 + EXTRACT(MINUTE FROM v_tariff.night_end)::INTEGER;
+    END IF;
+    
+    -- стоимость в рублях * минуты / час, по суткам
+    v_day := v_start / 1440;
+    WHILE v_start < v_end AND v_day * 1440 < v_end LOOP
+        v_lo := GREATEST(v_start, v_day * 1440) - v_day * 1440;
+        v_hi := LEAST(v_end, (v_day + 1) * 1440) - v_day * 1440;
+        
+        v_rate := v_tariff.price_per_hour;
+        IF v_tariff.weekend_price_per_hour IS NOT NULL
+           AND EXTRACT(ISODOW FROM v_entry::DATE + v_day) >= 6 THEN
+            v_rate := v_tariff.weekend_price_per_hour;
+        END IF;
+        v_day_cost := v_rate * (v_hi - v_lo);
+        
+        -- ночные минуты (интервал может переходить через полночь)
+        IF v_night_start < v_night_end THEN
+            v_day_cost := v_day_cost + (v_tariff.night_price_per_hour - v_rate)
+                * GREATEST(0, LEAST(v_hi, v_night_end) - GREATEST(v_lo, v_night_start));
+        ELSIF v_night_start > v_night_end THEN
+            v_day_cost := v_day_cost + (v_tariff.night_price_per_hour - v_rate)
+                * (GREATEST(0, LEAST(v_hi, v_night_end) - v_lo) + GREATEST(0, v_hi - GREATEST(v_lo, v_night_start)));
+        END IF;
+        
+        IF v_tariff.daily_cap IS NOT NULL THEN
+            v_day_cost := LEAST(v_day_cost, v_tariff.daily_cap * 60);
+        END IF;
+        
+        v_cost := v_cost + v_day_cost;
+        v_day := v_day + 1;
+    END LOOP;
+    
+    -- округление до 2 знаков
+    RETURN ROUND(v_cost / 60, 2);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+DELETE FROM schema_version;
+INSERT INTO schema_version (version) VALUES (13);
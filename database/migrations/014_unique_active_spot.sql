@@ -0,0 +1,14 @@
+-- миграция: одно место не может быть занято двумя активными сессиями.
+-- FOR UPDATE SKIP LOCKED в app/spot_allocator.py блокирует только строку места и не видит
+-- сессию, закоммиченную другим въездом после начала выборки; уникальный индекс отсекает
+-- такую вставку, и въезд берет следующее свободное место
+
+-- перед созданием индекса убедиться, что дублей нет:
+-- SELECT spot_id, COUNT(*) FROM parking_sessions WHERE status = 'active' AND spot_id IS NOT NULL
+-- GROUP BY spot_id HAVING COUNT(*) > 1;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_parking_sessions_active_spot
+    ON parking_sessions(spot_id) WHERE status = 'active';
+DROP INDEX IF EXISTS idx_parking_sessions_active_spot;
+
+DELETE FROM schema_version;
+INSERT INTO schema_version (version) VALUES (14);
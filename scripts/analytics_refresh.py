@@ -0,0 +1,50 @@
+"""
+Обновление аналитического хранилища (app/analytics_store.py): сессии,
+транзакции и журнал въездов копируются из PostgreSQL в Parquet-файлы
+ANALYTICS_DIR, по которым отчёты /api/analytics/* считает DuckDB.
+
+Повторно копируются только месяцы, которые ещё могут измениться (с месяца
+самой старой активной сессии); --full копирует всё заново — например, раз в
+сутки, чтобы подхватить правки старых записей. Если хранилище уже обновляет
+другой процесс (поток приложения с ANALYTICS_STORE=on), скрипт ничего не
+делает.
+
+Нужен duckdb (requirements.txt). Источник — ANALYTICS_SOURCE_URL (например,
+реплика), по умолчанию DATABASE_URL.
+
+Пример:
+    python scripts/analytics_refresh.py
+    */15 * * * * cd /app && python scripts/analytics_refresh.py       # cron
+    0 4 * * * cd /app && python scripts/analytics_refresh.py --full
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import analytics_store  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="скопировать все месяцы заново")
+    args = parser.parse_args()
+
+    if not analytics_store.installed():
+        parser.error("нужен duckdb: pip install -r requirements.txt")
+
+    print(f"Обновление {analytics_store.ANALYTICS_DIR}...")
+    state = analytics_store.refresh(full=args.full)
+    if state is None:
+        print("Хранилище уже обновляет другой процесс")
+        return
+
+    print(f"Готово за {state['duration_s']} с ({'полностью' if state['full'] else 'с ' + state['copied_from']}):")
+    for name, rows in state["rows"].items():
+        print(f"  {name}: {rows}")
+
+
+if __name__ == "__main__":
+    main()
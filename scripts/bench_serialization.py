@@ -0,0 +1,177 @@
+"""
+Бенчмарк сериализации больших ответов: штатный путь FastAPI (response_model ->
+serialize_response -> JSONResponse) против app/fast_json.py.
+
+Два сценария:
+  models - список ParkingSessionResponse из ORM-подобных объектов
+           (как в GET /api/parking-sessions);
+  rows   - строки SQL-результата, как в app/routers/admin.py: раньше из них
+           собирались словари с float()/str(), теперь строки кодируются
+           orjson напрямую.
+
+База не нужна: данные генерируются в памяти.
+
+Пример:
+    python scripts/bench_serialization.py --rows 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app import fast_json  # noqa: E402
+from app.schemas import ParkingSessionResponse  # noqa: E402
+
+
+class FakeResult:
+    """Минимальная замена SQLAlchemy Result: keys() и итерация по кортежам"""
+
+    def __init__(self, keys, rows):
+        self._keys = keys
+        self._rows = rows
+
+    def keys(self):
+        return self._keys
+
+    def fetchall(self):
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+def make_sessions(count: int, rng: random.Random) -> list:
+    started = datetime(2024, 1, 1)
+    sessions = []
+    for _ in range(count):
+        entry_time = started + timedelta(minutes=rng.randrange(500_000))
+        sessions.append(
+            SimpleNamespace(
+                id=uuid.UUID(int=rng.getrandbits(128)),
+                car_id=uuid.UUID(int=rng.getrandbits(128)),
+                spot_id=uuid.UUID(int=rng.getrandbits(128)) if rng.random() < 0.8 else None,
+                tariff_id=uuid.UUID(int=rng.getrandbits(128)),
+                entry_time=entry_time,
+                exit_time=entry_time + timedelta(minutes=rng.randrange(1, 600)),
+                total_cost=Decimal(rng.randrange(0, 100_000)) / 100,
+                status="completed",
+            )
+        )
+    return sessions
+
+
+def make_rows(count: int, rng: random.Random) -> FakeResult:
+    keys = ["user_id", "phone", "total_sessions", "total_spent", "avg_session_cost"]
+    rows = [
+        (
+            uuid.UUID(int=rng.getrandbits(128)),
+            f"+7900{rng.randrange(10_000_000):07d}",
+            rng.randrange(500),
+            Decimal(rng.randrange(10_000_000)) / 100,
+            Decimal(rng.randrange(100_000)) / 100,
+        )
+        for _ in range(count)
+    ]
+    return FakeResult(keys, rows)
+
+
+def old_models(field, sessions) -> bytes:
+    content = asyncio.run(serialize_response(field=field, response_content=sessions))
+    return JSONResponse(content).body
+
+
+def new_models(sessions) -> bytes:
+    return fast_json.model_list_response(ParkingSessionResponse, sessions).body
+
+
+def old_rows(field, result) -> bytes:
+    # так GET /api/admin/stats/top-users собирал ответ до fast_json
+    content = [
+        {
+            "user_id": str(row[0]),
+            "phone": row[1],
+            "total_sessions": row[2],
+            "total_spent": float(row[3]) if row[3] else 0,
+            "avg_session_cost": float(row[4]) if row[4] else 0,
+        }
+        for row in result.fetchall()
+    ]
+    content = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(content).body
+
+
+def new_rows(result) -> bytes:
+    return fast_json.rows_response(result).body
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="вывести результаты в JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    models_field = create_response_field(name="Response", type_=List[ParkingSessionResponse])
+    rows_field = create_response_field(name="Response", type_=List[dict])
+
+    results = []
+    for count in args.rows:
+        sessions = make_sessions(count, rng)
+        rows = make_rows(count, rng)
+        # ответ по моделям должен совпадать со штатным путём FastAPI
+        assert json.loads(old_models(models_field, sessions)) == json.loads(new_models(sessions))
+
+        for scenario, old, new in (
+            ("models", lambda: old_models(models_field, sessions), lambda: new_models(sessions)),
+            ("rows", lambda: old_rows(rows_field, rows), lambda: new_rows(rows)),
+        ):
+            old_s = best_of(args.repeat, old)
+            new_s = best_of(args.repeat, new)
+            results.append(
+                {
+                    "scenario": scenario,
+                    "rows": count,
+                    "fastapi_ms": round(old_s * 1000, 1),
+                    "fast_json_ms": round(new_s * 1000, 1),
+                    "speedup": round(old_s / new_s, 1),
+                }
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for r in results:
+        print(
+            f"{r['scenario']:>6} {r['rows']:>8} строк: FastAPI {r['fastapi_ms']} мс, "
+            f"fast_json {r['fast_json_ms']} мс (x{r['speedup']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк холодного старта: время от запуска процесса uvicorn до первого
+успешного ответа /health для разных режимов SCHEMA_INIT.
+
+Пример:
+    python scripts/bench_startup.py --runs 10 --modes create_all check
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_health(url: str, process: subprocess.Popen, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError(f"{url} не ответил за {timeout} с")
+
+
+def measure(mode: str, port: int, timeout: float) -> dict:
+    env = dict(os.environ, SCHEMA_INIT=mode)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        wait_for_health(f"http://127.0.0.1:{port}/health", process, timeout)
+        total = time.perf_counter() - started
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/startup", timeout=1) as response:
+            phases = json.load(response)
+        return {"total_ms": round(total * 1000, 1), "phases": phases}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--modes", nargs="+", default=["create_all", "check"])
+    parser.add_argument("--json", action="store_true", help="вывести результаты в JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        runs = [measure(mode, args.port, args.timeout) for _ in range(args.runs)]
+        totals = [run["total_ms"] for run in runs]
+        results[mode] = {
+            "median_ms": statistics.median(totals),
+            "min_ms": min(totals),
+            "max_ms": max(totals),
+            "last_phases": runs[-1]["phases"],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for mode, result in results.items():
+        print(
+            f"{mode:>12}: медиана {result['median_ms']} мс "
+            f"(мин {result['min_ms']}, макс {result['max_ms']}), фазы: {result['last_phases']}"
+        )
+
+
+if __name__ == "__main__":
+    main()